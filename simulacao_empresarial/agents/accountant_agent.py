@@ -1,53 +1,127 @@
-import pandas as pd
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+import asyncio
+import logging
+import os
+import numpy as np
+from functools import cached_property
+from .journal import JournalEntry, closing_period, create_journal, is_closing_period
+from .ledger_context import LedgerContextBuilder
+from .llm_cache import ainvoke_cached, invoke_cached, stream_cached
+from .resources import get_llm, get_prompt
+
+logger = logging.getLogger(__name__)
+
+# Contas de resultado: zeradas no fechamento de cada trimestre contra Lucros Acumulados
+INCOME_ACCOUNTS = ('Sales', 'COGS', 'Marketing', 'R&D', 'Donations')
 
 class AccountantAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(temperature=0.2, model="gpt-4o-mini")
-        self.prompt = PromptTemplate(
-            input_variables=["ledger", "query"],
-            template="Você é um contador experiente. Com base no seguinte razão contábil:\n\n{ledger}\n\nPor favor, {query}"
+    def __init__(self, game_id=None, journal=None):
+        # Com LEDGER_BACKEND=sqlite, um game_id já gravado retoma o razão do jogo (para consulta)
+        self.journal = journal if journal is not None else create_journal(game_id)
+        self.context_builder = LedgerContextBuilder(
+            max_tokens=int(os.getenv("LEDGER_CONTEXT_MAX_TOKENS", "1000")),
+            recent_periods=int(os.getenv("LEDGER_CONTEXT_RECENT_PERIODS", "8")),
+        )
+        self.last_context = None
+        if not len(self.journal):
+            self.initialize_accounts()
+
+    @cached_property
+    def prompt(self):
+        return get_prompt(
+            "Você é um contador experiente. Com base no seguinte resumo do razão contábil:\n\n{ledger}\n\nPor favor, {query}"
         )
-        self.chain = self.prompt | self.llm
-        self.ledger = pd.DataFrame(columns=['Date', 'Account', 'Debit', 'Credit', 'Description'])
-        self.initialize_accounts()
+
+    @cached_property
+    def llm(self):
+        return get_llm(temperature=0.2)
+
+    @cached_property
+    def chain(self):
+        return self.prompt | self.llm
+
+    @property
+    def ledger(self):
+        # Visão em DataFrame do razão, montada sob demanda a partir do journal
+        return self.journal.to_dataframe()
 
     def initialize_accounts(self):
-        initial_transactions = [
-            ('Initial', 'Cash', 100000, 0, 'Initial cash balance'),
-            ('Initial', 'Capital', 0, 100000, 'Initial capital')
-        ]
-        for transaction in initial_transactions:
-            self.record_transaction(*transaction)
+        entry = JournalEntry('Initial')
+        entry.debit('Cash', 100000, 'Initial cash balance')
+        entry.credit('Capital', 100000, 'Initial capital')
+        self.post_entry(entry)
+
+    def post_entry(self, entry):
+        # Valida e aplica todas as linhas do lançamento em uma única operação
+        self.journal.post(entry)
 
     def record_transaction(self, date, account, debit, credit, description):
-        new_entry = pd.DataFrame({
-            'Date': [date],
-            'Account': [account],
-            'Debit': [debit],
-            'Credit': [credit],
-            'Description': [description]
-        })
-        self.ledger = pd.concat([self.ledger, new_entry], ignore_index=True)
-        print(f"Transaction recorded: {date}, {account}, Debit: {debit}, Credit: {credit}, {description}")
-
-    def get_account_balance(self, account):
-        account_transactions = self.ledger[self.ledger['Account'] == account]
-        balance = account_transactions['Debit'].sum() - account_transactions['Credit'].sum()
-        return balance
-
-    def generate_income_statement(self):
-        sales = abs(self.get_account_balance('Sales'))
-        cogs = abs(self.get_account_balance('COGS'))
+        self.journal.append(date, account, debit, credit, description)
+        logger.debug("Transaction recorded: %s, %s, Debit: %s, Credit: %s, %s", date, account, debit, credit, description)
+
+    @staticmethod
+    def period_label(quarter):
+        # Aceita o número do trimestre (0 = saldos iniciais) ou o rótulo usado no razão
+        if quarter is None or isinstance(quarter, str):
+            return quarter
+        return 'Initial' if quarter == 0 else f'Q{quarter}'
+
+    def get_account_balance(self, account, quarter=None):
+        # Saldo acumulado até o trimestre informado (ou até o último lançamento)
+        return self.journal.balance(account, through=self.period_label(quarter))
+
+    def get_quarter_activity(self, account, quarter):
+        # Movimento líquido da conta apenas no trimestre informado
+        return self.journal.period_balance(account, self.period_label(quarter))
+
+    def get_period_activity(self, account, quarter=None):
+        # Movimento desde a abertura do período (último fechamento) até o trimestre informado
+        label = self.period_label(quarter)
+        return self.get_account_balance(account, quarter) - self.journal.opening_balance(account, label)
+
+    def close_quarter(self, quarter):
+        """Encerra o trimestre: zera as contas de resultado em Lucros Acumulados e guarda os saldos de abertura."""
+        label = self.period_label(quarter)
+        if self.journal.is_closed(label):
+            raise ValueError(f"O período {label} já foi encerrado")
+        entry = JournalEntry(closing_period(label))
+        net_profit = 0.0
+        for account in INCOME_ACCOUNTS:
+            balance = self.get_account_balance(account, quarter)
+            if balance > 0:
+                entry.credit(account, balance, 'Closing entry')
+            elif balance < 0:
+                entry.debit(account, -balance, 'Closing entry')
+            net_profit -= balance
+        if net_profit > 0:
+            entry.credit('Retained Earnings', net_profit, 'Net profit for the period')
+        elif net_profit < 0:
+            entry.debit('Retained Earnings', -net_profit, 'Net loss for the period')
+        if entry.lines:
+            self.post_entry(entry)
+            label = entry.date
+        self.journal.checkpoint(label)
+        return net_profit
+
+    def compare_quarters(self, account, previous_quarter, current_quarter):
+        previous = self.get_quarter_activity(account, previous_quarter)
+        current = self.get_quarter_activity(account, current_quarter)
+        return {
+            "Previous": previous,
+            "Current": current,
+            "Change": current - previous
+        }
+
+    def generate_income_statement(self, quarter=None):
+        sales = abs(self.get_account_balance('Sales', quarter))
+        cogs = abs(self.get_account_balance('COGS', quarter))
         gross_margin = sales - cogs
-        marketing = abs(self.get_account_balance('Marketing'))
-        rd = abs(self.get_account_balance('R&D'))
-        donations = abs(self.get_account_balance('Donations'))
+        marketing = abs(self.get_account_balance('Marketing', quarter))
+        rd = abs(self.get_account_balance('R&D', quarter))
+        donations = abs(self.get_account_balance('Donations', quarter))
         net_profit = gross_margin - marketing - rd - donations
 
-        print(f"Income Statement Debug: Sales={sales}, COGS={cogs}, Marketing={marketing}, R&D={rd}, Donations={donations}")
+        logger.debug("Income Statement: Sales=%s, COGS=%s, Marketing=%s, R&D=%s, Donations=%s",
+                     sales, cogs, marketing, rd, donations)
 
         return {
             "Sales": sales,
@@ -59,15 +133,18 @@ class AccountantAgent:
             "Net Profit": net_profit
         }
 
-    def generate_balance_sheet(self):
-        cash = self.get_account_balance('Cash')
-        inventory = self.get_account_balance('Inventory')
-        capital_investment = self.get_account_balance('Capital Investment')
+    def generate_balance_sheet(self, quarter=None, income_statement=None):
+        if income_statement is None:
+            income_statement = self.generate_income_statement(quarter)
+        cash = self.get_account_balance('Cash', quarter)
+        inventory = self.get_account_balance('Inventory', quarter)
+        capital_investment = self.get_account_balance('Capital Investment', quarter)
         total_assets = cash + inventory + capital_investment
 
-        loans = self.get_account_balance('Loans')
-        retained_earnings = self.get_account_balance('Retained Earnings')
-        capital = abs(self.get_account_balance('Capital'))  # Corrigido para ser positivo
+        loans = self.get_account_balance('Loans', quarter)
+        # Lucros de trimestres fechados (saldo credor) mais o resultado do trimestre ainda aberto
+        retained_earnings = -self.get_account_balance('Retained Earnings', quarter) + income_statement["Net Profit"]
+        capital = abs(self.get_account_balance('Capital', quarter))  # Corrigido para ser positivo
         total_liabilities_equity = loans + retained_earnings + capital
 
         return {
@@ -85,13 +162,16 @@ class AccountantAgent:
             "Total Liabilities + Equity": total_liabilities_equity
         }
 
-    def generate_cash_flow(self):
-        beginning_cash = self.get_beginning_cash()
-        net_profit = self.generate_income_statement()["Net Profit"]
+    def generate_cash_flow(self, quarter=None, income_statement=None):
+        # Reaproveita a DRE já calculada em generate_financial_statements
+        if income_statement is None:
+            income_statement = self.generate_income_statement(quarter)
+        beginning_cash = self.get_beginning_cash(quarter)
+        net_profit = income_statement["Net Profit"]
         depreciation = self.calculate_depreciation()
-        capital_investment = abs(self.get_account_balance('Capital Investment'))
-        inventory_change = self.calculate_inventory_change()
-        loan_changes = self.calculate_loan_changes()
+        capital_investment = abs(self.get_period_activity('Capital Investment', quarter))
+        inventory_change = self.calculate_inventory_change(quarter)
+        loan_changes = self.calculate_loan_changes(quarter)
         
         ending_cash = beginning_cash + net_profit + depreciation - capital_investment - inventory_change + loan_changes
         
@@ -109,9 +189,9 @@ class AccountantAgent:
             }
         }
 
-    def generate_production_marketing_report(self):
+    def generate_production_marketing_report(self, quarter=None):
         # Simulação baseada no cenário econômico e desempenho de vendas
-        sales = abs(self.get_account_balance('Sales'))
+        sales = abs(self.get_account_balance('Sales', quarter))
         production = min(sales, 3000)  # Assumindo capacidade máxima de 3000
         price_per_unit = 100  # Valor arbitrário, ajuste conforme necessário
         cost_per_unit = 10  # Valor arbitrário, ajuste conforme necessário
@@ -122,7 +202,7 @@ class AccountantAgent:
                 "Factory Capacity": 3000,
                 "Capacity Utilization": (production / 3000) * 100,
                 "Production Cost/Unit": cost_per_unit,
-                "Inventory": self.get_account_balance('Inventory'),
+                "Inventory": self.get_account_balance('Inventory', quarter),
                 "Employees": 10  # Valor arbitrário, ajuste conforme necessário
             },
             "Marketing": {
@@ -135,40 +215,78 @@ class AccountantAgent:
             }
         }
 
-    def get_beginning_cash(self):
-        initial_cash = self.ledger[self.ledger['Account'] == 'Cash'].iloc[0]['Debit']
-        return initial_cash
+    def get_beginning_cash(self, quarter=None):
+        # Caixa nos saldos de abertura do trimestre (fechamento anterior)
+        return self.journal.opening_balance('Cash', self.period_label(quarter))
 
     def calculate_depreciation(self):
         # Simplificação: assumindo que não há depreciação por enquanto
         return 0
 
-    def calculate_inventory_change(self):
-        inventory_transactions = self.ledger[self.ledger['Account'] == 'Inventory']
-        inventory_change = inventory_transactions['Debit'].sum() - inventory_transactions['Credit'].sum()
-        return inventory_change
+    def calculate_inventory_change(self, quarter=None):
+        return self.get_period_activity('Inventory', quarter)
+
+    def calculate_loan_changes(self, quarter=None):
+        return -self.get_period_activity('Loans', quarter)
+
+    def get_quarterly_series(self):
+        # Receita, lucro e caixa por trimestre direto do cubo período x conta (sem varrer o razão)
+        movements = self.journal.period_balances()
+        accounts = {account: i for i, account in enumerate(self.journal.accounts)}
+
+        def movement(account):
+            if account not in accounts:
+                return np.zeros(len(movements))
+            return movements[:, accounts[account]]
+
+        revenue = -movement('Sales')
+        expenses = movement('COGS') + movement('Marketing') + movement('R&D') + movement('Donations')
+        quarters = [i for i, date in enumerate(self.journal.dates) if date != 'Initial' and not is_closing_period(date)]
+        return {
+            "quarter": [self.journal.dates[i] for i in quarters],
+            "revenue": revenue[quarters],
+            "profit": (revenue - expenses)[quarters],
+            "cash": np.cumsum(movement('Cash'))[quarters],
+        }
 
-    def calculate_loan_changes(self):
-        loan_transactions = self.ledger[self.ledger['Account'] == 'Loans']
-        loan_changes = loan_transactions['Credit'].sum() - loan_transactions['Debit'].sum()
-        return loan_changes
+    def format_ledger(self):
+        lines = ["Current Ledger:", self.ledger.to_string(), "", "Account Balances:"]
+        for account in ['Sales', 'COGS', 'Marketing', 'R&D', 'Donations', 'Cash', 'Inventory', 'Capital', 'Retained Earnings']:
+            lines.append(f"{account}: {self.get_account_balance(account)}")
+        return "\n".join(lines)
 
     def print_ledger(self):
-        print("Current Ledger:")
-        print(self.ledger.to_string())
-        print("\nAccount Balances:")
-        for account in ['Sales', 'COGS', 'Marketing', 'R&D', 'Donations', 'Cash', 'Inventory', 'Capital']:
-            balance = self.get_account_balance(account)
-            print(f"{account}: {balance}")
-
-    def generate_financial_statements(self):
+        print(self.format_ledger())
+
+    def log_ledger(self):
+        # Formatar o razão inteiro é caro: só quando o nível DEBUG está ativo
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self.format_ledger())
+
+    def generate_financial_statements(self, quarter=None):
+        income_statement = self.generate_income_statement(quarter)
         return {
-            "Income Statement": self.generate_income_statement(),
-            "Balance Sheet": self.generate_balance_sheet(),
-            "Cash Flow": self.generate_cash_flow(),
-            "Production and Marketing Report": self.generate_production_marketing_report()
+            "Income Statement": income_statement,
+            "Balance Sheet": self.generate_balance_sheet(quarter, income_statement),
+            "Cash Flow": self.generate_cash_flow(quarter, income_statement),
+            "Production and Marketing Report": self.generate_production_marketing_report(quarter)
         }
 
+    def build_context(self):
+        # Resumo compacto do razão para o prompt; last_context guarda a contagem de tokens
+        self.last_context = self.context_builder.build(self.journal)
+        return self.last_context["text"]
+
     def analyze_financial_position(self):
         query = "Analise a posição financeira da empresa e forneça insights sobre sua saúde financeira."
-        return self.chain.invoke({"ledger": str(self.ledger), "query": query})
+        return invoke_cached(self.prompt, self.llm, {"ledger": self.build_context(), "query": query}, agent="accountant")
+
+    async def aanalyze_financial_position(self):
+        query = "Analise a posição financeira da empresa e forneça insights sobre sua saúde financeira."
+        # Montar o contexto lê o razão (consultas síncronas no backend SQLite): fora do event loop
+        ledger = await asyncio.to_thread(self.build_context)
+        return await ainvoke_cached(self.prompt, self.llm, {"ledger": ledger, "query": query}, agent="accountant")
+
+    def stream_financial_analysis(self):
+        query = "Analise a posição financeira da empresa e forneça insights sobre sua saúde financeira."
+        return stream_cached(self.prompt, self.llm, {"ledger": self.build_context(), "query": query}, agent="accountant")
@@ -1,19 +1,29 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from functools import cached_property
+from .resources import get_llm, get_prompt
+from .llm_cache import invoke_cached
 
 class CompetitorAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(temperature=0.7, model="gpt-4o-mini")
-        self.prompt = PromptTemplate(
-            input_variables=["market_conditions"],
-            template="Simule as ações dos competidores em um jogo de simulação empresarial. Condições de mercado: {market_conditions}"
+    @cached_property
+    def prompt(self):
+        return get_prompt(
+            "Simule as ações dos competidores em um jogo de simulação empresarial. Condições de mercado: {market_conditions}"
         )
-        self.chain = self.prompt | self.llm
 
-    def simulate(self, market_conditions):
-        return self.chain.invoke({"market_conditions": market_conditions})
+    @cached_property
+    def llm(self):
+        return get_llm(temperature=0.7)
 
-    def simulate(self, df):
-        # Implementação simplificada
+    @cached_property
+    def chain(self):
+        return self.prompt | self.llm
+
+    def simulate_with_llm(self, market_conditions):
+        return invoke_cached(self.prompt, self.llm, {"market_conditions": market_conditions}, agent="competitor")
+
+    def simulate(self, history):
+        # Implementação simplificada. history é o QuarterHistory do jogo; o DataFrame
+        # (history.to_dataframe()) só deve ser montado quando a simulação precisar dele
         return "Competidores mantêm suas estratégias"
+
+    def stream(self, history):
+        yield self.simulate(history)
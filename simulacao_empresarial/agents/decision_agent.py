@@ -1,15 +1,21 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from functools import cached_property
+from .resources import get_llm, get_prompt
+from .llm_cache import invoke_cached
 
 class DecisionAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(temperature=0.5, model="gpt-4o-mini")
-        self.prompt = PromptTemplate(
-            input_variables=["game_state"],
-            template="Com base no estado atual do jogo: {game_state}, sugira decisões estratégicas para o próximo trimestre."
+    @cached_property
+    def prompt(self):
+        return get_prompt(
+            "Com base no estado atual do jogo: {game_state}, sugira decisões estratégicas para o próximo trimestre."
         )
-        self.chain = self.prompt | self.llm
+
+    @cached_property
+    def llm(self):
+        return get_llm(temperature=0.5)
+
+    @cached_property
+    def chain(self):
+        return self.prompt | self.llm
 
     def suggest(self, game_state):
-        return self.chain.invoke({"game_state": str(game_state)})
+        return invoke_cached(self.prompt, self.llm, {"game_state": str(game_state)}, agent="decision")
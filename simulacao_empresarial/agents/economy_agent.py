@@ -1,15 +1,23 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+from functools import cached_property
+from .resources import get_chat_prompt, get_llm
 
 class EconomyAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(temperature=0.7, model="gpt-4o-mini")  # ou "gpt-4" se tiver acesso
-        self.prompt = ChatPromptTemplate.from_template(
+    @cached_property
+    def prompt(self):
+        return get_chat_prompt(
             "Simule a economia para um jogo de simulação empresarial. "
             "Forneça dados sobre PIB, inflação, taxa de juros e desemprego. "
             "Histórico: {history}"
         )
 
-    def simulate(self, df):
-        # Implementação simplificada
+    @cached_property
+    def llm(self):
+        return get_llm(temperature=0.7)  # ou model="gpt-4" se tiver acesso
+
+    def simulate(self, history):
+        # Implementação simplificada. history é o QuarterHistory do jogo; o DataFrame
+        # (history.to_dataframe()) só deve ser montado quando a simulação precisar dele
         return "Economia estável"
+
+    def stream(self, history):
+        yield self.simulate(history)
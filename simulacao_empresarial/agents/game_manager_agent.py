@@ -1,33 +1,94 @@
+import asyncio
+import concurrent.futures
+import logging
 import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import cached_property
 from dotenv import load_dotenv
-from langchain_experimental.agents import create_pandas_dataframe_agent
-from langchain_openai import ChatOpenAI
-from langchain.agents.agent_types import AgentType
-import pandas as pd
 from .accountant_agent import AccountantAgent
 from .economy_agent import EconomyAgent
 from .competitor_agent import CompetitorAgent
-import ast
+from .journal import JournalEntry, create_journal, journal_from_state
+from .quarter_history import QuarterHistory
+from .kpi import KPITable
+from .llm_cache import invoke_cached
+from .model_client import call_deadline, model_backend
+from .resources import get_llm, get_prompt
+from utils.helpers import to_jsonable
+from utils.metrics import get_registry
+from utils.snapshot import dumps_snapshot, loads_snapshot
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Pool de threads limitado e compartilhado por todos os jogos do processo
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=int(os.getenv("AGENT_MAX_WORKERS", "8")),
+                thread_name_prefix="agent-call"
+            )
+        return _executor
+
+def require_api_key():
+    # Verifica se a chave da API está definida (desnecessária com o modelo offline)
+    if model_backend() == "openai" and not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("A chave da API da OpenAI não está definida. Por favor, configure a variável de ambiente OPENAI_API_KEY.")
+
 class GameManagerAgent:
-    def __init__(self):
-        # Verifica se a chave da API está definida
-        if not os.getenv("OPENAI_API_KEY"):
-            raise ValueError("A chave da API da OpenAI não está definida. Por favor, configure a variável de ambiente OPENAI_API_KEY.")
+    def __init__(self, game_id=None, journal=None):
+        require_api_key()
         
-        self.economy_agent = EconomyAgent()
-        self.competitor_agent = CompetitorAgent()
-        self.accountant = AccountantAgent()
+        # Identifica o jogo no razão em banco (LEDGER_BACKEND=sqlite)
+        self.game_id = game_id or uuid.uuid4().hex
+        if journal is None:
+            journal = create_journal(self.game_id)
+            if len(journal):
+                # O estado do jogo e o histórico não ficam no banco: retomar só o razão
+                # recomeçaria no trimestre 1 sobre períodos já encerrados
+                raise ValueError(f"O jogo {self.game_id} já existe no razão; use GameManagerAgent.restore com um snapshot")
+        self.accountant = AccountantAgent(self.game_id, journal)
         self.factory_capacity = 3000  # Defina um valor padrão para a capacidade da fábrica
-        self.df = pd.DataFrame()
+        self.call_timeout = float(os.getenv("AGENT_CALL_TIMEOUT", "60"))  # Segundos por chamada de agente
+        # Com o modelo offline não há espera de rede: as chamadas rodam no próprio thread
+        self.inline_calls = model_backend() == "offline"
+        self.history = QuarterHistory()
+        self._kpis = None
+        # Duração de cada fase do último trimestre (segundos), também enviada ao registro de métricas
+        self.last_timings = {}
         self.initial_state()
 
+    # Agentes auxiliares construídos só no primeiro uso
+    @cached_property
+    def economy_agent(self):
+        return EconomyAgent()
+
+    @cached_property
+    def competitor_agent(self):
+        return CompetitorAgent()
+
+    @property
+    def df(self):
+        # Visão em DataFrame do histórico colunar (colunas numéricas tipadas + textos)
+        return self.history.to_dataframe()
+
     def create_agent(self):
+        # Importações pesadas (agente pandas) só quando o agente é de fato criado
+        from langchain_experimental.agents import create_pandas_dataframe_agent
+        from langchain.agents.agent_types import AgentType
         return create_pandas_dataframe_agent(
-            ChatOpenAI(temperature=0, model="gpt-4o-mini"),
+            get_llm(temperature=0, max_retries=int(os.getenv("MODEL_MAX_RETRIES", "3"))),
             self.df,
             verbose=True,
             agent_type=AgentType.OPENAI_FUNCTIONS,
@@ -35,6 +96,34 @@ class GameManagerAgent:
             allow_dangerous_code=True
         )
 
+    @property
+    def kpis(self):
+        # Indicadores sobre o histórico corrente (refeitos se o histórico for trocado, ex.: restore)
+        if self._kpis is None or self._kpis.history is not self.history:
+            self._kpis = KPITable(self.history)
+        return self._kpis
+
+    def ask(self, question, phrase=False):
+        """Responde perguntas sobre o jogo: indicadores locais para as de rotina, agente pandas para as abertas."""
+        registry = get_registry()
+        answer = self.kpis.answer(question)
+        if answer is None:
+            registry.inc("kpi_queries_total", source="agent")
+            with registry.timer("kpi_query_seconds", source="agent"):
+                return self.create_agent().invoke({"input": question})["output"]
+        registry.inc("kpi_queries_total", source="local")
+        if not phrase:
+            return answer['text']
+        # O modelo só reescreve os números já calculados, sem consultar os dados
+        prompt = get_prompt(
+            "Você é um analista de negócios. Responda à pergunta do jogador em poucas frases, "
+            "usando apenas estes indicadores:\n{facts}\n\nPergunta: {question}"
+        )
+        with registry.timer("kpi_query_seconds", source="phrased"):
+            response = invoke_cached(prompt, get_llm(temperature=0), {"facts": answer['text'], "question": question},
+                                     agent="kpi")
+        return getattr(response, 'content', response)
+
     def initialize_game_state(self):
         self.game_state = {
             "quarter": 0,
@@ -45,101 +134,279 @@ class GameManagerAgent:
 
     def run_game(self, player_decisions):
         try:
-            self.game_state["quarter"] += 1
-            current_quarter = self.game_state["quarter"]
-            
-            # Simular a economia
-            economy_data = self.economy_agent.simulate(self.df)
+            current_quarter = self.start_quarter()
             
-            # Simular competidores
-            competitors_data = self.competitor_agent.simulate(self.df)
+            # Economia e competidores não dependem um do outro nem do razão: rodam em paralelo
+            economy_future = self.submit_call(self.timed("economy", self.economy_agent.simulate), self.history)
+            competitors_future = self.submit_call(self.timed("competitors", self.competitor_agent.simulate), self.history)
             
             # Processar decisões do jogador e registrar transações
-            self.process_player_decisions(player_decisions, current_quarter)
+            self.post_quarter(player_decisions, current_quarter)
             
-            # Gerar relatórios financeiros
-            financial_reports = self.accountant.generate_financial_statements()
+            # A análise financeira roda enquanto os relatórios são gerados
+            analysis_future = self.submit_call(self.timed("analysis", self.accountant.analyze_financial_position))
+            with self.phase("statements"):
+                financial_reports = self.accountant.generate_financial_statements()
             
-            # Gerar análise financeira
-            financial_analysis = self.accountant.analyze_financial_position()
+            # Junção determinística: a ordem dos resultados não depende de quem termina primeiro
+            economy_data = self.wait_call(economy_future, "Dados da economia")
+            competitors_data = self.wait_call(competitors_future, "Dados dos competidores")
+            financial_analysis = self.wait_call(analysis_future, "Análise financeira")
             
-            # Atualizar o estado do jogo
-            self.game_state.update({
-                'economy': economy_data,
-                'competitors': competitors_data,
-                'financials': financial_reports,
-                'analysis': financial_analysis
-            })
+            return self.record_quarter(economy_data, competitors_data, financial_reports, financial_analysis)
+        except Exception as e:
+            logger.exception("Erro ao executar o jogo")
+            return f"Desculpe, ocorreu um erro ao executar o jogo: {str(e)}"
+
+    async def arun_game(self, player_decisions):
+        # Mesmo fluxo de run_game, mas aguardando o modelo sem bloquear o event loop
+        tasks = []
+        try:
+            current_quarter = self.start_quarter()
             
-            # Atualizar o DataFrame
-            new_row = pd.DataFrame([self.game_state])
-            self.df = pd.concat([self.df, new_row], ignore_index=True)
+            economy_task = asyncio.create_task(
+                asyncio.to_thread(self.timed("economy", self.economy_agent.simulate), self.history))
+            competitors_task = asyncio.create_task(
+                asyncio.to_thread(self.timed("competitors", self.competitor_agent.simulate), self.history))
+            tasks += [economy_task, competitors_task]
             
-            # Imprimir o razão contábil para debug
-            self.accountant.print_ledger()
+            # O razão grava e lê de forma síncrona (no backend SQLite, com commit a cada lançamento):
+            # lançamentos, relatórios e fechamento rodam em threads para não travar o event loop
+            await asyncio.to_thread(self.post_quarter, player_decisions, current_quarter)
             
-            return self.game_state
+            analysis_task = asyncio.create_task(self.atimed("analysis", self.accountant.aanalyze_financial_position()))
+            tasks.append(analysis_task)
+            financial_reports = await asyncio.to_thread(
+                self.timed("statements", self.accountant.generate_financial_statements))
+            
+            economy_data, competitors_data, financial_analysis = await asyncio.gather(
+                self.await_call(economy_task, "Dados da economia"),
+                self.await_call(competitors_task, "Dados dos competidores"),
+                self.await_call(analysis_task, "Análise financeira"),
+            )
+            
+            return await asyncio.to_thread(
+                self.record_quarter, economy_data, competitors_data, financial_reports, financial_analysis)
         except Exception as e:
-            print(f"Erro ao executar o jogo: {e}")
+            for task in tasks:
+                task.cancel()
+            logger.exception("Erro ao executar o jogo")
             return f"Desculpe, ocorreu um erro ao executar o jogo: {str(e)}"
 
-    def process_player_decisions(self, player_decisions, current_quarter):
+    def start_streamed_quarter(self, player_decisions):
+        # Parte determinística imediata (relatórios prontos para exibir) e geradores
+        # de texto para economia, competidores e análise, consumidos pela interface
+        current_quarter = self.start_quarter()
+        self.post_quarter(player_decisions, current_quarter)
+        with self.phase("statements"):
+            financial_reports = self.accountant.generate_financial_statements()
         try:
-            # Produção
-            production = min(player_decisions.get('production', 0), self.factory_capacity)
-            production_cost = production * 10  # Assumindo um custo de 10 por unidade
+            analysis_stream = self.accountant.stream_financial_analysis()
+        except Exception as e:
+            analysis_stream = iter([self.failure_message("Análise financeira", e)])
+        streams = {
+            "economy": self.economy_agent.stream(self.history),
+            "competitors": self.competitor_agent.stream(self.history),
+            "analysis": analysis_stream,
+        }
+        # O trimestre é encerrado e registrado antes do streaming: se a interface for
+        # interrompida (parada ou nova execução do Streamlit), o razão não fica aberto
+        self.record_quarter(None, None, financial_reports, None)
+        return financial_reports, streams
 
-            # Contabilizar custo de produção
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Inventory', production_cost, 0, 'Production added to inventory')
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Cash', 0, production_cost, 'Payment for production costs')
+    def finish_streamed_quarter(self, financial_reports, economy_data, competitors_data, financial_analysis):
+        # Só completa os textos do trimestre já registrado em start_streamed_quarter
+        texts = {'economy': economy_data, 'competitors': competitors_data, 'analysis': financial_analysis}
+        self.game_state.update(texts)
+        self.history.set_texts(len(self.history) - 1, **texts)
+        return self.game_state
+
+    def start_quarter(self):
+        self.game_state["quarter"] += 1
+        self.last_timings = {}
+        self._quarter_start = time.perf_counter()
+        return self.game_state["quarter"]
+
+    def post_quarter(self, player_decisions, current_quarter):
+        # O lançamento é atômico: se falhar, nada foi gravado e o contador volta ao trimestre anterior
+        try:
+            with self.phase("ledger_posting"):
+                self.process_player_decisions(player_decisions, current_quarter)
+        except Exception:
+            self.game_state["quarter"] = current_quarter - 1
+            raise
 
-            # Vendas
-            sales_price = player_decisions.get('price', 0)
-            marketing_expense = player_decisions.get('marketing', 0)
-            sales = production  # Assumindo que todas as unidades produzidas são vendidas
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.last_timings[name] = elapsed
+            get_registry().observe("quarter_phase_seconds", elapsed, phase=name)
 
-            sales_revenue = sales * sales_price
+    def timed(self, name, function):
+        # Versão de function que mede a própria execução (para rodar no pool de threads)
+        def run(*args):
+            with self.phase(name):
+                return function(*args)
+        return run
 
-            # Contabilizar receita de vendas
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Cash', sales_revenue, 0, 'Cash from sales')
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Sales', 0, sales_revenue, 'Revenue from sales')
+    async def atimed(self, name, coroutine):
+        with self.phase(name), call_deadline(time.monotonic() + self.call_timeout):
+            return await coroutine
 
-            # Contabilizar custo das mercadorias vendidas (COGS)
-            self.accountant.record_transaction(f'Q{current_quarter}', 'COGS', production_cost, 0, 'Cost of goods sold')
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Inventory', 0, production_cost, 'Reduction in inventory due to sales')
+    def submit_call(self, function, *args):
+        # O tempo limite conta a partir da submissão, não do momento da espera; o mesmo
+        # prazo vai para o cliente do modelo, que encerra a requisição e libera a thread
+        deadline = time.monotonic() + self.call_timeout
 
-            # Contabilizar despesas de marketing
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Marketing', marketing_expense, 0, 'Marketing expenses')
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Cash', 0, marketing_expense, 'Payment for marketing')
+        def run():
+            with call_deadline(deadline):
+                return function(*args)
 
-            # Outras decisões do jogador (R&D, doações, etc.)
-            rd_expense = player_decisions.get('research_development', 0)
-            donations = player_decisions.get('charitable_giving', 0)
+        if self.inline_calls:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(run())
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = _get_executor().submit(run)
+        future.deadline = deadline
+        return future
 
-            self.accountant.record_transaction(f'Q{current_quarter}', 'R&D', rd_expense, 0, 'R&D expenses')
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Cash', 0, rd_expense, 'Payment for R&D')
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Donations', donations, 0, 'Charitable donations')
-            self.accountant.record_transaction(f'Q{current_quarter}', 'Cash', 0, donations, 'Payment for donations')
+    def wait_call(self, future, label):
+        try:
+            return future.result(timeout=max(0, future.deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            # Só cancela o que ainda está na fila; a chamada em andamento termina pelo prazo no cliente
+            future.cancel()
+            return self.timeout_message(label)
+        except Exception as e:
+            # As decisões já foram lançadas: a falha de um agente não pode impedir o fechamento do trimestre
+            return self.failure_message(label, e)
 
+    async def await_call(self, task, label):
+        try:
+            return await asyncio.wait_for(task, timeout=self.call_timeout)
+        except asyncio.TimeoutError:
+            return self.timeout_message(label)
         except Exception as e:
-            print(f"Erro ao processar decisões do jogador: {e}")
+            return self.failure_message(label, e)
+
+    def timeout_message(self, label):
+        return f"{label} indisponível: tempo limite de {self.call_timeout:g}s excedido."
+
+    def failure_message(self, label, error):
+        logger.exception("Falha na chamada de agente: %s", label, exc_info=error)
+        return f"{label} indisponível: {error}"
+
+    def record_quarter(self, economy_data, competitors_data, financial_reports, financial_analysis):
+        # Atualizar o estado do jogo
+        self.game_state.update({
+            'economy': economy_data,
+            'competitors': competitors_data,
+            'financials': financial_reports,
+            'analysis': financial_analysis
+        })
+        
+        # Encerrar o trimestre: resultado em Lucros Acumulados e saldos de abertura do próximo
+        with self.phase("close"):
+            self.accountant.close_quarter(self.game_state['quarter'])
+        
+        # Acrescentar o trimestre ao histórico colunar
+        with self.phase("record"):
+            self.history.append(
+                self.game_state['quarter'],
+                financial_reports,
+                economy=economy_data,
+                competitors=competitors_data,
+                analysis=financial_analysis
+            )
+        
+        # Tempo total do trimestre e evento com as fases (METRICS_JSONL)
+        metrics = get_registry()
+        total = time.perf_counter() - self._quarter_start
+        metrics.observe("quarter_phase_seconds", total, phase="total")
+        metrics.log_event({'event': 'quarter', 'quarter': self.game_state['quarter'],
+                           'total_seconds': total, 'phases': dict(self.last_timings)})
+        
+        # Razão completo apenas com log em nível DEBUG
+        self.accountant.log_ledger()
+        
+        return self.game_state
+
+    def process_player_decisions(self, player_decisions, current_quarter):
+        entry = JournalEntry(f'Q{current_quarter}')
+
+        # Produção
+        production = min(player_decisions.get('production', 0), self.factory_capacity)
+        production_cost = production * 10  # Assumindo um custo de 10 por unidade
+
+        # Contabilizar custo de produção
+        entry.debit('Inventory', production_cost, 'Production added to inventory')
+        entry.credit('Cash', production_cost, 'Payment for production costs')
+
+        # Vendas
+        sales_price = player_decisions.get('price', 0)
+        marketing_expense = player_decisions.get('marketing', 0)
+        sales = production  # Assumindo que todas as unidades produzidas são vendidas
+
+        sales_revenue = sales * sales_price
+
+        # Contabilizar receita de vendas
+        entry.debit('Cash', sales_revenue, 'Cash from sales')
+        entry.credit('Sales', sales_revenue, 'Revenue from sales')
+
+        # Contabilizar custo das mercadorias vendidas (COGS)
+        entry.debit('COGS', production_cost, 'Cost of goods sold')
+        entry.credit('Inventory', production_cost, 'Reduction in inventory due to sales')
+
+        # Contabilizar despesas de marketing
+        entry.debit('Marketing', marketing_expense, 'Marketing expenses')
+        entry.credit('Cash', marketing_expense, 'Payment for marketing')
+
+        # Outras decisões do jogador (R&D, doações, etc.)
+        rd_expense = player_decisions.get('research_development', 0)
+        donations = player_decisions.get('charitable_giving', 0)
+
+        entry.debit('R&D', rd_expense, 'R&D expenses')
+        entry.credit('Cash', rd_expense, 'Payment for R&D')
+        entry.debit('Donations', donations, 'Charitable donations')
+        entry.credit('Cash', donations, 'Payment for donations')
+
+        # Lançamento atômico: um erro de validação rejeita o trimestre inteiro
+        # e é propagado para run_game em vez de deixar o razão desbalanceado
+        self.accountant.post_entry(entry)
 
     def initial_state(self):
         self.game_state = {
             'quarter': 0,
             'financials': self.accountant.generate_financial_statements(),
         }
-        self.accountant.print_ledger()  # Imprime o razão contábil para debug
+        self.accountant.log_ledger()
 
     def get_last_financial_reports(self):
-        if not self.df.empty:
-            last_financials = self.df.iloc[-1]['financials']
-            if isinstance(last_financials, str):
-                # Se for uma string, tenta converter para dicionário
-                try:
-                    return ast.literal_eval(last_financials)
-                except:
-                    print("Erro ao converter relatórios financeiros de string para dicionário")
-                    return {}
-            return last_financials
-        return {}
+        return self.history.last_financials()
+
+    def snapshot(self):
+        # Estado completo do jogo (razão, histórico e estado corrente) em formato binário versionado
+        return dumps_snapshot("agent", {
+            'game_state': to_jsonable(self.game_state),
+            'factory_capacity': self.factory_capacity,
+            'journal': self.accountant.journal.get_state(),
+            'history': self.history.get_state(),
+        })
+
+    @classmethod
+    def restore(cls, data, game_id=None):
+        state = loads_snapshot(data, "agent")
+        game_id = game_id or uuid.uuid4().hex
+        # O razão vem direto do snapshot (no banco, substitui o que houver gravado para o jogo)
+        manager = cls(game_id, journal=journal_from_state(state['journal'], game_id))
+        manager.history = QuarterHistory.from_state(state['history'])
+        manager.game_state = state['game_state']
+        manager.factory_capacity = state['factory_capacity']
+        return manager
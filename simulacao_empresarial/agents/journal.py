@@ -0,0 +1,374 @@
+import bisect
+import math
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Lançamentos de encerramento ficam em um período próprio ("Q3 Close"), logo após o trimestre
+CLOSING_SUFFIX = " Close"
+
+
+def closing_period(date):
+    return f"{date}{CLOSING_SUFFIX}"
+
+
+def is_closing_period(date):
+    return isinstance(date, str) and date.endswith(CLOSING_SUFFIX)
+
+
+class JournalEntry:
+    """Lançamento com várias linhas de débito/crédito postado de forma atômica."""
+
+    def __init__(self, date):
+        self.date = date
+        self.lines = []
+
+    def debit(self, account, amount, description):
+        self.lines.append((account, amount, 0, description))
+        return self
+
+    def credit(self, account, amount, description):
+        self.lines.append((account, 0, amount, description))
+        return self
+
+    def validate(self):
+        if not self.lines:
+            raise ValueError(f"Lançamento sem linhas no período {self.date}")
+        # Floats do Python: montar arrays NumPy para poucas linhas custa mais que o próprio lançamento
+        amounts = []
+        for _, debit, credit, _ in self.lines:
+            try:
+                debit, credit = float(debit), float(credit)
+            except (TypeError, ValueError):
+                raise ValueError(f"Lançamento com valores inválidos no período {self.date}")
+            if not (math.isfinite(debit) and math.isfinite(credit)) or debit < 0 or credit < 0:
+                raise ValueError(f"Lançamento com valores inválidos no período {self.date}")
+            amounts.append((debit, credit))
+        total_debit = math.fsum(debit for debit, _ in amounts)
+        total_credit = math.fsum(credit for _, credit in amounts)
+        # Tolerância absoluta de meio centavo: em valores altos, uma tolerância relativa aceitaria diferenças reais
+        if not math.isclose(total_debit, total_credit, rel_tol=0, abs_tol=0.005):
+            raise ValueError(
+                f"Lançamento desbalanceado no período {self.date}: "
+                f"débitos {total_debit} != créditos {total_credit}"
+            )
+        return amounts
+
+
+class BaseJournal:
+    """Consultas comuns aos razões (memória e banco) sobre totals, period_totals e os fechamentos.
+
+    Subclasses mantêm dates, _date_index e _checkpoints (posições dos períodos encerrados, em ordem).
+    """
+
+    COLUMNS = ['Date', 'Account', 'Debit', 'Credit', 'Description']
+
+    def _date_position(self, date):
+        if date not in self._date_index:
+            raise ValueError(f"Período desconhecido no razão: {date}")
+        return self._date_index[date]
+
+    def is_closed(self, date):
+        # Períodos até o último fechamento (inclusive) não aceitam novos lançamentos
+        position = self._date_index.get(date)
+        return position is not None and bool(self._checkpoints) and position <= self._checkpoints[-1]
+
+    def _check_open(self, date):
+        if self.is_closed(date):
+            raise ValueError(f"O período {date} já foi encerrado e não aceita lançamentos")
+
+    @property
+    def checkpoint_dates(self):
+        return [self.dates[position] for position in self._checkpoints]
+
+    def opening_balance(self, account, date=None):
+        # Saldo de abertura do período: último fechamento anterior a ele (sem fechamento, o primeiro período)
+        if not self.dates:
+            return 0.0
+        position = len(self.dates) if date is None else self._date_position(date)
+        i = bisect.bisect_right(self._checkpoints, position - 1) - 1
+        opening = self._checkpoints[i] if i >= 0 else 0
+        return self.balance(account, through=self.dates[opening])
+
+    def balance(self, account, through=None):
+        debit, credit = self.totals(account, through)
+        return debit - credit
+
+    def period_balance(self, account, date):
+        debit, credit = self.period_totals(account, date)
+        return debit - credit
+
+
+class Journal(BaseJournal):
+    """Razão contábil append-only armazenado em colunas NumPy pré-alocadas."""
+
+    def __init__(self, capacity=64):
+        self._size = 0
+        self._date_codes = np.empty(capacity, dtype=np.int32)
+        self._account_codes = np.empty(capacity, dtype=np.int32)
+        self._description_codes = np.empty(capacity, dtype=np.int32)
+        self._debits = np.empty(capacity, dtype=np.float64)
+        self._credits = np.empty(capacity, dtype=np.float64)
+
+        # Categorias (datas, contas e descrições) guardadas uma única vez
+        self.dates = []
+        self.accounts = []
+        self.descriptions = []
+        self._date_index = {}
+        self._account_index = {}
+        self._description_index = {}
+
+        # Cubo período x conta com débitos e créditos acumulados na postagem
+        self._period_debits = np.zeros((8, 16), dtype=np.float64)
+        self._period_credits = np.zeros((8, 16), dtype=np.float64)
+        # Totais correntes por conta (todos os períodos)
+        self._account_debits = np.zeros(16, dtype=np.float64)
+        self._account_credits = np.zeros(16, dtype=np.float64)
+        # Saldos de abertura: totais acumulados por conta ao fim de cada período fechado
+        self._checkpoints = []
+        self._checkpoint_totals = {}
+
+        self._frame = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._debits)
+
+    def _code(self, value, categories, index):
+        code = index.get(value)
+        if code is None:
+            code = len(categories)
+            categories.append(value)
+            index[value] = code
+        return code
+
+    def date_code(self, date):
+        return self._code(date, self.dates, self._date_index)
+
+    def account_code(self, account):
+        return self._code(account, self.accounts, self._account_index)
+
+    def _reserve_cube(self, date_code, account_code):
+        rows, cols = self._period_debits.shape
+        if date_code < rows and account_code < cols:
+            return
+        new_rows = rows if date_code < rows else max(2 * rows, date_code + 1)
+        new_cols = cols if account_code < cols else max(2 * cols, account_code + 1)
+        for name in ('_period_debits', '_period_credits'):
+            old = getattr(self, name)
+            new = np.zeros((new_rows, new_cols), dtype=old.dtype)
+            new[:rows, :cols] = old
+            setattr(self, name, new)
+        for name in ('_account_debits', '_account_credits'):
+            old = getattr(self, name)
+            new = np.zeros(new_cols, dtype=old.dtype)
+            new[:cols] = old
+            setattr(self, name, new)
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= self.capacity:
+            return
+        # Crescimento geométrico: append com custo amortizado O(1)
+        new_capacity = max(needed, 2 * self.capacity)
+        for name in ('_date_codes', '_account_codes', '_description_codes', '_debits', '_credits'):
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def append(self, date, account, debit, credit, description):
+        self._check_open(date)
+        self._reserve(1)
+        i = self._size
+        self._date_codes[i] = self.date_code(date)
+        self._account_codes[i] = self.account_code(account)
+        self._description_codes[i] = self._code(description, self.descriptions, self._description_index)
+        self._debits[i] = debit
+        self._credits[i] = credit
+        self._size += 1
+        self._post_totals(self._date_codes[i], self._account_codes[i], debit, credit)
+        self._frame = None
+
+    def post(self, entry):
+        # Valida o lançamento inteiro antes de tocar no razão: ou tudo entra, ou nada
+        amounts = entry.validate()
+        self._check_open(entry.date)
+        n = len(entry.lines)
+        self._reserve(n)
+        start, end = self._size, self._size + n
+
+        date_code = self.date_code(entry.date)
+        account_codes = np.array([self.account_code(account) for account, _, _, _ in entry.lines], dtype=np.int32)
+        description_codes = [
+            self._code(description, self.descriptions, self._description_index)
+            for _, _, _, description in entry.lines
+        ]
+
+        self._date_codes[start:end] = date_code
+        self._account_codes[start:end] = account_codes
+        self._description_codes[start:end] = description_codes
+        debits = [debit for debit, _ in amounts]
+        credits = [credit for _, credit in amounts]
+        self._debits[start:end] = debits
+        self._credits[start:end] = credits
+        self._size = end
+
+        self._reserve_cube(date_code, int(account_codes.max()))
+        np.add.at(self._period_debits[date_code], account_codes, debits)
+        np.add.at(self._period_credits[date_code], account_codes, credits)
+        np.add.at(self._account_debits, account_codes, debits)
+        np.add.at(self._account_credits, account_codes, credits)
+        self._frame = None
+
+    def _post_totals(self, date_code, account_code, debit, credit):
+        self._reserve_cube(date_code, account_code)
+        self._period_debits[date_code, account_code] += debit
+        self._period_credits[date_code, account_code] += credit
+        self._account_debits[account_code] += debit
+        self._account_credits[account_code] += credit
+
+    def totals(self, account, through=None):
+        # Débitos e créditos da conta até o período informado (inclusive)
+        code = self._account_index.get(account)
+        if code is None:
+            return 0.0, 0.0
+        if through is None:
+            return float(self._account_debits[code]), float(self._account_credits[code])
+        debits, credits = self._totals_through(self._date_position(through), code)
+        return float(debits), float(credits)
+
+    def _totals_through(self, position, code):
+        # Último saldo de abertura guardado + movimento dos períodos seguintes: o custo não cresce com o jogo
+        start = 0
+        debits = credits = 0.0
+        i = bisect.bisect_right(self._checkpoints, position) - 1
+        if i >= 0:
+            checkpoint = self._checkpoints[i]
+            saved_debits, saved_credits = self._checkpoint_totals[checkpoint]
+            if isinstance(code, slice):
+                # Contas criadas depois do fechamento não têm saldo guardado (zero)
+                debits, credits = np.zeros(code.stop), np.zeros(code.stop)
+                n_saved = min(code.stop, len(saved_debits))
+                debits[:n_saved], credits[:n_saved] = saved_debits[:n_saved], saved_credits[:n_saved]
+            elif code < len(saved_debits):
+                debits, credits = saved_debits[code], saved_credits[code]
+            start = checkpoint + 1
+        debits = debits + self._period_debits[start:position + 1, code].sum(axis=0)
+        credits = credits + self._period_credits[start:position + 1, code].sum(axis=0)
+        return debits, credits
+
+    def checkpoint(self, date):
+        """Guarda os saldos de abertura do período seguinte (totais acumulados até `date`, inclusive)."""
+        # Períodos encerrados não aceitam lançamentos: os saldos guardados nunca ficam desatualizados
+        self._check_open(date)
+        position = self._date_position(date)
+        n_accounts = len(self.accounts)
+        debits, credits = self._totals_through(position, slice(0, n_accounts))
+        self._checkpoints.append(position)
+        self._checkpoint_totals[position] = (np.asarray(debits, dtype=np.float64),
+                                             np.asarray(credits, dtype=np.float64))
+
+    def period_totals(self, account, date):
+        # Débitos e créditos da conta lançados apenas no período informado
+        code = self._account_index.get(account)
+        position = self._date_position(date)
+        if code is None:
+            return 0.0, 0.0
+        return float(self._period_debits[position, code]), float(self._period_credits[position, code])
+
+    def trial_balance(self, through=None):
+        n_accounts = len(self.accounts)
+        if through is None:
+            balances = self._account_debits[:n_accounts] - self._account_credits[:n_accounts]
+        else:
+            debits, credits = self._totals_through(self._date_position(through), slice(0, n_accounts))
+            balances = debits - credits
+        return dict(zip(self.accounts, balances.tolist()))
+
+    def period_balances(self):
+        # Matriz período x conta com o movimento líquido (débito - crédito) de cada período
+        n_dates, n_accounts = len(self.dates), len(self.accounts)
+        return self._period_debits[:n_dates, :n_accounts] - self._period_credits[:n_dates, :n_accounts]
+
+    _ENTRY_ARRAYS = ('_date_codes', '_account_codes', '_description_codes', '_debits', '_credits')
+
+    def get_state(self):
+        # Estado compacto (arrays aparados ao tamanho usado) para snapshots
+        n_dates, n_accounts = len(self.dates), len(self.accounts)
+        state = {name: getattr(self, name)[:self._size].copy() for name in self._ENTRY_ARRAYS}
+        state.update({
+            'dates': list(self.dates),
+            'accounts': list(self.accounts),
+            'descriptions': list(self.descriptions),
+            'period_debits': self._period_debits[:n_dates, :n_accounts].copy(),
+            'period_credits': self._period_credits[:n_dates, :n_accounts].copy(),
+            'checkpoints': self.checkpoint_dates,
+        })
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        size = len(state['_debits'])
+        journal = cls(capacity=max(size, 64))
+        for name in cls._ENTRY_ARRAYS:
+            getattr(journal, name)[:size] = state[name]
+        journal._size = size
+        for field, index in (('dates', '_date_index'), ('accounts', '_account_index'), ('descriptions', '_description_index')):
+            values = list(state[field])
+            setattr(journal, field, values)
+            setattr(journal, index, {value: code for code, value in enumerate(values)})
+
+        n_dates, n_accounts = state['period_debits'].shape
+        journal._reserve_cube(max(n_dates - 1, 0), max(n_accounts - 1, 0))
+        journal._period_debits[:n_dates, :n_accounts] = state['period_debits']
+        journal._period_credits[:n_dates, :n_accounts] = state['period_credits']
+        journal._account_debits[:n_accounts] = state['period_debits'].sum(axis=0)
+        journal._account_credits[:n_accounts] = state['period_credits'].sum(axis=0)
+        # Snapshots antigos não têm fechamentos; os saldos de abertura são refeitos a partir do cubo
+        for date in state.get('checkpoints', []):
+            journal.checkpoint(date)
+        return journal
+
+    def to_dataframe(self):
+        # A visão em DataFrame só é reconstruída quando o razão muda
+        if self._frame is None:
+            n = self._size
+            self._frame = pd.DataFrame({
+                'Date': pd.Categorical.from_codes(self._date_codes[:n], categories=self.dates),
+                'Account': pd.Categorical.from_codes(self._account_codes[:n], categories=self.accounts),
+                'Debit': self._debits[:n].copy(),
+                'Credit': self._credits[:n].copy(),
+                'Description': pd.Categorical.from_codes(self._description_codes[:n], categories=self.descriptions),
+            }, columns=self.COLUMNS)
+        return self._frame
+
+
+LEDGER_BACKENDS = ("memory", "sqlite")
+
+
+def ledger_backend():
+    # LEDGER_BACKEND=sqlite grava o razão em banco (LEDGER_DATABASE_URL), compartilhável entre processos
+    backend = os.getenv("LEDGER_BACKEND", "memory").lower()
+    if backend not in LEDGER_BACKENDS:
+        raise ValueError(f"Backend de razão desconhecido: {backend} (use {', '.join(LEDGER_BACKENDS)})")
+    return backend
+
+
+def create_journal(game_id=None):
+    if ledger_backend() == "memory":
+        return Journal()
+    from .sql_journal import SQLJournal
+    return SQLJournal(game_id or uuid.uuid4().hex)
+
+
+def journal_from_state(state, game_id=None):
+    if ledger_backend() == "memory":
+        return Journal.from_state(state)
+    from .sql_journal import SQLJournal
+    return SQLJournal.from_state(state, game_id or uuid.uuid4().hex)
@@ -0,0 +1,234 @@
+import re
+import unicodedata
+
+import numpy as np
+
+# Colunas do histórico (QuarterHistory) usadas nos indicadores
+COLUMNS = {
+    'sales': "Income Statement.Sales",
+    'gross_margin': "Income Statement.Gross Margin",
+    'net_profit': "Income Statement.Net Profit",
+    'marketing': "Income Statement.Marketing",
+    'beginning_cash': "Cash Flow.Beginning Cash",
+    'cash': "Cash Flow.Ending Cash.Available Cash",
+    'production': "Production and Marketing Report.Production.Production",
+    'capacity_utilization': "Production and Marketing Report.Production.Capacity Utilization",
+    'inventory': "Production and Marketing Report.Production.Inventory",
+}
+
+# Palavras-chave casam palavras inteiras; terminadas em "*" casam o início da palavra
+# (ex.: "cresc*" casa "crescimento", mas "loss" não casa "glossary")
+# Perguntas de resposta aberta ficam com o modelo, mesmo citando um indicador
+OPEN_ENDED = ("por que", "porque", "why", "devo", "deveria", "should", "recomend*", "suger*", "estrateg*",
+              "como melhorar", "how can", "how to", "o que fazer", "what should")
+
+# Ordem importa: "variação das vendas" é uma pergunta de variação, não de vendas
+INTENTS = (
+    ('change', ("trimestre anterior", "variacao", "variou", "qoq", "quarter-over-quarter", "quarter over quarter",
+                "cresc*", "growth", "mudou", "change*")),
+    ('margin', ("margem", "margens", "margin*")),
+    ('cash', ("caixa", "cash", "queima", "burn*", "runway", "folego")),
+    ('capacity', ("capacidade", "capacity", "utilizacao", "utilization", "ociosa", "idle")),
+    ('sales', ("venda*", "receita*", "faturamento", "sales", "revenue*")),
+    ('profit', ("lucro*", "prejuizo*", "profit*", "loss*")),
+)
+
+
+def _pattern(keywords):
+    # Uma expressão por grupo de palavras-chave, com limites de palavra
+    parts = []
+    for keyword in keywords:
+        if keyword.endswith("*"):
+            parts.append(re.escape(keyword[:-1]))
+        else:
+            parts.append(re.escape(keyword) + r"\b")
+    return re.compile(r"\b(?:" + "|".join(parts) + ")")
+
+
+_OPEN_ENDED_PATTERN = _pattern(OPEN_ENDED)
+_INTENT_PATTERNS = tuple((intent, _pattern(keywords)) for intent, keywords in INTENTS)
+
+
+def normalize(text):
+    # Minúsculas e sem acentos, para casar palavras-chave em português e inglês
+    text = unicodedata.normalize('NFKD', text.lower())
+    return re.sub(r"\s+", " ", "".join(c for c in text if not unicodedata.combining(c))).strip()
+
+
+def match_intents(question):
+    # Só a primeira intenção (na ordem de INTENTS) é respondida localmente
+    text = normalize(question)
+    if _OPEN_ENDED_PATTERN.search(text):
+        return []
+    for intent, pattern in _INTENT_PATTERNS:
+        if pattern.search(text):
+            return [intent]
+    return []
+
+
+def _ratio(numerator, denominator, scale=100.0):
+    # Divisão elemento a elemento; NaN onde o denominador é zero
+    result = np.full(len(numerator), np.nan)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result * scale
+
+
+def _change(values):
+    # Variação percentual em relação ao trimestre anterior (NaN no primeiro)
+    change = np.full(len(values), np.nan)
+    if len(values) > 1:
+        change[1:] = _ratio(values[1:] - values[:-1], np.abs(values[:-1]))
+    return change
+
+
+def _slope(values, window):
+    # Inclinação da reta (por trimestre) nos últimos `window` valores válidos
+    values = values[-window:]
+    values = values[~np.isnan(values)]
+    if len(values) < 2:
+        return 0.0
+    return float(np.polyfit(np.arange(len(values)), values, 1)[0])
+
+
+def _number(value, digits=1):
+    # Formato pt-BR: ponto nos milhares e vírgula decimal
+    return f"{value:,.{digits}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _money(value):
+    return _number(value, 2)
+
+
+def _percent(value):
+    if np.isnan(value):
+        return "n/d"
+    return f"{value:+.1f}%".replace(".", ",")
+
+
+def _trend(slope, tolerance):
+    if slope > tolerance:
+        return "em alta"
+    if slope < -tolerance:
+        return "em queda"
+    return "estável"
+
+
+class KPITable:
+    """Indicadores por trimestre calculados em bloco sobre o histórico; recalculados só quando há trimestre novo."""
+
+    def __init__(self, history, window=4):
+        self.history = history
+        self.window = window
+        self._size = -1
+        self._values = {}
+        self._summary = None
+
+    def _column(self, key):
+        name = COLUMNS[key]
+        if name in self.history.columns:
+            return self.history.column(name)
+        return np.full(len(self.history), np.nan)
+
+    def values(self):
+        if self._size != len(self.history):
+            self._values = self._compute()
+            self._size = len(self.history)
+            self._summary = None
+        return self._values
+
+    def _compute(self):
+        raw = {key: self._column(key) for key in COLUMNS}
+        sales = raw['sales']
+        cash_change = raw['cash'] - raw['beginning_cash']
+        return {
+            'quarter': self.history.quarters.copy(),
+            'sales': sales,
+            'net_profit': raw['net_profit'],
+            'cash': raw['cash'],
+            'gross_margin_pct': _ratio(raw['gross_margin'], sales),
+            'net_margin_pct': _ratio(raw['net_profit'], sales),
+            'marketing_to_sales_pct': _ratio(raw['marketing'], sales),
+            'cash_change': cash_change,
+            'cash_burn': np.maximum(0.0, -cash_change),
+            'capacity_utilization_pct': raw['capacity_utilization'],
+            'inventory': raw['inventory'],
+            'sales_change_pct': _change(sales),
+            'net_profit_change_pct': _change(raw['net_profit']),
+            'cash_change_pct': _change(raw['cash']),
+        }
+
+    def latest(self):
+        values = self.values()
+        if not self._size:
+            return {}
+        return {key: float(series[-1]) for key, series in values.items()}
+
+    def runway(self):
+        # Trimestres de caixa restantes na queima média recente (None se não há queima)
+        values = self.values()
+        burn = float(np.nanmean(values['cash_burn'][-self.window:])) if self._size else 0.0
+        if not burn or np.isnan(burn):
+            return None
+        return max(0.0, float(values['cash'][-1]) / burn)
+
+    def summary(self):
+        # Dicionário enxuto com os indicadores do último trimestre e as tendências recentes
+        values = self.values()
+        if self._summary is not None:
+            return self._summary
+        if not self._size:
+            return {}
+        summary = self._summary = self.latest()
+        summary['gross_margin_trend'] = _slope(values['gross_margin_pct'], self.window)
+        summary['net_margin_trend'] = _slope(values['net_margin_pct'], self.window)
+        summary['capacity_utilization_trend'] = _slope(values['capacity_utilization_pct'], self.window)
+        summary['runway_quarters'] = self.runway()
+        return summary
+
+    def answer(self, question):
+        """Resposta local para perguntas de rotina; None quando a pergunta precisa do modelo."""
+        intents = match_intents(question)
+        if not intents:
+            return None
+        if not len(self.history):
+            return {'intents': intents, 'text': "Ainda não há trimestres jogados para calcular os indicadores.",
+                    'kpis': {}}
+        summary = self.summary()
+        lines = [getattr(self, f"_answer_{intent}")(summary) for intent in intents]
+        return {'intents': intents, 'text': "\n".join(lines), 'kpis': summary}
+
+    def _answer_margin(self, kpi):
+        return (f"Margem bruta de {_percent(kpi['gross_margin_pct']).lstrip('+')} e margem líquida de "
+                f"{_percent(kpi['net_margin_pct']).lstrip('+')} no trimestre {int(kpi['quarter'])}; "
+                f"margem bruta {_trend(kpi['gross_margin_trend'], 0.5)} "
+                f"({_percent(kpi['gross_margin_trend']).rstrip('%')} p.p. por trimestre nos últimos {self.window}).")
+
+    def _answer_cash(self, kpi):
+        text = f"Caixa disponível de {_money(kpi['cash'])}"
+        if kpi['cash_change'] < 0:
+            text += f", queima de {_money(kpi['cash_burn'])} no trimestre"
+        else:
+            text += f", geração de {_money(kpi['cash_change'])} no trimestre"
+        runway = kpi['runway_quarters']
+        if runway is None:
+            return text + "; sem queima de caixa recente."
+        return text + f"; no ritmo recente o caixa dura cerca de {_number(runway)} trimestres."
+
+    def _answer_capacity(self, kpi):
+        inventory = _number(kpi['inventory'], 0)
+        return (f"Utilização da capacidade de {_percent(kpi['capacity_utilization_pct']).lstrip('+')} "
+                f"({inventory} unidades em estoque); "
+                f"{_trend(kpi['capacity_utilization_trend'], 1.0)} nos últimos {self.window} trimestres.")
+
+    def _answer_change(self, kpi):
+        return (f"Em relação ao trimestre anterior: vendas {_percent(kpi['sales_change_pct'])}, "
+                f"lucro líquido {_percent(kpi['net_profit_change_pct'])}, caixa {_percent(kpi['cash_change_pct'])}.")
+
+    def _answer_sales(self, kpi):
+        return (f"Vendas de {_money(kpi['sales'])} no trimestre {int(kpi['quarter'])} "
+                f"({_percent(kpi['sales_change_pct'])} sobre o anterior).")
+
+    def _answer_profit(self, kpi):
+        result = "Lucro líquido" if kpi['net_profit'] >= 0 else "Prejuízo"
+        return (f"{result} de {_money(abs(kpi['net_profit']))} no trimestre {int(kpi['quarter'])} "
+                f"({_percent(kpi['net_profit_change_pct'])} sobre o anterior).")
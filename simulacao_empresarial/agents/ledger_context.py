@@ -0,0 +1,129 @@
+import functools
+import math
+
+import tiktoken
+
+from .journal import is_closing_period
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # Sem acesso aos arquivos BPE (ex.: ambiente offline) ou modelo desconhecido
+        return None
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    encoding = _encoding(model)
+    if encoding is None:
+        # Estimativa conservadora: ~4 caracteres por token
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def _format_amount(value):
+    return f"{value:,.2f}"
+
+
+class LedgerContextBuilder:
+    """Resume o razão em balancete, indicadores e movimentos dos últimos trimestres dentro de um orçamento de tokens."""
+
+    OMITTED_NOTE = "\n({omitted} períodos mais antigos omitidos por limite de contexto)"
+
+    def __init__(self, max_tokens=1000, model="gpt-4o-mini", recent_periods=8):
+        self.max_tokens = max_tokens
+        self.model = model
+        # Só os últimos trimestres aparecem um a um; os anteriores viram uma única linha somada,
+        # para que o contexto não cresça com a duração do jogo
+        self.recent_periods = recent_periods
+        # Linhas já formatadas por período: trimestres passados raramente mudam entre chamadas
+        self._lines = {}
+        self._accounts = []
+
+    def _ratios(self, balances):
+        sales = abs(balances.get('Sales', 0.0))
+        cogs = abs(balances.get('COGS', 0.0))
+        expenses = sum(abs(balances.get(account, 0.0)) for account in ('Marketing', 'R&D', 'Donations'))
+        net_profit = sales - cogs - expenses
+        ratios = {
+            # Trimestres já encerrados estão em Lucros Acumulados (saldo credor)
+            "Lucro líquido acumulado": _format_amount(net_profit - balances.get('Retained Earnings', 0.0)),
+            "Caixa": _format_amount(balances.get('Cash', 0.0)),
+        }
+        if sales:
+            # Margens do período aberto (as contas de resultado são zeradas a cada fechamento)
+            ratios["Margem bruta"] = f"{(sales - cogs) / sales:.1%}"
+            ratios["Margem líquida"] = f"{net_profit / sales:.1%}"
+            ratios["Despesas operacionais / vendas"] = f"{expenses / sales:.1%}"
+        return ratios
+
+    def _format_line(self, journal, label, row):
+        parts = [f"{account}={_format_amount(value)}" for account, value in zip(journal.accounts, row) if value]
+        line = f"- {label}: " + ("; ".join(parts) if parts else "sem movimento")
+        return line, count_tokens(line, self.model) + 1
+
+    def _period_line(self, journal, position, row):
+        date = journal.dates[position]
+        signature = row.tobytes()
+        cached = self._lines.get(date)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+        line, line_tokens = self._format_line(journal, date, row)
+        self._lines[date] = (signature, line, line_tokens)
+        return line, line_tokens
+
+    def build(self, journal):
+        if journal.accounts != self._accounts:
+            # Outro plano de contas (nova conta ou outro razão): as linhas guardadas não valem mais
+            self._lines.clear()
+            self._accounts = list(journal.accounts)
+        balances = journal.trial_balance()
+        header = ["Balancete (saldo = débitos - créditos):"]
+        header += [f"- {account}: {_format_amount(balance)}" for account, balance in balances.items()]
+        header.append("Indicadores:")
+        header += [f"- {name}: {value}" for name, value in self._ratios(balances).items()]
+        header.append("Movimento líquido por trimestre (mais recentes primeiro):")
+
+        text = "\n".join(header)
+        tokens = count_tokens(text, self.model)
+
+        # Acrescenta trimestres do mais recente para o mais antigo até esgotar o orçamento,
+        # reservando espaço para a nota de períodos omitidos
+        budget = self.max_tokens - count_tokens(self.OMITTED_NOTE.format(omitted=len(journal.dates)), self.model)
+        movements = journal.period_balances()
+        # Encerramentos só transferem o resultado para Lucros Acumulados
+        periods = [position for position, date in enumerate(journal.dates) if not is_closing_period(date)]
+        n_older = max(len(periods) - self.recent_periods, 0)
+        older, recent = periods[:n_older], periods[n_older:]
+
+        included = 0
+        for position in reversed(recent):
+            line, line_tokens = self._period_line(journal, position, movements[position])
+            if tokens + line_tokens > budget:
+                break
+            text += "\n" + line
+            tokens += line_tokens
+            included += 1
+
+        summarized = 0
+        if older and included == len(recent):
+            label = f"{journal.dates[older[0]]} a {journal.dates[older[-1]]} (soma de {len(older)} períodos)"
+            line, line_tokens = self._format_line(journal, label, movements[older].sum(axis=0))
+            if tokens + line_tokens <= budget:
+                text += "\n" + line
+                tokens += line_tokens
+                summarized = len(older)
+
+        omitted = len(periods) - included - summarized
+        if omitted:
+            text += self.OMITTED_NOTE.format(omitted=omitted)
+
+        return {
+            "text": text,
+            "tokens": count_tokens(text, self.model),
+            "periods_included": included,
+            "periods_summarized": summarized,
+            "periods_omitted": omitted,
+        }
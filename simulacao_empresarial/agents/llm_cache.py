@@ -0,0 +1,235 @@
+import asyncio
+import atexit
+import concurrent.futures
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.metrics import get_registry
+from .ledger_context import count_tokens
+from .model_client import get_model_client, model_backend
+
+
+class LLMCache:
+    """Cache em disco (SQLite) das respostas do modelo, com descarte LRU e estatísticas."""
+
+    def __init__(self, path=None, max_entries=10000, touch_batch=256):
+        self.path = path or os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite")
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Acertos pendentes (chave -> last_used): gravados em lote, não a cada get
+        self._touched = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, temperature REAL,"
+            " response TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model, temperature, prompt):
+        payload = json.dumps([model, temperature, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                self._write_touched()
+                self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def _write_touched(self):
+        # Grava os last_used pendentes; quem chama faz o commit
+        if self._touched:
+            self._conn.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def flush(self):
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+
+    def put(self, key, model, temperature, response):
+        with self._lock:
+            # O descarte LRU precisa dos last_used atualizados
+            self._touched.pop(key, None)
+            self._write_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, temperature, response, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, temperature, response, time.time())
+            )
+            # Mantém apenas as max_entries respostas usadas mais recentemente
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    # Cache único por processo, compartilhado por todos os agentes.
+    # LLM_CACHE=off desliga o cache (ex.: para medir latência real do modelo).
+    # Com o modelo offline as respostas já são instantâneas: não há o que guardar.
+    global _default_cache
+    if os.getenv("LLM_CACHE", "on").lower() in ("off", "0", "false") or model_backend() == "offline":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")))
+            atexit.register(_default_cache.flush)
+        return _default_cache
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _write_behind(function, *args):
+    # Gravações no cache feitas em segundo plano, fora do caminho de quem consome o stream
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        return _writer.submit(function, *args)
+
+
+def _cached_message(content):
+    from langchain_core.messages import AIMessage
+    return AIMessage(content=content, response_metadata={"cache_hit": True})
+
+
+def _cache_key(llm, prompt_value):
+    model = getattr(llm, 'model_name', None) or getattr(llm, 'model', None)
+    temperature = getattr(llm, 'temperature', None)
+    return model, temperature, LLMCache.make_key(model, temperature, prompt_value.to_string())
+
+
+def _record_call(agent, llm, prompt_value, content, elapsed, usage=None):
+    # Latência e tokens por agente; sem usage_metadata do provedor, os tokens são estimados
+    metrics = get_registry()
+    metrics.observe("llm_request_seconds", elapsed, agent=agent)
+    if usage:
+        prompt_tokens, completion_tokens = usage.get('input_tokens', 0), usage.get('output_tokens', 0)
+    else:
+        model = getattr(llm, 'model_name', None) or "gpt-4o-mini"
+        prompt_tokens, completion_tokens = count_tokens(prompt_value.to_string(), model), count_tokens(content, model)
+    metrics.inc("llm_tokens_total", prompt_tokens, agent=agent, type="prompt")
+    metrics.inc("llm_tokens_total", completion_tokens, agent=agent, type="completion")
+
+
+def _recorder(agent, llm, prompt_value):
+    # Métricas da chamada que de fato foi ao modelo (ModelClient ignora os coalescidos)
+    def record(response, elapsed):
+        _record_call(agent, llm, prompt_value, response.content, elapsed, getattr(response, 'usage_metadata', None))
+    return record
+
+
+def invoke_cached(prompt, llm, inputs, cache=None, agent="unknown"):
+    # Equivale a (prompt | llm).invoke(inputs), consultando o cache antes do modelo
+    if cache is None:
+        cache = get_default_cache()
+    # format_prompt gera o mesmo PromptValue de prompt.invoke, sem o custo dos callbacks
+    prompt_value = prompt.format_prompt(**inputs)
+    if cache is not None:
+        model, temperature, key = _cache_key(llm, prompt_value)
+        cached = cache.get(key)
+        if cached is not None:
+            get_registry().inc("llm_requests_total", agent=agent, cache="hit")
+            return _cached_message(cached)
+    get_registry().inc("llm_requests_total", agent=agent, cache="miss" if cache is not None else "off")
+    response = get_model_client().invoke(llm, prompt_value, agent, on_result=_recorder(agent, llm, prompt_value))
+    if cache is not None:
+        cache.put(key, model, temperature, response.content)
+    return response
+
+
+async def ainvoke_cached(prompt, llm, inputs, cache=None, agent="unknown"):
+    if cache is None:
+        cache = get_default_cache()
+    prompt_value = await prompt.aformat_prompt(**inputs)
+    # Consultas e gravações no SQLite bloqueiam: rodam em thread, fora do event loop
+    if cache is not None:
+        model, temperature, key = _cache_key(llm, prompt_value)
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            get_registry().inc("llm_requests_total", agent=agent, cache="hit")
+            return _cached_message(cached)
+    get_registry().inc("llm_requests_total", agent=agent, cache="miss" if cache is not None else "off")
+    response = await get_model_client().ainvoke(llm, prompt_value, agent,
+                                                on_result=_recorder(agent, llm, prompt_value))
+    if cache is not None:
+        await asyncio.to_thread(cache.put, key, model, temperature, response.content)
+    return response
+
+
+def stream_cached(prompt, llm, inputs, cache=None, agent="unknown"):
+    # Gera o texto da resposta em pedaços à medida que chegam do modelo;
+    # respostas já em cache são entregues de uma vez
+    if cache is None:
+        cache = get_default_cache()
+    # format_prompt gera o mesmo PromptValue de prompt.invoke, sem o custo dos callbacks
+    prompt_value = prompt.format_prompt(**inputs)
+    if cache is not None:
+        model, temperature, key = _cache_key(llm, prompt_value)
+        cached = cache.get(key)
+        if cached is not None:
+            get_registry().inc("llm_requests_total", agent=agent, cache="hit")
+            yield cached
+            return
+    get_registry().inc("llm_requests_total", agent=agent, cache="miss" if cache is not None else "off")
+    chunks = []
+    usage = None
+    start = time.perf_counter()
+    for chunk in get_model_client().stream(llm, prompt_value, agent):
+        if not chunks:
+            get_registry().observe("llm_first_chunk_seconds", time.perf_counter() - start, agent=agent)
+        chunks.append(chunk.content)
+        usage = getattr(chunk, 'usage_metadata', None) or usage
+        yield chunk.content
+    content = "".join(chunks)
+    _record_call(agent, llm, prompt_value, content, time.perf_counter() - start, usage)
+    if cache is not None:
+        _write_behind(cache.put, key, model, temperature, content)
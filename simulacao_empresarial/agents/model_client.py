@@ -0,0 +1,394 @@
+import asyncio
+import collections
+import concurrent.futures
+import contextvars
+import os
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from utils.metrics import get_registry
+
+# Erros transitórios do provedor: limite de taxa, sobrecarga e falhas de conexão
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException",
+                    "ConnectionError", "TimeoutError"}
+
+
+class RateLimiter:
+    """Limite global de requisições por segundo (GCRA) com rajada, compartilhado por todos os clientes."""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError(f"Taxa de requisições inválida: {rate}")
+        self.interval = 1 / rate
+        self.burst = max(1, int(burst))
+        self._lock = threading.Lock()
+        self._tat = 0.0  # Instante teórico da próxima requisição
+
+    def _reserve(self, blocking):
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            wait = max(0.0, tat - (self.burst - 1) * self.interval - now)
+            if wait > 0 and not blocking:
+                return None
+            self._tat = tat + self.interval
+            return wait
+
+    def acquire(self, *, blocking=True):
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking=True):
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+
+class ConcurrencyLimiter:
+    """Semáforo único para threads e event loops: limita as chamadas ao modelo em andamento no processo."""
+
+    def __init__(self, limit):
+        if limit < 1:
+            raise ValueError(f"Limite de concorrência inválido: {limit}")
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+
+    def acquire(self):
+        with self._lock:
+            if self.active < self.limit:
+                self.active += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        # A vaga é repassada diretamente por release()
+        event.wait()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.active < self.limit:
+                self.active += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                handed_over = future.done() and not future.cancelled()
+                if not handed_over and (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+            if handed_over:
+                self.release()
+            raise
+
+    def release(self):
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self.active -= 1
+                    return
+                waiter = self._waiters.popleft()
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+                return
+            loop, future = waiter
+            try:
+                loop.call_soon_threadsafe(self._wake, future)
+                return
+            except RuntimeError:
+                # O event loop de quem esperava já foi fechado: a vaga vai para o próximo da fila
+                continue
+
+    def _wake(self, future):
+        if future.cancelled():
+            # Quem esperava desistiu: a vaga vai para o próximo da fila
+            self.release()
+        else:
+            future.set_result(None)
+
+
+# Prazo (time.monotonic) das chamadas ao modelo feitas no contexto atual; None = sem prazo
+_deadline = contextvars.ContextVar("model_call_deadline", default=None)
+
+
+@contextmanager
+def call_deadline(deadline):
+    # O prazo vira o timeout de cada requisição e limita as novas tentativas:
+    # a chamada termina no cliente, sem depender de cancelar a thread que a executa
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time():
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Prazo da chamada ao modelo esgotado")
+    return remaining
+
+
+def _with_timeout(function, prompt_value, timeout):
+    if timeout is None:
+        return function(prompt_value)
+    return function(prompt_value, timeout=timeout)
+
+
+def is_retryable(error):
+    if getattr(error, 'status_code', None) in RETRYABLE_STATUS:
+        return True
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after', 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ModelClient:
+    """Camada única de chamadas ao modelo: concorrência global, novas tentativas e coalescência."""
+
+    def __init__(self, max_concurrency=16, max_retries=3, backoff_base=0.5, backoff_cap=20.0):
+        self.limiter = ConcurrencyLimiter(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def backoff(self, attempt, error):
+        # "Full jitter": espera aleatória até o teto exponencial, respeitando Retry-After
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        return max(delay, _retry_after(error))
+
+    @staticmethod
+    def _key(llm, prompt_value):
+        model = getattr(llm, 'model_name', None) or getattr(llm, 'model', None)
+        return model, getattr(llm, 'temperature', None), prompt_value.to_string()
+
+    def retry_delay(self, attempt, error):
+        # Sem tempo para esperar e tentar de novo dentro do prazo: desiste com o último erro
+        delay = self.backoff(attempt, error)
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            raise error
+        return delay
+
+    def _join(self, llm, prompt_value, agent):
+        # Prompts idênticos em andamento compartilham uma única chamada
+        key = self._key(llm, prompt_value)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                get_registry().inc("llm_coalesced_total", agent=agent)
+                return key, future, False
+            future = self._inflight[key] = concurrent.futures.Future()
+            return key, future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _call(self, function, prompt_value, agent):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return _with_timeout(function, prompt_value, remaining_time())
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                self.limiter.release()
+            get_registry().inc("llm_retries_total", agent=agent)
+            time.sleep(self.retry_delay(attempt, error))
+
+    async def _acall(self, function, prompt_value, agent):
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.aacquire()
+            try:
+                return await _with_timeout(function, prompt_value, remaining_time())
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                self.limiter.release()
+            get_registry().inc("llm_retries_total", agent=agent)
+            await asyncio.sleep(self.retry_delay(attempt, error))
+
+    def invoke(self, llm, prompt_value, agent="unknown", on_result=None):
+        # on_result(result, elapsed) é chamado só por quem executou a chamada, não pelos
+        # que aguardaram o mesmo prompt: latência e tokens são contados uma única vez
+        key, future, leader = self._join(llm, prompt_value, agent)
+        if not leader:
+            return future.result(timeout=remaining_time())
+        start = time.perf_counter()
+        try:
+            result = self._call(llm.invoke, prompt_value, agent)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        if on_result is not None:
+            on_result(result, time.perf_counter() - start)
+        return result
+
+    async def ainvoke(self, llm, prompt_value, agent="unknown", on_result=None):
+        key, future, leader = self._join(llm, prompt_value, agent)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        start = time.perf_counter()
+        try:
+            result = await self._acall(llm.ainvoke, prompt_value, agent)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        if on_result is not None:
+            on_result(result, time.perf_counter() - start)
+        return result
+
+    def stream(self, llm, prompt_value, agent="unknown"):
+        # Streams não são coalescidos; nova tentativa só antes do primeiro pedaço
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            started = False
+            try:
+                for chunk in llm.stream(prompt_value):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or attempt == self.max_retries or not is_retryable(e):
+                    raise
+                error = e
+            finally:
+                self.limiter.release()
+            get_registry().inc("llm_retries_total", agent=agent)
+            time.sleep(self.backoff(attempt, error))
+
+
+BACKENDS = ("openai", "offline")
+
+
+def model_backend():
+    # MODEL_BACKEND=offline troca todos os agentes pelo modelo local determinístico
+    backend = os.getenv("MODEL_BACKEND", "openai").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de modelo desconhecido: {backend} (use {', '.join(BACKENDS)})")
+    return backend
+
+
+_lock = threading.Lock()
+_client = None
+_http_clients = None
+_rate_limiter = None
+
+
+def get_model_client():
+    global _client
+    with _lock:
+        if _client is None:
+            _client = ModelClient(
+                max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", "16")),
+                max_retries=int(os.getenv("MODEL_MAX_RETRIES", "3")),
+                backoff_base=float(os.getenv("MODEL_RETRY_BASE", "0.5")),
+            )
+        return _client
+
+
+def _loop_async_client_class():
+    import httpx
+
+    class LoopAsyncClient(httpx.AsyncClient):
+        """AsyncClient que envia cada requisição por um pool próprio do event loop em execução."""
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self._options = kwargs
+            self._clients = weakref.WeakKeyDictionary()
+            self._clients_lock = threading.Lock()
+
+        def current(self):
+            # Conexões do httpx ficam presas ao loop que as abriu: um cliente por loop,
+            # criado dentro dele e descartado junto com ele
+            loop = asyncio.get_running_loop()
+            with self._clients_lock:
+                client = self._clients.get(loop)
+                if client is None:
+                    client = self._clients[loop] = httpx.AsyncClient(**self._options)
+                return client
+
+        async def send(self, request, **kwargs):
+            return await self.current().send(request, **kwargs)
+
+        async def aclose(self):
+            loop = asyncio.get_running_loop()
+            with self._clients_lock:
+                client = self._clients.pop(loop, None)
+            if client is not None:
+                await client.aclose()
+
+    return LoopAsyncClient
+
+
+def get_http_clients():
+    # Um pool de conexões síncrono para o processo e um assíncrono por event loop
+    global _http_clients
+    with _lock:
+        if _http_clients is None:
+            import httpx
+            max_connections = int(os.getenv("MODEL_MAX_CONNECTIONS", "32"))
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            timeout = httpx.Timeout(float(os.getenv("MODEL_REQUEST_TIMEOUT", "60")), connect=10.0)
+            _http_clients = (httpx.Client(limits=limits, timeout=timeout),
+                             _loop_async_client_class()(limits=limits, timeout=timeout))
+        return _http_clients
+
+
+def get_rate_limiter():
+    # MODEL_RATE_LIMIT em requisições/segundo; 0 (padrão) desliga o limite
+    global _rate_limiter
+    with _lock:
+        rate = float(os.getenv("MODEL_RATE_LIMIT", "0"))
+        if _rate_limiter is None and rate > 0:
+            from langchain_core.rate_limiters import BaseRateLimiter
+            # Registrado como subclasse virtual para ser aceito pelos modelos do LangChain
+            BaseRateLimiter.register(RateLimiter)
+            _rate_limiter = RateLimiter(rate, burst=int(os.getenv("MODEL_RATE_BURST", "1")))
+        return _rate_limiter
+
+
+def clear():
+    global _client, _http_clients, _rate_limiter
+    with _lock:
+        _client = None
+        _http_clients = None
+        _rate_limiter = None
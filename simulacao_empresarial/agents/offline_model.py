@@ -0,0 +1,157 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .llm_cache import LLMCache
+
+# Respostas por tipo de pedido; a variante é escolhida pelo hash do prompt (mesmo prompt, mesma resposta)
+TEMPLATES = {
+    "accountant": [
+        "Análise offline: o caixa e o patrimônio estão coerentes com os lançamentos do período. "
+        "Acompanhe a margem bruta e o peso do marketing sobre as vendas.",
+        "Análise offline: a empresa segue solvente; as despesas do trimestre foram cobertas pelas vendas. "
+        "Recomenda-se manter estoque próximo da demanda observada.",
+        "Análise offline: a margem está pressionada pelos custos de produção. "
+        "Vale revisar preço e volume antes do próximo trimestre.",
+    ],
+    "economy": [
+        "Economia (offline): demanda estável, inflação controlada e juros sem alteração.",
+        "Economia (offline): leve aquecimento da demanda e custos de insumos em alta.",
+        "Economia (offline): desaceleração moderada, consumidores mais sensíveis a preço.",
+    ],
+    "competitors": [
+        "Competidores (offline): preços estáveis e investimento moderado em marketing.",
+        "Competidores (offline): um concorrente reduziu preços para ganhar participação.",
+        "Competidores (offline): concorrentes ampliaram capacidade e campanhas de marketing.",
+    ],
+    "decision": [
+        "Sugestão offline: manter o preço, produzir próximo da demanda do último trimestre "
+        "e reservar parte do caixa para P&D.",
+        "Sugestão offline: reduzir levemente o preço e reforçar o marketing para recuperar participação.",
+    ],
+    "default": [
+        "Resposta offline determinística.",
+    ],
+}
+
+KEYWORDS = (
+    ("contador", "accountant"),
+    ("razão contábil", "accountant"),
+    ("economia", "economy"),
+    ("competidor", "competitors"),
+    ("decisões estratégicas", "decision"),
+)
+
+
+_replay_open_lock = threading.Lock()
+
+
+def _digest(text):
+    return int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def _prompt_text(messages):
+    return "\n".join(str(message.content) for message in messages)
+
+
+class OfflineChatModel(BaseChatModel):
+    """Modelo local e determinístico: reproduz respostas gravadas ou gera texto a partir de modelos fixos."""
+
+    model_name: str = "offline"
+    temperature: float = 0.0
+    replay_path: Optional[str] = None
+    """Cache SQLite (LLMCache) com respostas gravadas de um modelo real, aberto somente para leitura."""
+    replay_model: str = "gpt-4o-mini"
+    """Modelo cujas respostas gravadas são reproduzidas."""
+
+    _replay: Any = None
+    _replay_lock: Any = None
+
+    @property
+    def _llm_type(self):
+        return "offline"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": self.model_name, "temperature": self.temperature, "replay_path": self.replay_path}
+
+    def _open_replay(self):
+        # Somente leitura: a reprodução não cria tabelas nem atualiza last_used no arquivo gravado
+        path = Path(self.replay_path)
+        if not path.is_file():
+            raise ValueError(f"Arquivo de respostas gravadas não encontrado: {self.replay_path}")
+        return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+
+    def _replayed(self, text):
+        if not self.replay_path:
+            return None
+        with _replay_open_lock:
+            if self._replay is None:
+                self._replay = self._open_replay()
+                self._replay_lock = threading.Lock()
+        key = LLMCache.make_key(self.replay_model, self.temperature, text)
+        with self._replay_lock:
+            try:
+                row = self._replay.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            except sqlite3.OperationalError:
+                # Arquivo sem a tabela de respostas: nada gravado
+                return None
+        return row[0] if row else None
+
+    def respond(self, text):
+        replayed = self._replayed(text)
+        if replayed is not None:
+            return replayed
+        lowered = text.lower()
+        if "json" in lowered and "price" in lowered:
+            # Pedido de decisões em JSON (estratégia de torneio): valores fixos por hash
+            digest = _digest(text)
+            return json.dumps({"price": 35 + digest % 20, "production": 600 + digest % 600,
+                               "marketing": 1000 * (digest % 8), "research": 500, "donations": 0})
+        kind = next((kind for keyword, kind in KEYWORDS if keyword in lowered), "default")
+        variants = TEMPLATES[kind]
+        return variants[_digest(text) % len(variants)]
+
+    def _usage(self, text, content):
+        prompt_tokens, completion_tokens = len(text) // 4, len(content) // 4
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def invoke(self, input, config=None, *, stop=None, **kwargs):
+        # Sem callbacks configurados, responde direto, sem a maquinaria de execução do LangChain.
+        # O timeout por requisição não se aplica ao modelo local
+        kwargs.pop('timeout', None)
+        if config or self.callbacks or stop or kwargs:
+            return super().invoke(input, config, stop=stop, **kwargs)
+        text = _prompt_text(self._convert_input(input).to_messages())
+        content = self.respond(text)
+        return AIMessage(content=content, usage_metadata=self._usage(text, content))
+
+    async def ainvoke(self, input, config=None, *, stop=None, **kwargs):
+        kwargs.pop('timeout', None)
+        if config or self.callbacks or stop or kwargs:
+            return await super().ainvoke(input, config, stop=stop, **kwargs)
+        return self.invoke(input)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text = _prompt_text(messages)
+        content = self.respond(text)
+        message = AIMessage(content=content, usage_metadata=self._usage(text, content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        text = _prompt_text(messages)
+        content = self.respond(text)
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            chunk = AIMessageChunk(content=word if i == 0 else " " + word)
+            if i == len(words) - 1:
+                chunk.usage_metadata = self._usage(text, content)
+            yield ChatGenerationChunk(message=chunk)
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+SEPARATOR = "."
+
+
+def flatten(data, prefix=""):
+    # {"Income Statement": {"Sales": 1}} -> {"Income Statement.Sales": 1}
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{SEPARATOR}{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        else:
+            flat[name] = value
+    return flat
+
+
+def unflatten(flat):
+    data = {}
+    for name, value in flat.items():
+        *parents, key = name.split(SEPARATOR)
+        node = data
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return data
+
+
+def _as_text(value):
+    # Respostas do LLM chegam como mensagens; guardamos apenas o texto
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(getattr(value, 'content', value))
+
+
+class QuarterHistory:
+    """Histórico colunar dos trimestres: relatórios achatados em colunas float64 e textos à parte."""
+
+    TEXT_FIELDS = ('economy', 'competitors', 'analysis')
+
+    def __init__(self, capacity=16):
+        self._size = 0
+        self._quarters = np.empty(capacity, dtype=np.int32)
+        self._columns = {}
+        self.texts = {field: [] for field in self.TEXT_FIELDS}
+        self._frame = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._quarters)
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, 2 * self.capacity)
+        self._quarters = self._grow(self._quarters, new_capacity, 0)
+        for name, values in self._columns.items():
+            self._columns[name] = self._grow(values, new_capacity, np.nan)
+
+    def _grow(self, values, new_capacity, fill):
+        new = np.full(new_capacity, fill, dtype=values.dtype)
+        new[:self._size] = values[:self._size]
+        return new
+
+    def append(self, quarter, financials, **texts):
+        self._reserve(1)
+        i = self._size
+        self._quarters[i] = quarter
+        for name, value in flatten(financials).items():
+            column = self._columns.get(name)
+            if column is None:
+                # Colunas novas começam vazias (NaN) para os trimestres anteriores
+                column = self._columns[name] = np.full(self.capacity, np.nan)
+            column[i] = value
+        for field in self.TEXT_FIELDS:
+            self.texts[field].append(_as_text(texts.get(field)))
+        self._size += 1
+        self._frame = None
+
+    def set_texts(self, index, **texts):
+        # Preenche os textos de um trimestre já registrado (ex.: recebidos em streaming)
+        for field, value in texts.items():
+            self.texts[field][index] = _as_text(value)
+        self._frame = None
+
+    def column(self, name):
+        return self._columns[name][:self._size]
+
+    @property
+    def quarters(self):
+        return self._quarters[:self._size]
+
+    def row_financials(self, index):
+        row = {name: float(values[index]) for name, values in self._columns.items() if not np.isnan(values[index])}
+        return unflatten(row)
+
+    def last_financials(self):
+        if not self._size:
+            return {}
+        return self.row_financials(self._size - 1)
+
+    def to_dataframe(self):
+        if self._frame is None:
+            data = {'quarter': self.quarters.copy()}
+            data.update({name: self.column(name).copy() for name in self._columns})
+            data.update({field: pd.array(values, dtype="string") for field, values in self.texts.items()})
+            self._frame = pd.DataFrame(data)
+        return self._frame
+
+    def get_state(self):
+        return {
+            'quarters': self.quarters.copy(),
+            'columns': {name: self.column(name).copy() for name in self._columns},
+            'texts': {field: list(values) for field, values in self.texts.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        size = len(state['quarters'])
+        history = cls(capacity=max(size, 16))
+        history._quarters[:size] = state['quarters']
+        for name, values in state['columns'].items():
+            column = history._columns[name] = np.full(history.capacity, np.nan)
+            column[:size] = values
+        history.texts = {field: list(state['texts'].get(field, [None] * size)) for field in cls.TEXT_FIELDS}
+        history._size = size
+        return history
+
+    def to_arrow(self, game_id=None):
+        import pyarrow as pa
+        arrays = {'quarter': pa.array(self.quarters)}
+        arrays.update({name: pa.array(self.column(name)) for name in self._columns})
+        arrays.update({field: pa.array(values, type=pa.string()) for field, values in self.texts.items()})
+        if game_id is not None:
+            arrays['game_id'] = pa.array([game_id] * self._size, type=pa.string())
+        return pa.table(arrays)
+
+    def to_parquet(self, path, game_id=None):
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(game_id), path)
+
+    @classmethod
+    def from_arrow(cls, table):
+        history = cls(capacity=max(table.num_rows, 1))
+        n = table.num_rows
+        history._quarters[:n] = table.column('quarter').to_numpy()
+        for name in table.column_names:
+            if name == 'quarter' or name == 'game_id':
+                continue
+            if name in cls.TEXT_FIELDS:
+                history.texts[name] = table.column(name).to_pylist()
+            else:
+                values = np.full(history.capacity, np.nan)
+                values[:n] = table.column(name).to_numpy(zero_copy_only=False)
+                history._columns[name] = values
+        history._size = n
+        return history
+
+    @classmethod
+    def from_parquet(cls, path):
+        import pyarrow.parquet as pq
+        return cls.from_arrow(pq.read_table(path))
+
+
+def scan_archive(paths, columns=None, filter=None):
+    # Varredura colunar de vários jogos arquivados (arquivos ou diretórios Parquet)
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(paths, format="parquet")
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
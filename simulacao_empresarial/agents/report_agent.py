@@ -1,15 +1,21 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from functools import cached_property
+from .resources import get_llm, get_prompt
+from .llm_cache import invoke_cached
 
 class ReportAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(temperature=0.3, model="gpt-4o-mini")
-        self.prompt = PromptTemplate(
-            input_variables=["game_data"],
-            template="Gere um relatório financeiro e de mercado com base nos seguintes dados do jogo: {game_data}"
+    @cached_property
+    def prompt(self):
+        return get_prompt(
+            "Gere um relatório financeiro e de mercado com base nos seguintes dados do jogo: {game_data}"
         )
-        self.chain = self.prompt | self.llm
+
+    @cached_property
+    def llm(self):
+        return get_llm(temperature=0.3)
+
+    @cached_property
+    def chain(self):
+        return self.prompt | self.llm
 
     def generate(self, game_data):
-        return self.chain.invoke({"game_data": str(game_data)})
+        return invoke_cached(self.prompt, self.llm, {"game_data": str(game_data)}, agent="report")
@@ -0,0 +1,67 @@
+import os
+import threading
+
+from .model_client import clear as clear_model_client, get_http_clients, get_rate_limiter, model_backend
+
+# Recursos compartilhados por todas as sessões do processo: clientes do modelo,
+# prompts compilados e configuração estática. Criados sob demanda e protegidos por lock.
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+_lock = threading.Lock()
+_llms = {}
+_prompts = {}
+
+
+def get_llm(temperature=0.0, model=DEFAULT_MODEL, max_retries=0):
+    # As novas tentativas ficam com o ModelClient (max_retries=0); quem chama o modelo
+    # direto, como o agente pandas, pode pedir as tentativas do próprio SDK
+    backend = model_backend()
+    key = (backend, model, temperature, max_retries)
+    with _lock:
+        llm = _llms.get(key)
+    if llm is None:
+        created = _create_llm(backend, temperature, model, max_retries)
+        with _lock:
+            llm = _llms.setdefault(key, created)
+    return llm
+
+
+def _create_llm(backend, temperature, model, max_retries):
+    # Importados só quando o primeiro cliente é necessário
+    if backend == "offline":
+        from .offline_model import OfflineChatModel
+        return OfflineChatModel(temperature=temperature, replay_path=os.getenv("MODEL_REPLAY_PATH") or None,
+                                replay_model=model)
+    from langchain_openai import ChatOpenAI
+    http_client, http_async_client = get_http_clients()
+    return ChatOpenAI(temperature=temperature, model=model, max_retries=max_retries,
+                      http_client=http_client, http_async_client=http_async_client,
+                      rate_limiter=get_rate_limiter())
+
+
+def _get_prompt(kind, template, factory):
+    key = (kind, template)
+    with _lock:
+        prompt = _prompts.get(key)
+        if prompt is None:
+            prompt = _prompts[key] = factory(template)
+        return prompt
+
+
+def get_prompt(template):
+    from langchain_core.prompts import PromptTemplate
+    return _get_prompt("text", template, PromptTemplate.from_template)
+
+
+def get_chat_prompt(template):
+    from langchain_core.prompts import ChatPromptTemplate
+    return _get_prompt("chat", template, ChatPromptTemplate.from_template)
+
+
+def clear():
+    # Descarta clientes e prompts (ex.: após trocar variáveis de ambiente do modelo)
+    with _lock:
+        _llms.clear()
+        _prompts.clear()
+    clear_model_client()
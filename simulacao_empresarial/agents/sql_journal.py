@@ -0,0 +1,361 @@
+import os
+import threading
+
+import numpy as np
+from sqlalchemy import (Column, Float, Index, Integer, MetaData, String, Table, Text, bindparam, create_engine,
+                        delete, event, func, insert, select)
+from sqlalchemy.pool import StaticPool
+
+from .journal import BaseJournal, Journal
+
+metadata = MetaData()
+
+# Períodos e contas na ordem em que aparecem no jogo (mesmos códigos do Journal em memória)
+periods = Table(
+    "ledger_periods", metadata,
+    Column("game_id", String(64), primary_key=True),
+    Column("position", Integer, primary_key=True),
+    Column("label", String(64), nullable=False),
+)
+
+accounts = Table(
+    "ledger_accounts", metadata,
+    Column("game_id", String(64), primary_key=True),
+    Column("code", Integer, primary_key=True),
+    Column("name", String(128), nullable=False),
+)
+
+entries = Table(
+    "ledger_entries", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("game_id", String(64), nullable=False),
+    Column("period", Integer, nullable=False),
+    Column("account", Integer, nullable=False),
+    Column("debit", Float, nullable=False),
+    Column("credit", Float, nullable=False),
+    Column("description", Text, nullable=False),
+    # Saldos e relatórios somam, por conta, um intervalo de períodos de um jogo
+    Index("ix_ledger_entries_game_period_account", "game_id", "period", "account"),
+)
+
+# Saldos de abertura (totais acumulados por conta ao fim de cada período fechado)
+checkpoints = Table(
+    "ledger_checkpoints", metadata,
+    Column("game_id", String(64), primary_key=True),
+    Column("period", Integer, primary_key=True),
+    Column("account", Integer, primary_key=True),
+    Column("debit", Float, nullable=False),
+    Column("credit", Float, nullable=False),
+)
+
+# Consultas montadas uma vez: o SQLAlchemy reaproveita a compilação a cada execução
+_PERIOD_SUMS = (
+    select(entries.c.account, func.sum(entries.c.debit), func.sum(entries.c.credit))
+    .where(entries.c.game_id == bindparam("game_id"),
+           entries.c.period > bindparam("first"), entries.c.period <= bindparam("last"))
+    .group_by(entries.c.account)
+)
+_MOVEMENTS = (
+    select(entries.c.period, entries.c.account, func.sum(entries.c.debit - entries.c.credit))
+    .where(entries.c.game_id == bindparam("game_id"))
+    .group_by(entries.c.period, entries.c.account)
+)
+
+_engines = {}
+_lock = threading.Lock()
+
+
+def _sqlite_pragmas(connection, record):
+    # WAL: leituras de outros processos não bloqueiam a gravação do trimestre
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def get_engine(url=None):
+    # Um engine (pool de conexões) por banco, compartilhado por todos os jogos do processo
+    url = url or os.getenv("LEDGER_DATABASE_URL", "sqlite:///ledger.sqlite")
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            if url in ("sqlite://", "sqlite:///:memory:"):
+                # Banco em memória: uma única conexão, visível para todos os threads
+                engine = create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+            else:
+                engine = create_engine(url)
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _sqlite_pragmas)
+            metadata.create_all(engine)
+            _engines[url] = engine
+        return engine
+
+
+def clear():
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+class SQLJournal(BaseJournal):
+    """Razão em banco SQL (SQLite por padrão) com a mesma interface do Journal, um jogo por game_id.
+
+    Períodos, contas e saldos de abertura ficam também em memória; cada jogo deve ter um único processo gravando.
+    """
+
+    def __init__(self, game_id, engine=None):
+        self.game_id = game_id
+        self.engine = engine or get_engine()
+        self._frame = None
+        self._load()
+
+    def _load(self):
+        # Retoma um jogo já gravado (ex.: após reinício do servidor)
+        game = self.game_id
+        with self.engine.connect() as conn:
+            self.dates = list(conn.execute(
+                select(periods.c.label).where(periods.c.game_id == game).order_by(periods.c.position)).scalars())
+            self.accounts = list(conn.execute(
+                select(accounts.c.name).where(accounts.c.game_id == game).order_by(accounts.c.code)).scalars())
+            self._size = conn.execute(
+                select(func.count()).select_from(entries).where(entries.c.game_id == game)).scalar_one()
+            saved = conn.execute(
+                select(checkpoints.c.period, checkpoints.c.account, checkpoints.c.debit, checkpoints.c.credit)
+                .where(checkpoints.c.game_id == game).order_by(checkpoints.c.period)).all()
+        self._date_index = {date: code for code, date in enumerate(self.dates)}
+        self._account_index = {account: code for code, account in enumerate(self.accounts)}
+        self._checkpoints = []
+        self._checkpoint_totals = {}
+        # Totais já consultados, válidos até a próxima gravação
+        self._through = {}
+        self._period_totals = {}
+        self._movements = None
+        for period, account, debit, credit in saved:
+            if period not in self._checkpoint_totals:
+                self._checkpoints.append(period)
+                self._checkpoint_totals[period] = (np.zeros(len(self.accounts)), np.zeros(len(self.accounts)))
+            self._checkpoint_totals[period][0][account] = debit
+            self._checkpoint_totals[period][1][account] = credit
+
+    def __len__(self):
+        return self._size
+
+    def _new_codes(self, values, categories, index):
+        # Códigos dos valores, sem alterar o cache em memória antes do commit
+        codes, added = [], {}
+        for value in values:
+            code = index.get(value, added.get(value))
+            if code is None:
+                code = added[value] = len(categories) + len(added)
+            codes.append(code)
+        return codes, added
+
+    def _write(self, date, lines, amounts):
+        # Um único commit por lançamento; linhas inseridas em lote (executemany)
+        (date_code,), new_dates = self._new_codes([date], self.dates, self._date_index)
+        account_codes, new_accounts = self._new_codes([line[0] for line in lines], self.accounts, self._account_index)
+        with self.engine.begin() as conn:
+            if new_dates:
+                conn.execute(insert(periods), [{"game_id": self.game_id, "position": code, "label": label}
+                                               for label, code in new_dates.items()])
+            if new_accounts:
+                conn.execute(insert(accounts), [{"game_id": self.game_id, "code": code, "name": name}
+                                                for name, code in new_accounts.items()])
+            conn.execute(insert(entries), [
+                {"game_id": self.game_id, "period": date_code, "account": code,
+                 "debit": float(debit), "credit": float(credit), "description": line[3]}
+                for line, code, (debit, credit) in zip(lines, account_codes, amounts)
+            ])
+        for categories, index, added in ((self.dates, self._date_index, new_dates),
+                                         (self.accounts, self._account_index, new_accounts)):
+            for value, code in sorted(added.items(), key=lambda item: item[1]):
+                categories.append(value)
+                index[value] = code
+        self._size += len(lines)
+        self._add_movements(date_code, account_codes, amounts)
+        self._through.clear()
+        self._period_totals.clear()
+        self._frame = None
+
+    def post(self, entry):
+        amounts = entry.validate()
+        self._check_open(entry.date)
+        self._write(entry.date, entry.lines, amounts)
+
+    def append(self, date, account, debit, credit, description):
+        self._check_open(date)
+        self._write(date, [(account, debit, credit, description)], [(debit, credit)])
+
+    def _totals_through(self, position):
+        # Último saldo de abertura guardado + movimento dos períodos seguintes, somado no banco (um GROUP BY
+        # para todas as contas): um relatório inteiro custa uma consulta
+        cached = self._through.get(position)
+        if cached is not None:
+            return cached
+        n_accounts = len(self.accounts)
+        debits, credits = np.zeros(n_accounts), np.zeros(n_accounts)
+        start = -1
+        earlier = [checkpoint for checkpoint in self._checkpoints if checkpoint <= position]
+        if earlier:
+            start = earlier[-1]
+            saved_debits, saved_credits = self._checkpoint_totals[start]
+            debits[:len(saved_debits)] = saved_debits
+            credits[:len(saved_credits)] = saved_credits
+        if start < position:
+            with self.engine.connect() as conn:
+                rows = conn.execute(_PERIOD_SUMS, {"game_id": self.game_id, "first": start, "last": position})
+                for account, debit, credit in rows:
+                    debits[account] += debit
+                    credits[account] += credit
+        self._through[position] = (debits, credits)
+        return debits, credits
+
+    def totals(self, account, through=None):
+        code = self._account_index.get(account)
+        if code is None or not self.dates:
+            return 0.0, 0.0
+        position = len(self.dates) - 1 if through is None else self._date_position(through)
+        debits, credits = self._totals_through(position)
+        return float(debits[code]), float(credits[code])
+
+    def period_totals(self, account, date):
+        code = self._account_index.get(account)
+        position = self._date_position(date)
+        if code is None:
+            return 0.0, 0.0
+        debits, credits = self._period(position)
+        return float(debits[code]), float(credits[code])
+
+    def _period(self, position):
+        cached = self._period_totals.get(position)
+        if cached is None:
+            n_accounts = len(self.accounts)
+            debits, credits = np.zeros(n_accounts), np.zeros(n_accounts)
+            with self.engine.connect() as conn:
+                rows = conn.execute(_PERIOD_SUMS, {"game_id": self.game_id, "first": position - 1, "last": position})
+                for account, debit, credit in rows:
+                    debits[account], credits[account] = debit, credit
+            cached = self._period_totals[position] = (debits, credits)
+        return cached
+
+    def trial_balance(self, through=None):
+        if not self.dates:
+            return {}
+        position = len(self.dates) - 1 if through is None else self._date_position(through)
+        debits, credits = self._totals_through(position)
+        return dict(zip(self.accounts, (debits - credits).tolist()))
+
+    def period_balances(self):
+        # Matriz período x conta com o movimento líquido: agregada no banco uma vez e
+        # depois atualizada em memória com as linhas que este processo grava
+        if self._movements is None:
+            movements = np.zeros((len(self.dates), len(self.accounts)))
+            with self.engine.connect() as conn:
+                for period, account, movement in conn.execute(_MOVEMENTS, {"game_id": self.game_id}):
+                    movements[period, account] = movement
+            self._movements = movements
+        return self._movements.copy()
+
+    def _add_movements(self, date_code, account_codes, amounts):
+        if self._movements is None:
+            return
+        rows, cols = self._movements.shape
+        if len(self.dates) > rows or len(self.accounts) > cols:
+            grown = np.zeros((len(self.dates), len(self.accounts)))
+            grown[:rows, :cols] = self._movements
+            self._movements = grown
+        amounts = np.asarray(amounts, dtype=np.float64)
+        np.add.at(self._movements[date_code], account_codes, amounts[:, 0] - amounts[:, 1])
+
+    def checkpoint(self, date):
+        """Guarda os saldos de abertura do período seguinte (totais acumulados até `date`, inclusive)."""
+        # Períodos encerrados não aceitam lançamentos: os saldos guardados nunca ficam desatualizados
+        self._check_open(date)
+        position = self._date_position(date)
+        debits, credits = self._totals_through(position)
+        with self.engine.begin() as conn:
+            conn.execute(insert(checkpoints), [
+                {"game_id": self.game_id, "period": position, "account": code,
+                 "debit": float(debit), "credit": float(credit)}
+                for code, (debit, credit) in enumerate(zip(debits, credits))
+            ])
+        self._checkpoints.append(position)
+        self._checkpoint_totals[position] = (debits, credits)
+        self._through.clear()
+
+    def clear(self):
+        # Remove todos os registros do jogo
+        with self.engine.begin() as conn:
+            for table in (entries, checkpoints, accounts, periods):
+                conn.execute(delete(table).where(table.c.game_id == self.game_id))
+        self._frame = None
+        self._load()
+
+    def get_state(self):
+        # Mesmo formato do Journal.get_state: snapshots valem para os dois backends
+        query = (select(entries.c.period, entries.c.account, entries.c.debit, entries.c.credit, entries.c.description)
+                 .where(entries.c.game_id == self.game_id).order_by(entries.c.id))
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        descriptions, description_index = [], {}
+        description_codes = np.empty(len(rows), dtype=np.int32)
+        for i, row in enumerate(rows):
+            code = description_index.get(row[4])
+            if code is None:
+                code = description_index[row[4]] = len(descriptions)
+                descriptions.append(row[4])
+            description_codes[i] = code
+        date_codes = np.array([row[0] for row in rows], dtype=np.int32)
+        account_codes = np.array([row[1] for row in rows], dtype=np.int32)
+        debits = np.array([row[2] for row in rows], dtype=np.float64)
+        credits = np.array([row[3] for row in rows], dtype=np.float64)
+        shape = (len(self.dates), len(self.accounts))
+        period_debits, period_credits = np.zeros(shape), np.zeros(shape)
+        np.add.at(period_debits, (date_codes, account_codes), debits)
+        np.add.at(period_credits, (date_codes, account_codes), credits)
+        return {
+            '_date_codes': date_codes,
+            '_account_codes': account_codes,
+            '_description_codes': description_codes,
+            '_debits': debits,
+            '_credits': credits,
+            'dates': list(self.dates),
+            'accounts': list(self.accounts),
+            'descriptions': descriptions,
+            'period_debits': period_debits,
+            'period_credits': period_credits,
+            'checkpoints': self.checkpoint_dates,
+        }
+
+    @classmethod
+    def from_state(cls, state, game_id, engine=None):
+        # Substitui o que houver gravado para o jogo pelo estado do snapshot
+        journal = cls(game_id, engine)
+        journal.clear()
+        game = journal.game_id
+        with journal.engine.begin() as conn:
+            if state['dates']:
+                conn.execute(insert(periods), [{"game_id": game, "position": code, "label": label}
+                                               for code, label in enumerate(state['dates'])])
+            if state['accounts']:
+                conn.execute(insert(accounts), [{"game_id": game, "code": code, "name": name}
+                                                for code, name in enumerate(state['accounts'])])
+            if len(state['_debits']):
+                descriptions = state['descriptions']
+                conn.execute(insert(entries), [
+                    {"game_id": game, "period": int(date), "account": int(account), "debit": float(debit),
+                     "credit": float(credit), "description": descriptions[description]}
+                    for date, account, description, debit, credit in zip(
+                        state['_date_codes'], state['_account_codes'], state['_description_codes'],
+                        state['_debits'], state['_credits'])
+                ])
+        journal._load()
+        for date in state.get('checkpoints', []):
+            journal.checkpoint(date)
+        return journal
+
+    def to_dataframe(self):
+        if self._frame is None:
+            self._frame = Journal.from_state(self.get_state()).to_dataframe()
+        return self._frame
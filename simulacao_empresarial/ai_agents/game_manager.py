@@ -1,19 +1,35 @@
 from game_data.company import Company
+from game_data.company_table import CompanyTable
 from game_data.economy import Economy
-import random
+from game_data.monte_carlo import MarketMonteCarlo
+from game_data.decision_evaluation import evaluate_decisions
+from game_data.market import clear_market, market_demand
+from game_data.formulas import PRODUCTION_COST_PER_UNIT, demand, total_costs, update_market_share
+import numpy as np
+from utils.snapshot import dumps_snapshot, loads_snapshot
 
 class GameManager:
-    def __init__(self, player_name):
+    DECISION_FIELDS = ("price", "production", "marketing", "capacity_investment", "research", "donations")
+
+    def __init__(self, player_name, seed=None):
         self.company = Company(player_name, 10000)
-        self.economy = Economy()
+        self.economy = Economy(seed)
         self.current_quarter = 1
         self.history = []
+        # Decisões de cada trimestre: junto com a semente, permitem reproduzir o jogo
+        self.decisions = []
         self.market_share = 50  # Inicialmente, o jogador tem 50% do mercado
-        self.competitors = [Company(f"Competidor {i}", 10000) for i in range(1, 4)]  # 3 competidores
+        self.competitors = CompanyTable([f"Competidor {i}" for i in range(1, 4)], 10000)  # 3 competidores
 
-    def play_quarter(self, price, production, marketing, capacity_investment, research, donations):
+    def play_quarter(self, price, production, marketing, capacity_investment, research, donations,
+                     competitor_decisions=None):
         # Atualizar decisões da empresa do jogador
         self.company.set_decisions(price, production, marketing, capacity_investment, research, donations)
+        decisions = dict(zip(self.DECISION_FIELDS,
+                             (price, production, marketing, capacity_investment, research, donations)))
+        if competitor_decisions is not None:
+            decisions['competitors'] = [dict(competitor) for competitor in competitor_decisions]
+        self.decisions.append(decisions)
         
         # Simular a economia
         self.economy.simulate_market()
@@ -21,27 +37,34 @@ class GameManager:
         # Calcular a demanda total do mercado
         base_demand = self.economy.calculate_base_demand()
         market_multiplier = self.economy.get_market_multiplier()
-        total_market_demand = int(base_demand * market_multiplier)
-        
-        # Calcular a demanda do jogador
-        player_demand = self.economy.calculate_demand(price, marketing)
-        player_demand = int(player_demand * (self.market_share / 100))
-        player_demand = min(player_demand, self.company.production)  # Limitar à produção
+        competitor_sales = None
+
+        if competitor_decisions is not None:
+            # Competidores ativos: o mercado é repartido entre todas as empresas de uma vez
+            total_market_demand, player_demand, competitor_sales = self._clear_market(
+                base_demand, market_multiplier, competitor_decisions)
+        else:
+            total_market_demand = int(base_demand * market_multiplier)
+
+            # Calcular a demanda do jogador
+            player_demand = self.economy.calculate_demand(price, marketing)
+            player_demand = int(player_demand * (self.market_share / 100))
+            player_demand = min(player_demand, self.company.production)  # Limitar à produção
         
         # Calcular receita e custos
         revenue = player_demand * price
-        production_cost = self.company.production * 50  # Custo de produção por unidade
-        total_costs = production_cost + marketing + research + donations
+        production_cost = self.company.production * PRODUCTION_COST_PER_UNIT  # Custo de produção por unidade
+        costs = total_costs(self.company.production, marketing, research, donations).item()
         
         # Calcular lucro
-        profit = revenue - total_costs
+        profit = revenue - costs
         
         # Atualizar o saldo da empresa
         self.company.balance += profit
         
         # Atualizar market share baseado nas decisões
-        market_influence = (marketing / 10000) - (price / 100) + (research / 5000)
-        self.market_share = max(0, min(100, self.market_share + market_influence))
+        if competitor_decisions is None:
+            self.market_share = update_market_share(self.market_share, price, marketing, research).item()
 
         # Preparar o resultado do trimestre
         result = {
@@ -51,7 +74,7 @@ class GameManager:
             "player_demand": player_demand,
             "revenue": revenue,
             "production_cost": production_cost,
-            "total_costs": total_costs,
+            "total_costs": costs,
             "profit": profit,
             "balance": self.company.balance,
             "market_share": self.market_share,
@@ -62,12 +85,55 @@ class GameManager:
             "research": research,
             "donations": donations
         }
+        if competitor_sales is not None:
+            result["competitor_sales"] = competitor_sales
         
         self.history.append(result)
         self.current_quarter += 1
         
         return result
 
+    def _clear_market(self, base_demand, market_multiplier, competitor_decisions):
+        if len(competitor_decisions) != len(self.competitors):
+            raise ValueError(
+                f"Esperadas decisões para {len(self.competitors)} competidores, recebidas {len(competitor_decisions)}"
+            )
+        self.competitors.set_decisions(*(
+            np.array([decisions.get(field, 0) for decisions in competitor_decisions], dtype=np.float64)
+            for field in self.DECISION_FIELDS
+        ))
+
+        # Jogador na primeira posição, seguido das colunas da tabela de competidores
+        price, production, marketing, research = (
+            np.concatenate(([getattr(self.company, field)], getattr(self.competitors, field)))
+            for field in ('price', 'production', 'marketing', 'research')
+        )
+        total_market_demand = int(market_demand(base_demand, market_multiplier, price, marketing))
+        cleared = clear_market(total_market_demand, price, production, marketing, research)
+        sales = cleared['sales'].astype(int).tolist()
+
+        # A participação do jogador passa a vir da divisão do mercado entre as empresas
+        self.market_share = float(cleared['share'][0] * 100)
+        self.competitors.calculate_profit(cleared['sales'][1:])
+        return total_market_demand, sales[0], sales[1:]
+
+    def forecast_outcomes(self, price, production, marketing, research, donations,
+                          n_paths=100_000, n_quarters=4, seed=None):
+        # Distribuição de resultados a partir do estado atual, sem alterar o jogo
+        engine = MarketMonteCarlo.from_economy(self.economy, seed=seed)
+        return engine.outcome_bands(price, production, marketing, research, donations,
+                                    market_share=self.market_share, n_paths=n_paths, n_quarters=n_quarters)
+
+    def evaluate_decisions(self, price, production, marketing, research=0, donations=0, market_multiplier=None):
+        # Avalia em lote decisões candidatas com o estado atual da economia, sem jogar o trimestre.
+        # Sem multiplicador informado, usa o valor esperado para a condição de mercado atual.
+        if market_multiplier is None:
+            market_multiplier = np.mean(self.economy.MULTIPLIER_RANGES[self.economy.market_condition])
+        player_demand = demand(self.economy.calculate_base_demand(), price, marketing, market_multiplier)
+        player_demand = np.trunc(player_demand * (self.market_share / 100))
+        return evaluate_decisions(player_demand, price, production, marketing, research, donations,
+                                  market_share=self.market_share)
+
     def get_financial_report(self):
         if not self.history:
             return None
@@ -114,3 +180,63 @@ class GameManager:
             "Player Price": latest["price"],
             "Market Share": f"{latest['market_share']:.2f}%"
         }
+
+    @property
+    def seed(self):
+        return self.economy.seed
+
+    def get_record(self):
+        # Registro mínimo para reprodução: semente, decisões e resultados obtidos
+        return {
+            'player_name': self.company.name,
+            'seed': self.seed,
+            'decisions': list(self.decisions),
+            'results': list(self.history),
+        }
+
+    @classmethod
+    def replay(cls, record):
+        # Joga novamente as decisões registradas a partir da mesma semente
+        manager = cls(record.get('player_name', 'Jogador'), seed=record['seed'])
+        for decisions in record['decisions']:
+            manager.play_quarter(*(decisions.get(field, 0) for field in cls.DECISION_FIELDS),
+                                 competitor_decisions=decisions.get('competitors'))
+        return manager
+
+    def snapshot(self):
+        # Estado completo do jogo em formato binário versionado
+        return dumps_snapshot("engine", {
+            'company': dict(vars(self.company)),
+            'economy': {
+                'seed': self.economy.seed,
+                'rng_state': self.economy.rng.getstate(),
+                'market_condition': self.economy.market_condition,
+                'base_demand': self.economy.base_demand,
+            },
+            'current_quarter': self.current_quarter,
+            'history': list(self.history),
+            'decisions': list(self.decisions),
+            'market_share': self.market_share,
+            'competitors': self.competitors.get_state(),
+        })
+
+    @classmethod
+    def restore(cls, data):
+        state = loads_snapshot(data, "engine")
+        economy_state = dict(state['economy'])
+        rng_state = economy_state.pop('rng_state', None)
+        manager = cls(state['company']['name'], seed=economy_state.pop('seed', None))
+        vars(manager.company).update(state['company'])
+        vars(manager.economy).update(economy_state)
+        if rng_state is not None:
+            manager.economy.rng.setstate(rng_state)
+        manager.current_quarter = state['current_quarter']
+        manager.history = list(state['history'])
+        manager.decisions = list(state.get('decisions', []))
+        manager.market_share = state['market_share']
+        if isinstance(state['competitors'], list):
+            # Snapshots anteriores guardavam uma lista de estados de Company
+            manager.competitors = CompanyTable.from_records(state['competitors'])
+        else:
+            manager.competitors = CompanyTable.from_state(state['competitors'])
+        return manager
@@ -0,0 +1,132 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ai_agents.game_manager import GameManager
+from utils.helpers import to_jsonable
+
+# Tolerância para comparar resultados numéricos entre a gravação e a reprodução
+REL_TOLERANCE = 1e-9
+ABS_TOLERANCE = 1e-6
+
+
+def load_records(path):
+    # Arquivo JSONL: um jogo por linha com player_name, seed, decisions e results
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_records(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(to_jsonable(record), ensure_ascii=False) + "\n")
+
+
+def _same(expected, actual):
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return math.isclose(expected, actual, rel_tol=REL_TOLERANCE, abs_tol=ABS_TOLERANCE)
+    return expected == actual
+
+
+def compare_results(expected, actual):
+    # Lista (trimestre, campo, gravado, reproduzido) para cada diferença encontrada
+    divergences = []
+    if len(expected) != len(actual):
+        divergences.append((None, 'quarters', len(expected), len(actual)))
+    for recorded, replayed in zip(expected, actual):
+        if recorded == replayed:
+            # Caso comum: trimestre idêntico, dispensa a comparação campo a campo
+            continue
+        for field, value in recorded.items():
+            if not _same(value, replayed.get(field)):
+                divergences.append((recorded.get('quarter'), field, value, replayed.get(field)))
+    return divergences
+
+
+def replay_game(record):
+    manager = GameManager.replay(record)
+    divergences = compare_results(record.get('results', []), manager.history)
+    return {
+        'game_id': record.get('game_id'),
+        'quarters': len(manager.history),
+        'diverged': bool(divergences),
+        'divergences': divergences,
+        'final_balance': manager.company.balance,
+    }
+
+
+def _replay_chunk(records):
+    return [replay_game(record) for record in records]
+
+
+def replay_games(records, workers=None, chunksize=256):
+    # Reproduz os jogos em lotes distribuídos por processos; workers=1 roda no processo atual
+    workers = workers or os.cpu_count() or 1
+    chunks = [records[i:i + chunksize] for i in range(0, len(records), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        results = [_replay_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_replay_chunk, chunks))
+    return [result for chunk in results for result in chunk]
+
+
+def generate_records(n_games, n_quarters=8, seed=0):
+    # Jogos sintéticos com decisões aleatórias, úteis para benchmark e testes de regressão
+    rng = random.Random(seed)
+    records = []
+    for game_index in range(n_games):
+        manager = GameManager("Jogador", seed=rng.randrange(2**63))
+        for _ in range(n_quarters):
+            manager.play_quarter(
+                price=rng.randint(20, 80),
+                production=rng.randint(200, 2000),
+                marketing=rng.randint(0, 10000),
+                capacity_investment=0,
+                research=rng.randint(0, 5000),
+                donations=rng.randint(0, 1000),
+            )
+        record = manager.get_record()
+        record['game_id'] = game_index
+        records.append(record)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprodução em lote de jogos gravados (seed + decisões)")
+    parser.add_argument("archive", nargs="?", help="Arquivo JSONL com os jogos gravados")
+    parser.add_argument("--generate", type=int, help="Gera N jogos sintéticos (salvos no arquivo, se informado)")
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=256)
+    args = parser.parse_args()
+
+    if args.generate:
+        records = generate_records(args.generate, args.quarters)
+        if args.archive:
+            save_records(args.archive, records)
+    elif args.archive:
+        records = load_records(args.archive)
+    else:
+        parser.error("informe um arquivo de jogos ou --generate N")
+
+    start = time.perf_counter()
+    results = replay_games(records, workers=args.workers, chunksize=args.chunksize)
+    elapsed = time.perf_counter() - start
+
+    diverged = [result for result in results if result['diverged']]
+    quarters = sum(result['quarters'] for result in results)
+    print(f"{len(results)} jogos ({quarters} trimestres) em {elapsed:.2f}s: "
+          f"{len(results) / elapsed:.0f} jogos/s, {quarters / elapsed:.0f} trimestres/s")
+    print(f"Divergências: {len(diverged)} jogos")
+    for result in diverged[:10]:
+        quarter, field, expected, actual = result['divergences'][0]
+        print(f"  jogo {result['game_id']}: trimestre {quarter}, {field}: {expected} != {actual}")
+
+
+if __name__ == "__main__":
+    main()
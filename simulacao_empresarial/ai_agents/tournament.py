@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from game_data.company_table import CompanyTable
+from game_data.economy import Economy
+from game_data.market import clear_market, market_demand
+
+
+class Strategy(ABC):
+    """Controla uma equipe: recebe a observação do trimestre e devolve as decisões."""
+
+    name = "base"
+
+    @abstractmethod
+    def decide(self, observation):
+        """Decisões do trimestre (preço, produção, marketing...) a partir da observação."""
+
+
+class FixedStrategy(Strategy):
+    name = "fixed"
+
+    def __init__(self, price=40, production=800, marketing=5000, research=1000, donations=0):
+        self.decisions = {
+            'price': price,
+            'production': production,
+            'marketing': marketing,
+            'capacity_investment': 0,
+            'research': research,
+            'donations': donations,
+        }
+
+    def decide(self, observation):
+        return dict(self.decisions)
+
+
+class HeuristicStrategy(Strategy):
+    """Produz perto da demanda do último trimestre e ajusta o preço à condição do mercado."""
+
+    name = "heuristic"
+    PRICES = {"weak": 35, "stable": 40, "strong": 45}
+
+    def __init__(self, marketing=3000, research=500, safety_margin=1.1):
+        self.marketing = marketing
+        self.research = research
+        self.safety_margin = safety_margin
+
+    def decide(self, observation):
+        expected_demand = observation['last_demand'] or observation['base_demand'] * observation['market_share'] / 100
+        production = min(int(expected_demand * self.safety_margin), observation['capacity'])
+        return {
+            'price': self.PRICES.get(observation['market_condition'], 40),
+            'production': production,
+            'marketing': self.marketing,
+            'capacity_investment': 0,
+            'research': self.research,
+            'donations': 0,
+        }
+
+
+class AggressiveStrategy(HeuristicStrategy):
+    """Preço baixo e marketing alto para ganhar participação de mercado."""
+
+    name = "aggressive"
+    PRICES = {"weak": 30, "stable": 32, "strong": 35}
+
+    def __init__(self):
+        super().__init__(marketing=9000, research=2000, safety_margin=1.2)
+
+
+class ModelStrategy(Strategy):
+    """Pede as decisões ao modelo; se a resposta não puder ser lida, usa a heurística."""
+
+    name = "model"
+    TEMPLATE = (
+        "Você controla uma empresa em um jogo de simulação empresarial. Estado atual: {observation}\n"
+        "Responda apenas com um JSON com as chaves price, production, marketing, research e donations."
+    )
+
+    def __init__(self, temperature=0.2):
+        self.temperature = temperature
+        self.fallback = HeuristicStrategy()
+
+    def decide(self, observation):
+        # Importado sob demanda: as demais estratégias não dependem do LangChain
+        from agents.llm_cache import invoke_cached
+        from agents.resources import get_llm, get_prompt
+
+        decisions = self.fallback.decide(observation)
+        try:
+            response = invoke_cached(get_prompt(self.TEMPLATE), get_llm(temperature=self.temperature),
+                                     {"observation": json.dumps(observation)}, agent="strategy")
+            match = re.search(r"\{.*\}", response.content, re.DOTALL)
+            suggested = json.loads(match.group(0)) if match else {}
+        except Exception:
+            return decisions
+        for key in ('price', 'production', 'marketing', 'research', 'donations'):
+            value = suggested.get(key)
+            if isinstance(value, (int, float)) and value >= 0:
+                decisions[key] = value
+        return decisions
+
+
+STRATEGIES = {
+    FixedStrategy.name: FixedStrategy,
+    HeuristicStrategy.name: HeuristicStrategy,
+    AggressiveStrategy.name: AggressiveStrategy,
+    ModelStrategy.name: ModelStrategy,
+}
+
+
+def get_strategy(strategy):
+    if isinstance(strategy, Strategy):
+        return strategy
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estratégia desconhecida: {strategy}")
+    return STRATEGIES[strategy]()
+
+
+class Match:
+    """Um jogo completo entre equipes que disputam o mesmo mercado."""
+
+    INITIAL_BALANCE = 10000
+
+    def __init__(self, strategies, seed=None):
+        self.strategies = [get_strategy(strategy) for strategy in strategies]
+        self.economy = Economy(seed)
+        self.companies = CompanyTable([f"Equipe {i}" for i in range(1, len(self.strategies) + 1)], self.INITIAL_BALANCE)
+        self.market_share = np.full(len(self.strategies), 100 / len(self.strategies))
+        self.last_demand = np.zeros(len(self.strategies))
+        self.last_sales = np.zeros(len(self.strategies))
+        self.quarter = 0
+
+    def observation(self, team, total_price):
+        companies = self.companies
+        n_competitors = len(companies) - 1
+        price = companies.price[team].item()
+        return {
+            'quarter': self.quarter + 1,
+            'market_condition': self.economy.market_condition,
+            'base_demand': self.economy.base_demand,
+            'balance': companies.balance[team].item(),
+            'capacity': companies.capacity[team].item(),
+            'market_share': self.market_share[team].item(),
+            'last_price': price,
+            'last_demand': int(self.last_demand[team]),
+            'last_sales': int(self.last_sales[team]),
+            'mean_competitor_price': (total_price - price) / n_competitors if n_competitors else 0,
+        }
+
+    def play_quarter(self):
+        total_price = self.companies.price.sum().item()
+        decisions = [strategy.decide(self.observation(team, total_price)) for team, strategy in enumerate(self.strategies)]
+        self.companies.set_decisions(*(
+            np.array([team_decisions.get(field, 0) for team_decisions in decisions], dtype=np.float64)
+            for field in ('price', 'production', 'marketing', 'capacity_investment', 'research', 'donations')
+        ))
+
+        self.economy.simulate_market()
+        market_multiplier = self.economy.get_market_multiplier()
+        companies = self.companies
+
+        # Mercado repartido entre as equipes pela atratividade de preço, marketing e P&D
+        total_demand = market_demand(self.economy.base_demand, market_multiplier, companies.price, companies.marketing)
+        cleared = clear_market(total_demand, companies.price, companies.production, companies.marketing, companies.research)
+        companies.calculate_profit(cleared['sales'])
+
+        self.market_share = cleared['share'] * 100
+        self.last_demand = cleared['demand']
+        self.last_sales = cleared['sales']
+        self.quarter += 1
+
+    def play(self, n_quarters):
+        for _ in range(n_quarters):
+            self.play_quarter()
+        return self.results()
+
+    def results(self):
+        return [
+            {
+                'team': team,
+                'strategy': strategy.name,
+                'balance': balance,
+                'market_share': market_share,
+            }
+            for team, (strategy, balance, market_share) in enumerate(
+                zip(self.strategies, self.companies.balance.tolist(), self.market_share.tolist()))
+        ]
+
+
+def _play_chunk(strategies, n_quarters, games):
+    results = []
+    for game_id, seed in games:
+        game_results = Match(strategies, seed=seed).play(n_quarters)
+        winner = max(range(len(game_results)), key=lambda team: game_results[team]['balance'])
+        for result in game_results:
+            result['game_id'] = game_id
+            result['won'] = result['team'] == winner
+        results.extend(game_results)
+    return results
+
+
+def run_tournament(strategies, n_games=1000, n_quarters=8, workers=None, seed=None, chunksize=64):
+    # Jogos independentes distribuídos em lotes pelos núcleos; cada jogo tem sua própria semente
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    games = [(game_id, rng.randrange(2**63)) for game_id in range(n_games)]
+    chunks = [games[i:i + chunksize] for i in range(0, len(games), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        results = [_play_chunk(strategies, n_quarters, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_play_chunk, [strategies] * len(chunks), [n_quarters] * len(chunks), chunks))
+    return pd.DataFrame([result for chunk in results for result in chunk])
+
+
+def leaderboard(results):
+    # Uma linha por equipe/estratégia, ordenada pelo saldo final médio
+    board = results.groupby(['team', 'strategy']).agg(
+        games=('game_id', 'count'),
+        mean_balance=('balance', 'mean'),
+        std_balance=('balance', 'std'),
+        mean_market_share=('market_share', 'mean'),
+        win_rate=('won', 'mean'),
+    )
+    return board.sort_values('mean_balance', ascending=False).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Torneio entre estratégias de bots em jogos paralelos")
+    parser.add_argument("--strategies", nargs="+", default=["fixed", "heuristic", "aggressive"],
+                        help=f"Uma equipe por estratégia ({', '.join(STRATEGIES)})")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_tournament(args.strategies, args.games, args.quarters, workers=args.workers, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(leaderboard(results).to_string(index=False))
+    print(f"{args.games} jogos em {elapsed:.2f}s: {args.games / elapsed:.0f} jogos/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sem rede: o modelo é substituído por um stub e o cache em disco fica desligado
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["LLM_CACHE"] = "off"
+
+DECISIONS = {
+    'production': 800,
+    'price': 40,
+    'marketing': 5000,
+    'research_development': 1000,
+    'charitable_giving': 0,
+}
+
+STUB_ANALYSIS = "A empresa mantém caixa positivo, margem bruta estável e despesas de marketing sob controle."
+
+
+def stub_llm():
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    return FakeListChatModel(responses=[STUB_ANALYSIS])
+
+
+def new_agent_game():
+    from agents.game_manager_agent import GameManagerAgent
+    game = GameManagerAgent()
+    game.accountant.llm = stub_llm()
+    return game
+
+
+def measure(function, repeat=5, number=1):
+    """Tempo por chamada (melhor e mediana de `repeat` rodadas) e pico de memória em uma rodada extra."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - start) / number)
+
+    # Medido à parte: o tracemalloc deixa o código bem mais lento
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_ms": min(times) * 1000,
+        "median_ms": float(np.median(times)) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def bench_ledger_posting(sizes):
+    from agents.journal import Journal, JournalEntry
+
+    def entry(quarter):
+        return (JournalEntry(f'Q{quarter}')
+                .debit('Inventory', 8000, 'Production added to inventory')
+                .credit('Cash', 8000, 'Payment for production costs')
+                .debit('Cash', 32000, 'Cash from sales')
+                .credit('Sales', 32000, 'Revenue from sales')
+                .debit('Marketing', 5000, 'Marketing expenses')
+                .credit('Cash', 5000, 'Payment for marketing'))
+
+    results = []
+    for n_entries in sizes:
+        entries = [entry(i % 200 + 1) for i in range(n_entries)]
+
+        def post_all():
+            journal = Journal()
+            for item in entries:
+                journal.post(item)
+
+        result = measure(post_all, repeat=3)
+        result.update(entries=n_entries, per_entry_us=result["best_ms"] * 1000 / n_entries)
+        results.append(result)
+    return results
+
+
+def bench_statements(quarters):
+    results = []
+    for n_quarters in quarters:
+        game = new_agent_game()
+        for quarter in range(1, n_quarters + 1):
+            game.process_player_decisions(DECISIONS, quarter)
+            game.accountant.close_quarter(quarter)
+        accountant = game.accountant
+        # Relatórios do último trimestre: saldos de abertura do fechamento anterior + movimento do trimestre
+        result = measure(lambda: accountant.generate_financial_statements(n_quarters), repeat=5, number=20)
+        result["quarters"] = n_quarters
+        results.append(result)
+    return results
+
+
+def bench_engine(number):
+    from ai_agents.game_manager import GameManager
+
+    results = []
+    for with_competitors in (False, True):
+        game = GameManager("Benchmark", seed=0)
+        competitors = [{'price': 45, 'production': 600, 'marketing': 3000}] * 3 if with_competitors else None
+
+        def play():
+            game.play_quarter(40, 800, 5000, 0, 1000, 0, competitor_decisions=competitors)
+
+        result = measure(play, repeat=5, number=number)
+        result.update(competitors=with_competitors, per_quarter_us=result["best_ms"] * 1000)
+        results.append(result)
+    return results
+
+
+def bench_run_game(number):
+    game = new_agent_game()
+    game.run_game(DECISIONS)  # Aquece o pool de threads e os imports
+
+    def play():
+        result = game.run_game(DECISIONS)
+        if isinstance(result, str):
+            raise RuntimeError(result)
+
+    return measure(play, repeat=5, number=number)
+
+
+def bench_long_games(lengths):
+    results = []
+    for n_quarters in lengths:
+        def play_game():
+            game = new_agent_game()
+            for _ in range(n_quarters):
+                game.run_game(DECISIONS)
+            return game
+
+        gc.collect()
+        start = time.perf_counter()
+        game = play_game()
+        elapsed = time.perf_counter() - start
+
+        # Custo dos últimos trimestres: mostra se o trimestre fica mais caro com o histórico
+        tail_start = time.perf_counter()
+        for _ in range(5):
+            game.run_game(DECISIONS)
+        tail_ms = (time.perf_counter() - tail_start) / 5 * 1000
+
+        gc.collect()
+        tracemalloc.start()
+        play_game()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append({
+            "quarters": n_quarters,
+            "total_s": elapsed,
+            "mean_quarter_ms": elapsed / n_quarters * 1000,
+            "last_quarter_ms": tail_ms,
+            "peak_kib": peak / 1024,
+        })
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    import pandas
+    return {
+        "timestamp": time.time(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline, threshold):
+    # Lista as medições que ficaram mais lentas que o baseline além do limite (ex.: 1.2 = 20%)
+    regressions = []
+
+    def walk(current, previous, path):
+        if isinstance(current, dict) and isinstance(previous, dict):
+            for key, value in current.items():
+                if key in previous:
+                    walk(value, previous[key], f"{path}.{key}" if path else key)
+        elif isinstance(current, list) and isinstance(previous, list):
+            for i, (value, old) in enumerate(zip(current, previous)):
+                walk(value, old, f"{path}[{i}]")
+        elif path.endswith(("_ms", "_us", "_s")) and isinstance(current, (int, float)) and previous:
+            ratio = current / previous
+            if ratio > threshold:
+                regressions.append((path, previous, current, ratio))
+
+    walk(results["benchmarks"], baseline.get("benchmarks", {}), "")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline do motor, do razão e do trimestre completo (modelo stub)")
+    parser.add_argument("--ledger-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--statement-quarters", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--game-lengths", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--engine-quarters", type=int, default=1000)
+    parser.add_argument("--run-game-quarters", type=int, default=20)
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Razão de tempo considerada regressão")
+    args = parser.parse_args()
+
+    benchmarks = {}
+    steps = [
+        ("ledger_posting", lambda: bench_ledger_posting(args.ledger_sizes)),
+        ("statements", lambda: bench_statements(args.statement_quarters)),
+        ("engine_play_quarter", lambda: bench_engine(args.engine_quarters)),
+        ("run_game", lambda: bench_run_game(args.run_game_quarters)),
+        ("long_games", lambda: bench_long_games(args.game_lengths)),
+    ]
+    for name, step in steps:
+        benchmarks[name] = step()
+        rows = benchmarks[name] if isinstance(benchmarks[name], list) else [benchmarks[name]]
+        for row in rows:
+            print(f"{name:>20}: " + ", ".join(
+                f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}" for key, value in row.items()))
+
+    results = {"environment": environment(), "benchmarks": benchmarks}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for path, previous, current, ratio in regressions:
+            print(f"Regressão: {path}: {previous:.3f} -> {current:.3f} ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
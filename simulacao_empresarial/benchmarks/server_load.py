@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from server.game_server import GameServer
+
+DECISIONS = {
+    'production': 800,
+    'price': 40,
+    'marketing': 5000,
+    'research_development': 1000,
+    'charitable_giving': 0,
+}
+
+
+class InProcessClient:
+    def __init__(self, game_server):
+        self.game_server = game_server
+
+    async def create_session(self, kind):
+        return self.game_server.create_session(kind)
+
+    async def play_quarter(self, session_id, decisions):
+        return await self.game_server.submit_decisions(session_id, decisions)
+
+
+class HttpClient:
+    def __init__(self, http_session, base_url):
+        self.http_session = http_session
+        self.base_url = base_url
+
+    async def create_session(self, kind):
+        async with self.http_session.post(f"{self.base_url}/sessions", json={"kind": kind}) as response:
+            response.raise_for_status()
+            return (await response.json())["session_id"]
+
+    async def play_quarter(self, session_id, decisions):
+        async with self.http_session.post(f"{self.base_url}/sessions/{session_id}/quarters", json=decisions) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+async def run_load(client, n_sessions, n_quarters, kind="engine"):
+    session_ids = [await client.create_session(kind) for _ in range(n_sessions)]
+    latencies = []
+
+    async def play(session_id):
+        for _ in range(n_quarters):
+            start = time.perf_counter()
+            await client.play_quarter(session_id, DECISIONS)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(session_id) for session_id in session_ids))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "sessions": n_sessions,
+        "quarters_per_session": n_quarters,
+        "kind": kind,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "quarters_per_second": len(latencies) / elapsed,
+    }
+
+
+async def run_benchmark(session_counts, n_quarters, kind, use_http):
+    results = []
+    if not use_http:
+        for n_sessions in session_counts:
+            client = InProcessClient(GameServer(max_sessions=n_sessions))
+            results.append(await run_load(client, n_sessions, n_quarters, kind))
+        return results
+
+    from aiohttp import ClientSession, TCPConnector, web
+    from server.http_api import create_app
+
+    for n_sessions in session_counts:
+        runner = web.AppRunner(create_app(GameServer(max_sessions=n_sessions)))
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            async with ClientSession(connector=TCPConnector(limit=n_sessions)) as http_session:
+                client = HttpClient(http_session, f"http://127.0.0.1:{port}")
+                results.append(await run_load(client, n_sessions, n_quarters, kind))
+        finally:
+            await runner.cleanup()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga do servidor headless (sessões x latência por trimestre)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--quarters", type=int, default=20)
+    parser.add_argument("--kind", choices=GameServer.KINDS, default="engine")
+    parser.add_argument("--http", action="store_true", help="Passa pelas rotas HTTP em vez de chamar o servidor direto")
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.sessions, args.quarters, args.kind, args.http))
+    print(f"{'sessões':>8} {'p50 (ms)':>10} {'p99 (ms)':>10} {'trimestres/s':>14}")
+    for result in results:
+        print(f"{result['sessions']:>8} {result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f} {result['quarters_per_second']:>14.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cada medição "a frio" roda em um processo novo, sem módulos já importados
+COLD_IMPORT = """
+import time
+start = time.perf_counter()
+import agents.game_manager_agent
+print(time.perf_counter() - start)
+"""
+
+FIRST_PAGE = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("frontend/app.py", default_timeout=60).run()
+print(time.perf_counter() - start)
+"""
+
+
+def _run_cold(code):
+    env = dict(os.environ)
+    # A criação de sessões não chama o modelo; uma chave fictícia basta
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_cold(code, repeat):
+    return [_run_cold(code) for _ in range(repeat)]
+
+
+def measure_sessions(n_sessions, workers):
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    from agents.game_manager_agent import GameManagerAgent
+
+    def create_session(_):
+        start = time.perf_counter()
+        GameManagerAgent()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(create_session, range(n_sessions)))
+    return latencies, time.perf_counter() - start
+
+
+def _summary(values):
+    values_ms = np.array(values) * 1000
+    return {"p50_ms": float(np.percentile(values_ms, 50)), "p99_ms": float(np.percentile(values_ms, 99)),
+            "max_ms": float(values_ms.max())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização: import a frio, primeira página e criação de sessões")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições das medições a frio")
+    parser.add_argument("--sessions", type=int, default=100, help="Sessões criadas ao mesmo tempo")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--output", help="Arquivo JSON para salvar os resultados")
+    args = parser.parse_args()
+
+    results = {"cold_import": _summary(measure_cold(COLD_IMPORT, args.repeat))}
+    try:
+        results["first_page"] = _summary(measure_cold(FIRST_PAGE, args.repeat))
+    except subprocess.CalledProcessError as e:
+        print(f"Primeira página não medida (Streamlit indisponível?): {e.stderr.strip().splitlines()[-1]}")
+    latencies, elapsed = measure_sessions(args.sessions, args.workers)
+    results["session_creation"] = dict(_summary(latencies), sessions=args.sessions, total_s=elapsed)
+
+    for name, summary in results.items():
+        print(f"{name:>18}: " + ", ".join(f"{k}={v:.2f}" for k, v in summary.items()))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
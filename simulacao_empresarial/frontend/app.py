@@ -2,12 +2,15 @@ import streamlit as st
 import pandas as pd
 import os
 import sys
+import uuid
 from dotenv import load_dotenv
 
 # Adiciona o diretório pai ao sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.game_manager_agent import GameManagerAgent
+from frontend.components.charts import history_chart_data, render_history_charts
+from frontend.components.forms import decision_form
 
 load_dotenv()
 
@@ -27,13 +30,15 @@ def format_number(value):
     """
     return f"{abs(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-def display_financial_reports(financial_reports):
-    st.subheader("Demonstração de Resultados")
+def build_report_tables(financial_reports):
+    # Monta (sem renderizar) os elementos dos relatórios: títulos, textos e tabelas formatadas
+    elements = []
+    elements.append(("subheader", "Demonstração de Resultados"))
     income_statement = financial_reports.get("Income Statement", {})
     income_data = [(k, format_number(v)) for k, v in income_statement.items()]
-    st.table(pd.DataFrame(income_data, columns=["Item", "Valor"]))
+    elements.append(("table", pd.DataFrame(income_data, columns=["Item", "Valor"])))
 
-    st.subheader("Balanço Patrimonial")
+    elements.append(("subheader", "Balanço Patrimonial"))
     balance_sheet = financial_reports.get("Balance Sheet", {})
     
     if isinstance(balance_sheet, dict):
@@ -59,9 +64,9 @@ def display_financial_reports(financial_reports):
     else:
         balance_sheet_data = [("Balanço Patrimonial não disponível", "")]
     
-    st.table(pd.DataFrame(balance_sheet_data, columns=["Item", "Valor"]))
+    elements.append(("table", pd.DataFrame(balance_sheet_data, columns=["Item", "Valor"])))
 
-    st.subheader("Relatório de Produção e Marketing")
+    elements.append(("subheader", "Relatório de Produção e Marketing"))
     production_marketing = financial_reports.get("Production and Marketing Report", {})
     if isinstance(production_marketing, dict):
         production_data = [(k, format_number(v) if isinstance(v, (int, float)) else v) 
@@ -69,14 +74,14 @@ def display_financial_reports(financial_reports):
         marketing_data = [(k, format_number(v) if isinstance(v, (int, float)) else v) 
                           for k, v in production_marketing.get("Marketing", {}).items()]
         
-        st.write("Produção")
-        st.table(pd.DataFrame(production_data, columns=["Item", "Valor"]))
-        st.write("Marketing")
-        st.table(pd.DataFrame(marketing_data, columns=["Item", "Valor"]))
+        elements.append(("write", "Produção"))
+        elements.append(("table", pd.DataFrame(production_data, columns=["Item", "Valor"])))
+        elements.append(("write", "Marketing"))
+        elements.append(("table", pd.DataFrame(marketing_data, columns=["Item", "Valor"])))
     else:
-        st.write("Dados de Produção e Marketing não disponíveis")
+        elements.append(("write", "Dados de Produção e Marketing não disponíveis"))
 
-    st.subheader("Fluxo de Caixa")
+    elements.append(("subheader", "Fluxo de Caixa"))
     cash_flow = financial_reports.get("Cash Flow", {})
     if isinstance(cash_flow, dict):
         ending_cash = cash_flow.get("Ending Cash", {})
@@ -98,7 +103,112 @@ def display_financial_reports(financial_reports):
     else:
         cash_flow_data = [("Fluxo de Caixa não disponível", "")]
     
-    st.table(pd.DataFrame(cash_flow_data, columns=["Item", "Valor"]))
+    elements.append(("table", pd.DataFrame(cash_flow_data, columns=["Item", "Valor"])))
+    return elements
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_report_tables(game_id, quarter, _financial_reports):
+    # Tabelas formatadas uma única vez por jogo e trimestre; reexecuções reaproveitam o cache
+    return build_report_tables(_financial_reports)
+
+def display_financial_reports(financial_reports, game_id=None, quarter=None):
+    if game_id is None:
+        elements = build_report_tables(financial_reports)
+    else:
+        elements = cached_report_tables(game_id, quarter, financial_reports)
+    for kind, value in elements:
+        getattr(st, kind)(value)
+
+def play_quarter(player_decisions):
+    game_manager = st.session_state.game_manager
+    try:
+        financial_reports, streams = game_manager.start_streamed_quarter(player_decisions)
+    except Exception as e:
+        st.error(f"Desculpe, ocorreu um erro ao executar o jogo: {e}")
+        return
+
+    quarter = game_manager.game_state["quarter"]
+
+    # Relatórios financeiros são determinísticos: exibidos imediatamente
+    st.header("Relatórios Financeiros")
+    display_financial_reports(financial_reports, st.session_state.game_id, quarter)
+
+    # Áreas reservadas na ordem de exibição; o texto chega em streaming
+    st.header("Análise Financeira")
+    analysis_area = st.empty()
+    st.header("Dados da Economia")
+    economy_area = st.empty()
+    st.header("Dados dos Competidores")
+    competitors_area = st.empty()
+
+    # Economia e competidores são rápidos; a análise do modelo vem por último.
+    # Os trechos recebidos são guardados à medida que chegam: se a execução for
+    # interrompida (parada ou nova execução do Streamlit), o trimestre é finalizado
+    # com o texto parcial
+    received = {name: [] for name in streams}
+    try:
+        with economy_area.container():
+            st.write_stream(collect_stream(streams["economy"], received["economy"]))
+        with competitors_area.container():
+            st.write_stream(collect_stream(streams["competitors"], received["competitors"]))
+        with analysis_area.container():
+            try:
+                st.write_stream(collect_stream(streams["analysis"], received["analysis"]))
+            except Exception as e:
+                # O trimestre já foi lançado no razão: registra mesmo sem a análise
+                received["analysis"] = [f"Análise financeira indisponível: {e}"]
+                st.error(received["analysis"][0])
+    finally:
+        economy_data, competitors_data, financial_analysis = (
+            "".join(received[name]) for name in ("economy", "competitors", "analysis"))
+        game_manager.finish_streamed_quarter(financial_reports, economy_data, competitors_data, financial_analysis)
+        st.session_state.last_quarter = {
+            "quarter": quarter,
+            "financials": financial_reports,
+            "analysis": financial_analysis,
+            "economy": economy_data,
+            "competitors": competitors_data,
+        }
+
+def collect_stream(stream, chunks):
+    # Repassa os trechos para st.write_stream e guarda uma cópia do que já chegou
+    for chunk in stream:
+        chunks.append(str(chunk))
+        yield chunk
+
+@st.fragment
+def reports_panel():
+    # Reexibe o último trimestre a partir do cache, isolado das reexecuções da página
+    last_quarter = st.session_state.get("last_quarter")
+    if last_quarter is None:
+        return
+    st.header("Relatórios Financeiros")
+    display_financial_reports(last_quarter["financials"], st.session_state.game_id, last_quarter["quarter"])
+    st.header("Análise Financeira")
+    st.write(last_quarter["analysis"])
+    st.header("Dados da Economia")
+    st.write(last_quarter["economy"])
+    st.header("Dados dos Competidores")
+    st.write(last_quarter["competitors"])
+
+@st.fragment
+def history_panel():
+    game_manager = st.session_state.game_manager
+    st.header("Histórico")
+    series = game_manager.accountant.get_quarterly_series()
+    frame = history_chart_data(st.session_state.game_id, game_manager.game_state["quarter"], series)
+    render_history_charts(frame)
+
+@st.fragment
+def questions_panel():
+    # Perguntas de rotina respondidas pelos indicadores locais; as abertas vão para o agente
+    st.header("Perguntas sobre o Jogo")
+    question = st.text_input("Pergunte sobre margem, caixa, capacidade, vendas ou variação entre trimestres")
+    if question:
+        try:
+            st.write(st.session_state.game_manager.ask(question))
+        except Exception as e:
+            st.error(f"Não foi possível responder à pergunta: {e}")
 
 def main():
     st.set_page_config(layout="wide")
@@ -106,54 +216,19 @@ def main():
 
     # Inicializar variáveis de sessão
     if 'game_manager' not in st.session_state:
-        st.session_state.game_manager = GameManagerAgent()
-
-    # Inicializar variáveis de decisão do jogador
-    if 'production' not in st.session_state:
-        st.session_state.production = 0
-    if 'price' not in st.session_state:
-        st.session_state.price = 0
-    if 'marketing' not in st.session_state:
-        st.session_state.marketing = 0
-    if 'research_development' not in st.session_state:
-        st.session_state.research_development = 0
-    if 'charitable_giving' not in st.session_state:
-        st.session_state.charitable_giving = 0
+        st.session_state.game_id = uuid.uuid4().hex
+        st.session_state.game_manager = GameManagerAgent(st.session_state.game_id)
 
     # Barra lateral para decisões do jogador
-    st.sidebar.header("Decisões do Jogador")
-    st.session_state.production = st.sidebar.number_input("Produção", min_value=0, value=st.session_state.production)
-    st.session_state.price = st.sidebar.number_input("Preço", min_value=0.0, value=float(st.session_state.price), step=0.01)
-    st.session_state.marketing = st.sidebar.number_input("Marketing", min_value=0, value=st.session_state.marketing)
-    st.session_state.research_development = st.sidebar.number_input("Pesquisa e Desenvolvimento", min_value=0, value=st.session_state.research_development)
-    st.session_state.charitable_giving = st.sidebar.number_input("Doações", min_value=0, value=st.session_state.charitable_giving)
-
-    if st.sidebar.button("Avançar Trimestre"):
-        player_decisions = {
-            'production': st.session_state.production,
-            'price': st.session_state.price,
-            'marketing': st.session_state.marketing,
-            'research_development': st.session_state.research_development,
-            'charitable_giving': st.session_state.charitable_giving
-        }
-        game_state = st.session_state.game_manager.run_game(player_decisions)
-        financial_reports = game_state['financials']
-
-        # Exibir relatórios financeiros
-        st.header("Relatórios Financeiros")
-        display_financial_reports(financial_reports)
+    player_decisions = decision_form()
 
-        # Exibir análise financeira
-        st.header("Análise Financeira")
-        st.write(game_state['analysis'])
-
-        # Exibir dados da economia
-        st.header("Dados da Economia")
-        st.write(game_state['economy'])
+    if player_decisions is not None:
+        play_quarter(player_decisions)
+    else:
+        reports_panel()
 
-        # Exibir dados dos competidores
-        st.header("Dados dos Competidores")
-        st.write(game_state['competitors'])
+    history_panel()
+    questions_panel()
 
 if __name__ == "__main__":
     main()
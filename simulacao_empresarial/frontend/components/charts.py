@@ -1 +1,46 @@
-# Componentes de gráficos
\ No newline at end of file
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+# Séries exibidas nos gráficos de histórico (coluna -> título), as mesmas de
+# AccountantAgent.get_quarterly_series: o jogo com agentes não tem participação de mercado
+HISTORY_SERIES = {
+    "revenue": "Receita por Trimestre",
+    "profit": "Lucro por Trimestre",
+    "cash": "Caixa",
+}
+
+
+def downsample(frame, max_points=200, x="quarter"):
+    # Agrega trimestres consecutivos em blocos (média) para jogos longos;
+    # cada ponto é rotulado com o último trimestre do bloco
+    if len(frame) <= max_points:
+        return frame
+    starts = np.linspace(0, len(frame), max_points, endpoint=False).astype(int)
+    ends = np.append(starts[1:], len(frame))
+    values = frame.drop(columns=x).to_numpy(dtype=float)
+    means = np.add.reduceat(values, starts, axis=0) / (ends - starts)[:, None]
+    result = pd.DataFrame(means, columns=[c for c in frame.columns if c != x])
+    result.insert(0, x, frame[x].to_numpy()[ends - 1])
+    return result
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def history_chart_data(game_id, n_quarters, _series, max_points=200):
+    # Preparado no servidor uma vez por jogo e trimestre; _series não entra na chave do cache
+    frame = pd.DataFrame(_series)
+    columns = ["quarter"] + [name for name in HISTORY_SERIES if name in frame.columns]
+    return downsample(frame[columns], max_points)
+
+
+def render_history_charts(frame):
+    if frame.empty:
+        st.info("O histórico aparece aqui a partir do primeiro trimestre.")
+        return
+    names = [name for name in HISTORY_SERIES if name in frame.columns]
+    columns = st.columns(2)
+    for i, name in enumerate(names):
+        figure = px.line(frame, x="quarter", y=name, title=HISTORY_SERIES[name], markers=len(frame) <= 40)
+        figure.update_layout(xaxis_title="Trimestre", yaxis_title=None, height=300, margin=dict(t=40, b=20))
+        columns[i % 2].plotly_chart(figure, use_container_width=True)
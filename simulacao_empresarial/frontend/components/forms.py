@@ -1 +1,24 @@
-# Componentes de formulários
\ No newline at end of file
+import streamlit as st
+
+
+def decision_form():
+    # Formulário na barra lateral: editar os campos não reexecuta a página;
+    # só o envio ("Avançar Trimestre") dispara uma nova execução
+    with st.sidebar.form("player_decisions"):
+        st.header("Decisões do Jogador")
+        st.number_input("Produção", min_value=0, key="production")
+        st.number_input("Preço", min_value=0.0, step=0.01, key="price")
+        st.number_input("Marketing", min_value=0, key="marketing")
+        st.number_input("Pesquisa e Desenvolvimento", min_value=0, key="research_development")
+        st.number_input("Doações", min_value=0, key="charitable_giving")
+        submitted = st.form_submit_button("Avançar Trimestre")
+
+    if not submitted:
+        return None
+    return {
+        'production': st.session_state.production,
+        'price': st.session_state.price,
+        'marketing': st.session_state.marketing,
+        'research_development': st.session_state.research_development,
+        'charitable_giving': st.session_state.charitable_giving
+    }
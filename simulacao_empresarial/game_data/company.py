@@ -1,3 +1,6 @@
+from .decision_evaluation import evaluate_decisions
+from .formulas import total_costs
+
 class Company:
     def __init__(self, name, initial_balance):
         self.name = name
@@ -19,7 +22,11 @@ class Company:
 
     def calculate_profit(self, demand):
         revenue = min(demand, self.production) * self.price
-        costs = self.production * 50 + self.marketing + self.research + self.donations
+        costs = total_costs(self.production, self.marketing, self.research, self.donations).item()
         profit = revenue - costs
         self.balance += profit
         return profit
+
+    def evaluate_decisions(self, demand, price, production, marketing, research=0, donations=0):
+        # Mesmo cálculo de calculate_profit para arrays de candidatos, sem alterar o saldo
+        return evaluate_decisions(demand, price, production, marketing, research, donations)
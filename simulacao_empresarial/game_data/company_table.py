@@ -0,0 +1,113 @@
+import numpy as np
+from .formulas import total_costs
+
+
+class CompanyTable:
+    """Várias empresas guardadas em colunas NumPy, com as regras de Company aplicadas a todas as linhas."""
+
+    FIELDS = ('balance', 'price', 'production', 'marketing', 'capacity', 'research', 'donations')
+    INITIAL_CAPACITY = 1000
+
+    def __init__(self, names, initial_balance):
+        self.names = list(names)
+        n = len(self.names)
+        self.balance = np.full(n, initial_balance, dtype=np.float64)
+        self.price = np.zeros(n, dtype=np.float64)
+        self.production = np.zeros(n, dtype=np.float64)
+        self.marketing = np.zeros(n, dtype=np.float64)
+        self.capacity = np.full(n, self.INITIAL_CAPACITY, dtype=np.float64)
+        self.research = np.zeros(n, dtype=np.float64)
+        self.donations = np.zeros(n, dtype=np.float64)
+
+    @classmethod
+    def from_records(cls, records):
+        # Converte estados de Company (dicts com name, balance, price, ...) em uma tabela
+        table = cls([record['name'] for record in records], 0)
+        for field in cls.FIELDS:
+            getattr(table, field)[:] = [record.get(field, 0) for record in records]
+        return table
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, row):
+        if not -len(self) <= row < len(self):
+            raise IndexError(f"Empresa fora da tabela: {row}")
+        return CompanyView(self, row % len(self))
+
+    def __iter__(self):
+        return (CompanyView(self, row) for row in range(len(self)))
+
+    def set_decisions(self, price, production, marketing, capacity_investment, research, donations):
+        # Cada argumento pode ser escalar (igual para todas) ou um array com um valor por empresa
+        self.price[:] = price
+        self.production[:] = production
+        self.marketing[:] = marketing
+        self.capacity += capacity_investment
+        self.research[:] = research
+        self.donations[:] = donations
+
+    def calculate_profit(self, demand):
+        revenue = np.minimum(demand, self.production) * self.price
+        profit = revenue - total_costs(self.production, self.marketing, self.research, self.donations)
+        self.balance += profit
+        return profit
+
+    def get_state(self):
+        state = {field: getattr(self, field).copy() for field in self.FIELDS}
+        state['names'] = list(self.names)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        table = cls(state['names'], 0)
+        for field in cls.FIELDS:
+            getattr(table, field)[:] = state[field]
+        return table
+
+
+class CompanyView:
+    """Uma linha de CompanyTable com a mesma interface de Company, para o código existente."""
+
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def name(self):
+        return self.table.names[self.row]
+
+    def set_decisions(self, price, production, marketing, capacity_investment, research, donations):
+        table, row = self.table, self.row
+        table.price[row] = price
+        table.production[row] = production
+        table.marketing[row] = marketing
+        table.capacity[row] += capacity_investment
+        table.research[row] = research
+        table.donations[row] = donations
+
+    def calculate_profit(self, demand):
+        revenue = min(demand, self.production) * self.price
+        costs = total_costs(self.production, self.marketing, self.research, self.donations).item()
+        profit = revenue - costs
+        self.balance += profit
+        return profit
+
+    def __repr__(self):
+        return f"CompanyView({self.name!r}, balance={self.balance})"
+
+
+def _column_property(field):
+    def getter(self):
+        return getattr(self.table, field)[self.row].item()
+
+    def setter(self, value):
+        getattr(self.table, field)[self.row] = value
+
+    return property(getter, setter)
+
+
+for _field in CompanyTable.FIELDS:
+    setattr(CompanyView, _field, _column_property(_field))
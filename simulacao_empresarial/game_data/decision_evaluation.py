@@ -0,0 +1,33 @@
+import numpy as np
+from .formulas import PRODUCTION_COST_PER_UNIT, total_costs, update_market_share
+
+
+def decision_grid(**axes):
+    # Produto cartesiano dos valores candidatos, achatado em arrays 1-D
+    # (ex.: decision_grid(price=np.linspace(10, 90, 300), marketing=np.arange(0, 20000, 50)))
+    names = list(axes)
+    mesh = np.meshgrid(*(np.asarray(axes[name], dtype=np.float64) for name in names), indexing="ij")
+    return {name: values.ravel() for name, values in zip(names, mesh)}
+
+
+def evaluate_decisions(demand, price, production, marketing, research=0, donations=0, market_share=None):
+    """Avalia em lote decisões candidatas sem alterar nenhum objeto do jogo."""
+    demand, price, production, marketing, research, donations = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (demand, price, production, marketing, research, donations))
+    )
+    sales = np.minimum(demand, production)
+    revenue = sales * price
+    costs = total_costs(production, marketing, research, donations)
+    result = {
+        "demand": demand,
+        "sales": sales,
+        "revenue": revenue,
+        "production_cost": production * PRODUCTION_COST_PER_UNIT,
+        "total_costs": costs,
+        "profit": revenue - costs,
+    }
+    if market_share is not None:
+        new_share = update_market_share(market_share, price, marketing, research)
+        result["market_share"] = new_share
+        result["market_share_delta"] = new_share - market_share
+    return result
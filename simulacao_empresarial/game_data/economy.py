@@ -1,37 +1,47 @@
 import random
+from .formulas import demand
 
 class Economy:
-    def __init__(self):
+    CONDITIONS = ["weak", "stable", "strong"]
+    MIN_BASE_DEMAND = 800
+    MAX_BASE_DEMAND = 1200
+    # Variação da demanda base por trimestre (forte/fraco) e faixa de oscilação estável
+    DEMAND_SHIFT = (50, 200)
+    STABLE_DRIFT = (-50, 50)
+    MULTIPLIER_RANGES = {
+        "weak": (0.8, 1.0),
+        "stable": (0.9, 1.1),
+        "strong": (1.0, 1.2),
+    }
+
+    def __init__(self, seed=None):
+        # Cada jogo tem seu próprio gerador: com a semente registrada, o jogo pode ser reproduzido
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**63)
+        self.seed = seed
+        self.rng = random.Random(seed)
         self.market_condition = "stable"
         self.base_demand = 1000  # Demanda base inicial
 
     def simulate_market(self):
-        conditions = ["weak", "stable", "strong"]
-        self.market_condition = random.choice(conditions)
+        self.market_condition = self.rng.choice(self.CONDITIONS)
         
         # Ajusta a demanda base com base na condição do mercado
         if self.market_condition == "weak":
-            self.base_demand = max(800, self.base_demand - random.randint(50, 200))
+            self.base_demand = max(self.MIN_BASE_DEMAND, self.base_demand - self.rng.randint(*self.DEMAND_SHIFT))
         elif self.market_condition == "strong":
-            self.base_demand = min(1200, self.base_demand + random.randint(50, 200))
+            self.base_demand = min(self.MAX_BASE_DEMAND, self.base_demand + self.rng.randint(*self.DEMAND_SHIFT))
         else:
-            self.base_demand = max(800, min(1200, self.base_demand + random.randint(-50, 50)))
+            self.base_demand = max(self.MIN_BASE_DEMAND, min(self.MAX_BASE_DEMAND, self.base_demand + self.rng.randint(*self.STABLE_DRIFT)))
 
     def calculate_base_demand(self):
         return self.base_demand
 
     def get_market_multiplier(self):
-        if self.market_condition == "weak":
-            return random.uniform(0.8, 1.0)
-        elif self.market_condition == "strong":
-            return random.uniform(1.0, 1.2)
-        else:
-            return random.uniform(0.9, 1.1)
+        return self.rng.uniform(*self.MULTIPLIER_RANGES[self.market_condition])
 
     def calculate_demand(self, price, marketing):
         base_demand = self.calculate_base_demand()
-        price_effect = max(0, 1 - (price / 100))
-        marketing_effect = min(2, 1 + (marketing / 10000))
         market_multiplier = self.get_market_multiplier()
         
-        return int(base_demand * price_effect * marketing_effect * market_multiplier)
+        return int(demand(base_demand, price, marketing, market_multiplier))
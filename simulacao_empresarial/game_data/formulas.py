@@ -0,0 +1,35 @@
+import numpy as np
+
+# Fórmulas do jogo escritas com NumPy: aceitam tanto escalares quanto arrays,
+# de modo que o motor escalar e os motores vetorizados usem as mesmas regras.
+
+PRODUCTION_COST_PER_UNIT = 50
+
+
+def price_effect(price):
+    return np.maximum(0, 1 - np.asarray(price) / 100)
+
+
+def marketing_effect(marketing):
+    return np.minimum(2, 1 + np.asarray(marketing) / 10000)
+
+
+def research_effect(research):
+    return np.minimum(2, 1 + np.asarray(research) / 5000)
+
+
+def demand(base_demand, price, marketing, market_multiplier):
+    # Equivale a int(...) aplicado elemento a elemento
+    return np.trunc(base_demand * price_effect(price) * marketing_effect(marketing) * market_multiplier)
+
+
+def total_costs(production, marketing, research, donations):
+    return np.asarray(production) * PRODUCTION_COST_PER_UNIT + marketing + research + donations
+
+
+def market_share_influence(price, marketing, research):
+    return np.asarray(marketing) / 10000 - np.asarray(price) / 100 + np.asarray(research) / 5000
+
+
+def update_market_share(market_share, price, marketing, research):
+    return np.clip(market_share + market_share_influence(price, marketing, research), 0, 100)
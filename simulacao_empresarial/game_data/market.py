@@ -0,0 +1,57 @@
+import numpy as np
+from .formulas import marketing_effect, price_effect, research_effect
+
+
+def attractiveness(price, marketing, research=0):
+    # Atratividade relativa de cada empresa: mesmos efeitos de preço e marketing da demanda individual
+    return price_effect(price) * marketing_effect(marketing) * research_effect(research)
+
+
+def market_demand(base_demand, market_multiplier, price, marketing):
+    # Tamanho do mercado: demanda base ajustada pelo preço e marketing médios das empresas (último eixo)
+    effect = (price_effect(price) * marketing_effect(marketing)).mean(axis=-1)
+    return np.trunc(np.asarray(base_demand) * market_multiplier * effect)
+
+
+def apportion(total, weights):
+    """Divide totais inteiros proporcionalmente aos pesos (maiores restos), ao longo do último eixo."""
+    weights = np.asarray(weights, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    n_firms = weights.shape[-1]
+    weight_sum = weights.sum(axis=-1, keepdims=True)
+    safe_sum = np.where(weight_sum > 0, weight_sum, 1)
+    share = np.where(weight_sum > 0, weights / safe_sum, 1 / n_firms)
+
+    exact = total[..., None] * share
+    allocated = np.floor(exact)
+    missing = total - allocated.sum(axis=-1)
+    # As unidades que sobraram do arredondamento vão para os maiores restos
+    ranks = np.argsort(allocated - exact, axis=-1, kind="stable").argsort(axis=-1, kind="stable")
+    return allocated + (ranks < missing[..., None]), share
+
+
+def clear_market(total_demand, price, production, marketing, research=0, spillover=True):
+    """Reparte a demanda total entre N empresas e aplica o limite de produção de cada uma.
+
+    Aceita arrays (n_empresas,) ou (n_mercados, n_empresas); total_demand tem um valor por mercado.
+    """
+    price, production, marketing, research = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (price, production, marketing, research))
+    )
+    weights = attractiveness(price, marketing, research)
+    firm_demand, share = apportion(total_demand, weights)
+    sales = np.minimum(firm_demand, production)
+
+    unmet = (firm_demand - sales).sum(axis=-1)
+    spare = production - sales
+    if spillover and np.any(unmet > 0) and np.any(spare > 0):
+        # Uma rodada de realocação: a demanda não atendida migra para quem ainda tem estoque
+        extra, _ = apportion(unmet, np.where(spare > 0, weights, 0))
+        sales = sales + np.minimum(extra, spare)
+
+    return {
+        "share": share,
+        "demand": firm_demand,
+        "sales": sales,
+        "unmet_demand": np.asarray(total_demand) - sales.sum(axis=-1),
+    }
@@ -0,0 +1,99 @@
+import numpy as np
+from .economy import Economy
+from .formulas import demand, total_costs, update_market_share
+
+
+class MarketMonteCarlo:
+    """Simula N trajetórias independentes do mercado em lote com NumPy."""
+
+    DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+    def __init__(self, base_demand=1000, seed=None):
+        self.base_demand = base_demand
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_economy(cls, economy, seed=None):
+        return cls(base_demand=economy.base_demand, seed=seed)
+
+    def simulate_paths(self, n_paths, n_quarters):
+        # Mesmas regras de Economy.simulate_market / get_market_multiplier /
+        # calculate_demand, sorteadas de uma vez para todos os caminhos
+        rng = self.rng
+        shape = (n_quarters, n_paths)
+        conditions = rng.integers(0, len(Economy.CONDITIONS), size=shape, dtype=np.int8)
+        shifts = rng.integers(Economy.DEMAND_SHIFT[0], Economy.DEMAND_SHIFT[1] + 1, size=shape)
+        drifts = rng.integers(Economy.STABLE_DRIFT[0], Economy.STABLE_DRIFT[1] + 1, size=shape)
+
+        weak = Economy.CONDITIONS.index("weak")
+        strong = Economy.CONDITIONS.index("strong")
+        steps = np.where(conditions == weak, -shifts, np.where(conditions == strong, shifts, drifts))
+
+        base_demand = np.empty(shape, dtype=np.float64)
+        current = np.full(n_paths, self.base_demand, dtype=np.float64)
+        for quarter in range(n_quarters):
+            current = np.clip(current + steps[quarter], Economy.MIN_BASE_DEMAND, Economy.MAX_BASE_DEMAND)
+            base_demand[quarter] = current
+
+        low = np.array([Economy.MULTIPLIER_RANGES[c][0] for c in Economy.CONDITIONS])[conditions]
+        high = np.array([Economy.MULTIPLIER_RANGES[c][1] for c in Economy.CONDITIONS])[conditions]
+        # Dois sorteios por trimestre, como em GameManager.play_quarter:
+        # um para a demanda total do mercado e outro dentro de calculate_demand
+        market_multiplier = rng.uniform(low, high)
+        demand_multiplier = rng.uniform(low, high)
+
+        return {
+            "conditions": conditions,
+            "base_demand": base_demand,
+            "market_multiplier": market_multiplier,
+            "demand_multiplier": demand_multiplier,
+        }
+
+    def simulate_outcomes(self, price, production, marketing, research=0, donations=0,
+                          market_share=50, n_paths=100_000, n_quarters=4):
+        # Decisões podem ser escalares ou sequências com um valor por trimestre
+        price, production, marketing, research, donations = (
+            np.broadcast_to(np.asarray(value, dtype=np.float64), (n_quarters,))
+            for value in (price, production, marketing, research, donations)
+        )
+        paths = self.simulate_paths(n_paths, n_quarters)
+
+        # A participação de mercado evolui de forma determinística com as decisões
+        shares = np.empty(n_quarters)
+        share = market_share
+        for quarter in range(n_quarters):
+            shares[quarter] = share
+            share = update_market_share(share, price[quarter], marketing[quarter], research[quarter])
+
+        column = (slice(None), None)
+        total_market_demand = np.trunc(paths["base_demand"] * paths["market_multiplier"])
+        player_demand = demand(paths["base_demand"], price[column], marketing[column], paths["demand_multiplier"])
+        player_demand = np.trunc(player_demand * (shares[column] / 100))
+        sales = np.minimum(player_demand, production[column])
+        revenue = sales * price[column]
+        costs = total_costs(production, marketing, research, donations)[column]
+        profit = revenue - costs
+
+        return {
+            "market_share": shares,
+            "total_market_demand": total_market_demand,
+            "demand": sales,
+            "revenue": revenue,
+            "profit": profit,
+            "cumulative_profit": np.cumsum(profit, axis=0),
+        }
+
+    def outcome_bands(self, price, production, marketing, research=0, donations=0,
+                      market_share=50, n_paths=100_000, n_quarters=4, percentiles=DEFAULT_PERCENTILES):
+        outcomes = self.simulate_outcomes(price, production, marketing, research, donations,
+                                          market_share, n_paths, n_quarters)
+        bands = {
+            "quarters": list(range(1, n_quarters + 1)),
+            "percentiles": list(percentiles),
+            "market_share": outcomes["market_share"].tolist(),
+        }
+        for key in ("total_market_demand", "demand", "profit", "cumulative_profit"):
+            values = np.percentile(outcomes[key], percentiles, axis=1)
+            bands[key] = {p: row.tolist() for p, row in zip(percentiles, values)}
+        bands["probability_of_loss"] = (outcomes["profit"] < 0).mean(axis=1).tolist()
+        return bands
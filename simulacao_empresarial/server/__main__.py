@@ -0,0 +1,21 @@
+import argparse
+import logging
+import os
+
+from .http_api import run_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor headless do Simulador Empresarial")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "WARNING"),
+                        help="Nível de log (DEBUG inclui o razão completo a cada trimestre)")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run_server(args.host, args.port, args.max_sessions)
+
+
+if __name__ == "__main__":
+    main()
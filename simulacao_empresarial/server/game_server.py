@@ -0,0 +1,120 @@
+import asyncio
+import math
+import time
+import uuid
+
+from ai_agents.game_manager import GameManager
+from utils.metrics import get_registry
+
+
+class GameSession:
+    def __init__(self, session_id, kind, game):
+        self.session_id = session_id
+        self.kind = kind
+        self.game = game
+        # Um trimestre por vez em cada jogo; jogos diferentes rodam em paralelo
+        self.lock = asyncio.Lock()
+        self.created_at = time.time()
+        self.quarters_played = 0
+
+
+class GameServer:
+    """Hospeda vários jogos (GameManager ou GameManagerAgent) em um único processo asyncio."""
+
+    KINDS = ("engine", "agent")
+    # Decisões aceitas pela API, na ordem dos argumentos de GameManager.play_quarter
+    DECISIONS = ("price", "production", "marketing", "capacity_investment", "research_development",
+                 "charitable_giving")
+
+    def __init__(self, max_sessions=1000):
+        self.max_sessions = max_sessions
+        self.sessions = {}
+
+    def create_session(self, kind="engine", player_name="Jogador"):
+        if kind not in self.KINDS:
+            raise ValueError(f"Tipo de jogo desconhecido: {kind}")
+        if len(self.sessions) >= self.max_sessions:
+            raise RuntimeError("Limite de sessões simultâneas atingido")
+
+        game_class = self._game_class(kind)
+        session_id = uuid.uuid4().hex
+        # No modo "agent", o id da sessão identifica o jogo no razão em banco
+        game = game_class(player_name) if kind == "engine" else game_class(session_id)
+
+        self.sessions[session_id] = GameSession(session_id, kind, game)
+        return session_id
+
+    def _game_class(self, kind):
+        if kind == "engine":
+            return GameManager
+        # Importado sob demanda: o modo "engine" não depende do LangChain
+        from agents.game_manager_agent import GameManagerAgent, require_api_key
+        try:
+            require_api_key()
+        except ValueError as e:
+            # Falta de configuração do servidor, não erro de quem chamou
+            raise RuntimeError(str(e)) from e
+        return GameManagerAgent
+
+    def export_session(self, session_id):
+        # Snapshot binário da sessão, para retomar após reinício ou em outro processo
+        return self.get_session(session_id).game.snapshot()
+
+    def import_session(self, kind, data, session_id=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Tipo de jogo desconhecido: {kind}")
+        if len(self.sessions) >= self.max_sessions:
+            raise RuntimeError("Limite de sessões simultâneas atingido")
+        session_id = session_id or uuid.uuid4().hex
+        game_class = self._game_class(kind)
+        game = game_class.restore(data) if kind == "engine" else game_class.restore(data, session_id)
+        session = GameSession(session_id, kind, game)
+        session.quarters_played = len(game.history)
+        self.sessions[session_id] = session
+        return session_id
+
+    def get_session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Sessão não encontrada: {session_id}")
+        return session
+
+    def close_session(self, session_id):
+        self.sessions.pop(session_id, None)
+
+    def parse_decisions(self, decisions):
+        # Valida as decisões recebidas antes de tocar no jogo (TypeError/ValueError viram 400 na API)
+        if not isinstance(decisions, dict):
+            raise TypeError("As decisões devem ser um objeto JSON")
+        parsed = {}
+        for name in self.DECISIONS:
+            value = decisions.get(name, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise TypeError(f"Decisão '{name}' deve ser numérica, recebido: {value!r}")
+            if not math.isfinite(value) or value < 0:
+                raise ValueError(f"Decisão '{name}' deve ser um número finito e não negativo")
+            parsed[name] = value
+        return parsed
+
+    async def submit_decisions(self, session_id, decisions):
+        session = self.get_session(session_id)
+        decisions = self.parse_decisions(decisions)
+        async with session.lock:
+            with get_registry().timer("session_quarter_seconds", kind=session.kind):
+                if session.kind == "engine":
+                    # Motor determinístico e barato: roda direto no event loop
+                    result = session.game.play_quarter(*(decisions[name] for name in self.DECISIONS))
+                else:
+                    result = await session.game.arun_game(decisions)
+                    if isinstance(result, str):
+                        raise RuntimeError(result)
+            session.quarters_played += 1
+            return result
+
+    def describe(self, session_id):
+        session = self.get_session(session_id)
+        return {
+            "session_id": session.session_id,
+            "kind": session.kind,
+            "quarters_played": session.quarters_played,
+        }
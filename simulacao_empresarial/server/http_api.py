@@ -0,0 +1,98 @@
+import json
+
+from aiohttp import web
+
+from utils.helpers import to_jsonable
+from utils.metrics import get_registry
+from .game_server import GameServer
+
+
+async def read_json(request, default=None):
+    # Corpo JSON malformado ou que não é um objeto: erro do cliente
+    if default is not None and not request.can_read_body:
+        return default
+    try:
+        body = await request.json()
+    except json.JSONDecodeError as e:
+        raise web.HTTPBadRequest(text=f"JSON inválido: {e}")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="O corpo da requisição deve ser um objeto JSON")
+    return body
+
+
+def create_app(game_server=None):
+    game_server = game_server or GameServer()
+    routes = web.RouteTableDef()
+
+    @routes.get('/health')
+    async def health(request):
+        return web.json_response({"status": "ok", "sessions": len(game_server.sessions)})
+
+    @routes.get('/metrics')
+    async def metrics(request):
+        # Formato de texto do Prometheus
+        return web.Response(text=get_registry().to_prometheus(), content_type='text/plain')
+
+    @routes.post('/sessions')
+    async def create_session(request):
+        body = await read_json(request, default={})
+        try:
+            session_id = game_server.create_session(body.get('kind', 'engine'), body.get('player_name', 'Jogador'))
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        except RuntimeError as e:
+            raise web.HTTPServiceUnavailable(text=str(e))
+        return web.json_response({"session_id": session_id}, status=201)
+
+    @routes.get('/sessions/{session_id}')
+    async def describe_session(request):
+        try:
+            return web.json_response(game_server.describe(request.match_info['session_id']))
+        except KeyError as e:
+            raise web.HTTPNotFound(text=str(e))
+
+    @routes.post('/sessions/{session_id}/quarters')
+    async def play_quarter(request):
+        decisions = await read_json(request)
+        try:
+            result = await game_server.submit_decisions(request.match_info['session_id'], decisions)
+        except KeyError as e:
+            raise web.HTTPNotFound(text=str(e))
+        except (TypeError, ValueError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        except RuntimeError as e:
+            raise web.HTTPInternalServerError(text=str(e))
+        return web.json_response(to_jsonable(result))
+
+    @routes.get('/sessions/{session_id}/snapshot')
+    async def export_session(request):
+        try:
+            data = game_server.export_session(request.match_info['session_id'])
+        except KeyError as e:
+            raise web.HTTPNotFound(text=str(e))
+        return web.Response(body=data, content_type='application/octet-stream')
+
+    @routes.post('/sessions/restore/{kind}')
+    async def import_session(request):
+        try:
+            session_id = game_server.import_session(request.match_info['kind'], await request.read())
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            # Snapshot corrompido ou com estrutura inesperada: erro do cliente
+            raise web.HTTPBadRequest(text=str(e))
+        except RuntimeError as e:
+            raise web.HTTPServiceUnavailable(text=str(e))
+        return web.json_response({"session_id": session_id}, status=201)
+
+    @routes.delete('/sessions/{session_id}')
+    async def close_session(request):
+        game_server.close_session(request.match_info['session_id'])
+        return web.Response(status=204)
+
+    app = web.Application()
+    app['game_server'] = game_server
+    app.add_routes(routes)
+    return app
+
+
+def run_server(host='127.0.0.1', port=8080, max_sessions=1000):
+    web.run_app(create_app(GameServer(max_sessions=max_sessions)), host=host, port=port)
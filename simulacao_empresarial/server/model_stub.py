@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+
+class ModelStub:
+    """Imita /v1/chat/completions da OpenAI com latência e taxa de erros configuráveis, para testes locais."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def reply(self, body):
+        messages = body.get('messages') or [{}]
+        prompt = str(messages[-1].get('content', ''))
+        return f"Resposta simulada ({len(prompt)} caracteres de prompt): {prompt[:80]}"
+
+    def stats(self):
+        return {"requests": self.requests, "errors": self.errors,
+                "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.rng.random() < self.error_rate:
+                self.errors += 1
+                return web.json_response(
+                    {"error": {"message": "Limite de taxa simulado", "type": "rate_limit_error"}},
+                    status=429, headers={"retry-after": "0"})
+            content = self.reply(body)
+            if body.get('stream'):
+                return await self._stream(request, body, content)
+            prompt_tokens = sum(len(str(m.get('content', ''))) for m in body.get('messages', [])) // 4
+            completion_tokens = len(content) // 4
+            return web.json_response({
+                "id": f"chatcmpl-stub-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get('model', 'stub'),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+        finally:
+            self.in_flight -= 1
+
+    async def _stream(self, request, body, content):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i, word in enumerate(content.split(" ")):
+            chunk = {
+                "id": f"chatcmpl-stub-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get('model', 'stub'),
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                             "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+def create_app(stub=None):
+    stub = stub or ModelStub()
+    app = web.Application()
+    app['stub'] = stub
+
+    async def stats(request):
+        return web.json_response(stub.stats())
+
+    app.router.add_post('/v1/chat/completions', stub.chat_completions)
+    app.router.add_get('/stats', stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint local que imita a API de chat da OpenAI (use com OPENAI_BASE_URL)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Segundos por resposta")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    print(f"Modelo simulado em http://{args.host}:{args.port}/v1")
+    web.run_app(create_app(ModelStub(args.latency, args.error_rate, args.seed)), host=args.host, port=args.port,
+                print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import pytest
+
+from agents import sql_journal
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def ledger_backend(request, monkeypatch):
+    # Testes de razão rodam nos dois backends; o SQLite fica em memória e é descartado ao fim de cada teste
+    monkeypatch.setenv("LEDGER_BACKEND", request.param)
+    monkeypatch.setenv("LEDGER_DATABASE_URL", "sqlite://")
+    monkeypatch.setenv("MODEL_BACKEND", "offline")
+    yield request.param
+    sql_journal.clear()
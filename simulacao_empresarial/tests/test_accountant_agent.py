@@ -0,0 +1,84 @@
+# Testes para o fechamento dos trimestres e a conciliação dos demonstrativos (agents/accountant_agent.py)
+import pytest
+
+from agents.game_manager_agent import GameManagerAgent
+
+# Trimestres com lucro, prejuízo e sem produção
+DECISIONS = [
+    {'production': 1000, 'price': 50, 'marketing': 5000},
+    {'production': 2000, 'price': 12, 'marketing': 20000, 'research_development': 3000},
+    {'production': 0, 'price': 40, 'marketing': 1000, 'charitable_giving': 500},
+    {'production': 3000, 'price': 30, 'marketing': 8000},
+]
+
+
+def play(manager, decisions):
+    for quarter_decisions in decisions:
+        result = manager.run_game(quarter_decisions)
+        assert isinstance(result, dict), result
+
+
+def statements(manager):
+    return [manager.history.row_financials(i) for i in range(len(manager.history))]
+
+
+def assert_reconciled(manager):
+    previous_cash = 100000
+    for quarter, report in enumerate(statements(manager), start=1):
+        balance_sheet, cash_flow = report['Balance Sheet'], report['Cash Flow']
+        ending_cash = cash_flow['Ending Cash']['Available Cash']
+        assert balance_sheet['Total Assets'] == pytest.approx(balance_sheet['Total Liabilities + Equity'])
+        assert cash_flow['Beginning Cash'] == pytest.approx(previous_cash)
+        assert cash_flow['Net Profit'] == pytest.approx(report['Income Statement']['Net Profit'])
+        # O caixa final do fluxo bate com o saldo de Caixa no razão ao fim do trimestre
+        assert ending_cash == pytest.approx(manager.accountant.get_account_balance('Cash', quarter))
+        previous_cash = ending_cash
+
+
+@pytest.fixture
+def manager(ledger_backend):
+    return GameManagerAgent()
+
+
+def test_quarters_reconcile(manager):
+    play(manager, DECISIONS)
+    reports = statements(manager)
+    assert len(reports) == len(DECISIONS)
+    assert_reconciled(manager)
+    net_profits = [report['Income Statement']['Net Profit'] for report in reports]
+    assert min(net_profits) < 0 < max(net_profits)
+    accountant = manager.accountant
+    assert accountant.journal.checkpoint_dates == [f'Q{q} Close' for q in range(1, 5)]
+    # Depois do fechamento, as contas de resultado estão zeradas e o lucro foi para Lucros Acumulados
+    assert -accountant.get_account_balance('Retained Earnings') == pytest.approx(sum(net_profits))
+    for account in ('Sales', 'COGS', 'Marketing', 'R&D', 'Donations'):
+        assert accountant.get_account_balance(account) == 0
+
+
+def test_past_quarters_keep_their_statements(manager):
+    play(manager, DECISIONS)
+    for quarter, report in enumerate(statements(manager), start=1):
+        regenerated = manager.accountant.generate_financial_statements(quarter)
+        for section in ('Income Statement', 'Cash Flow'):
+            for name, value in report[section].items():
+                if isinstance(value, dict):
+                    continue
+                assert regenerated[section][name] == pytest.approx(value), (quarter, section, name)
+
+
+def test_closed_quarters_stay_closed(manager):
+    play(manager, DECISIONS[:2])
+    with pytest.raises(ValueError, match="encerrado"):
+        manager.accountant.close_quarter(2)
+    with pytest.raises(ValueError, match="encerrado"):
+        manager.process_player_decisions(DECISIONS[0], 1)
+
+
+def test_reopened_game_continues_like_the_original(manager):
+    play(manager, DECISIONS[:2])
+    restored = GameManagerAgent.restore(manager.snapshot())
+    play(manager, DECISIONS[2:])
+    play(restored, DECISIONS[2:])
+    assert restored.game_state['quarter'] == 4
+    assert statements(restored) == statements(manager)
+    assert_reconciled(restored)
@@ -1 +1,76 @@
-# Testes para a classe Company
\ No newline at end of file
+# Testes para a classe Company e a tabela vetorizada CompanyTable (game_data/company_table.py)
+import numpy as np
+import pytest
+
+from game_data.company import Company
+from game_data.company_table import CompanyTable
+
+NAMES = ["A", "B", "C", "D"]
+
+
+def random_quarters(seed, n_quarters=6):
+    rng = np.random.default_rng(seed)
+    for _ in range(n_quarters):
+        yield {
+            'price': rng.uniform(10, 90, len(NAMES)),
+            'production': rng.integers(0, 2000, len(NAMES)).astype(float),
+            'marketing': rng.uniform(0, 10000, len(NAMES)),
+            'capacity_investment': rng.integers(0, 500, len(NAMES)).astype(float),
+            'research': rng.uniform(0, 5000, len(NAMES)),
+            'donations': rng.uniform(0, 1000, len(NAMES)),
+            'demand': rng.integers(0, 2500, len(NAMES)).astype(float),
+        }
+
+
+def test_table_matches_per_company_formulas():
+    table = CompanyTable(NAMES, 10000)
+    companies = [Company(name, 10000) for name in NAMES]
+    for quarter in random_quarters(0):
+        demand = quarter.pop('demand')
+        table.set_decisions(**quarter)
+        profits = table.calculate_profit(demand)
+        for i, company in enumerate(companies):
+            company.set_decisions(**{field: values[i] for field, values in quarter.items()})
+            assert profits[i] == pytest.approx(company.calculate_profit(demand[i]))
+    for field in CompanyTable.FIELDS:
+        assert getattr(table, field) == pytest.approx([getattr(company, field) for company in companies]), field
+
+
+def test_views_behave_like_companies():
+    table = CompanyTable(NAMES, 10000)
+    company = Company("B", 10000)
+    for quarter in random_quarters(1):
+        demand = quarter.pop('demand')
+        decisions = {field: values[1] for field, values in quarter.items()}
+        table[1].set_decisions(**decisions)
+        company.set_decisions(**decisions)
+        assert table[1].calculate_profit(demand[1]) == pytest.approx(company.calculate_profit(demand[1]))
+    view = table[1]
+    assert view.name == "B"
+    assert view.balance == pytest.approx(company.balance)
+    assert view.capacity == pytest.approx(company.capacity)
+    # As outras linhas não são tocadas
+    assert table.balance[[0, 2, 3]].tolist() == [10000] * 3
+    assert table[-1].name == "D"
+    with pytest.raises(IndexError):
+        table[4]
+
+
+def test_scalar_decisions_broadcast():
+    table = CompanyTable(NAMES, 0)
+    table.set_decisions(50, 100, 1000, 10, 0, 0)
+    assert table.price.tolist() == [50] * 4
+    assert table.capacity.tolist() == [1010] * 4
+
+
+def test_state_round_trip():
+    table = CompanyTable(NAMES, 10000)
+    quarter = next(random_quarters(2))
+    table.calculate_profit(quarter.pop('demand'))
+    table.set_decisions(**quarter)
+    restored = CompanyTable.from_state(table.get_state())
+    assert restored.names == NAMES
+    for field in CompanyTable.FIELDS:
+        assert getattr(restored, field).tolist() == getattr(table, field).tolist()
+    records = [{'name': view.name, **{field: getattr(view, field) for field in CompanyTable.FIELDS}} for view in table]
+    assert CompanyTable.from_records(records).get_state()['balance'].tolist() == table.balance.tolist()
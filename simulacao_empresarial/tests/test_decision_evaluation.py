@@ -0,0 +1,46 @@
+# Testes para a avaliação em lote de decisões (game_data/decision_evaluation.py)
+import copy
+
+import numpy as np
+import pytest
+
+from ai_agents.game_manager import GameManager
+from game_data.company import Company
+from game_data.decision_evaluation import decision_grid
+
+
+GRID = decision_grid(price=np.linspace(10, 90, 9), production=[0, 400, 800],
+                     marketing=[0, 2500, 15000], research=[0, 3000])
+
+
+def test_decision_grid_is_cartesian_product():
+    grid = decision_grid(price=[10, 20], marketing=[0, 100, 200])
+    assert grid["price"].tolist() == [10, 10, 10, 20, 20, 20]
+    assert grid["marketing"].tolist() == [0, 100, 200, 0, 100, 200]
+
+
+def test_batch_matches_one_at_a_time():
+    manager = GameManager("Jogador", seed=5)
+    manager.play_quarter(50, 800, 1000, 0, 0, 0)
+    batch = manager.evaluate_decisions(**GRID, donations=100, market_multiplier=1.05)
+    assert len(batch["profit"]) == len(GRID["price"])
+
+    for index in range(len(GRID["price"])):
+        candidate = {name: values[index].item() for name, values in GRID.items()}
+        single = manager.evaluate_decisions(**candidate, donations=100, market_multiplier=1.05)
+        for key, values in batch.items():
+            assert values[index] == pytest.approx(single[key].item()), key
+
+        # E o mesmo lucro que Company.calculate_profit daria jogando a decisão
+        company = copy.deepcopy(manager.company)
+        company.set_decisions(candidate["price"], candidate["production"], candidate["marketing"], 0,
+                              candidate["research"], 100)
+        assert company.calculate_profit(batch["sales"][index]) == pytest.approx(batch["profit"][index])
+
+
+def test_evaluation_does_not_change_the_game():
+    manager = GameManager("Jogador", seed=5)
+    before = manager.snapshot()
+    manager.evaluate_decisions(**GRID)
+    Company("Outra", 10000).evaluate_decisions(500, **GRID)
+    assert manager.snapshot() == before
@@ -1 +1,60 @@
-# Testes para a classe Economy
\ No newline at end of file
+# Testes para a classe Economy e a reprodução de jogos (ai_agents/replay.py)
+from ai_agents.game_manager import GameManager
+from ai_agents.replay import compare_results, generate_records, load_records, replay_game, replay_games, save_records
+from game_data.economy import Economy
+
+
+def economy_path(economy, quarters=20):
+    path = []
+    for _ in range(quarters):
+        economy.simulate_market()
+        path.append((economy.market_condition, economy.base_demand, economy.get_market_multiplier(),
+                     economy.calculate_demand(50, 5000)))
+    return path
+
+
+def test_same_seed_same_economy():
+    assert economy_path(Economy(seed=42)) == economy_path(Economy(seed=42))
+    assert economy_path(Economy(seed=42)) != economy_path(Economy(seed=43))
+
+
+def test_economy_stays_in_range():
+    economy = Economy(seed=1)
+    for condition, base_demand, multiplier, _ in economy_path(economy, 200):
+        assert Economy.MIN_BASE_DEMAND <= base_demand <= Economy.MAX_BASE_DEMAND
+        low, high = Economy.MULTIPLIER_RANGES[condition]
+        assert low <= multiplier <= high
+
+
+def test_unseeded_economy_records_its_seed():
+    economy = Economy()
+    assert economy_path(Economy(seed=economy.seed)) == economy_path(economy)
+
+
+def test_replay_reproduces_recorded_game():
+    game = GameManager("Jogador", seed=7)
+    for price, production in ((50, 1000), (40, 1500), (65, 800), (55, 1200)):
+        game.play_quarter(price, production, 5000, 0, 1000, 100)
+    record = game.get_record()
+    result = replay_game(record)
+    assert not result['diverged'] and result['divergences'] == []
+    assert result['quarters'] == 4
+    assert GameManager.replay(record).history == game.history
+
+
+def test_replay_detects_divergence():
+    record = generate_records(1, n_quarters=3, seed=5)[0]
+    record['results'][1] = dict(record['results'][1], revenue=record['results'][1]['revenue'] + 1)
+    result = replay_game(record)
+    assert result['diverged']
+    assert [(quarter, field) for quarter, field, _, _ in result['divergences']] == [(2, 'revenue')]
+
+
+def test_replay_through_jsonl(tmp_path):
+    records = generate_records(5, n_quarters=4, seed=3)
+    path = tmp_path / "jogos.jsonl"
+    save_records(path, records)
+    results = replay_games(load_records(path), workers=1)
+    assert [result['game_id'] for result in results] == list(range(5))
+    assert not any(result['diverged'] for result in results)
+    assert compare_results(records[0]['results'], records[1]['results'])
@@ -0,0 +1,99 @@
+# Testes para o fluxo de trimestres do GameManagerAgent (modelo offline)
+import asyncio
+import threading
+
+import pytest
+
+from agents.game_manager_agent import GameManagerAgent
+
+DECISIONS = {'production': 1000, 'price': 50, 'marketing': 5000}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setenv("MODEL_BACKEND", "offline")
+    monkeypatch.setenv("LEDGER_BACKEND", "memory")
+    return GameManagerAgent()
+
+
+def test_run_game_closes_quarter(manager):
+    state = manager.run_game(DECISIONS)
+    assert state['quarter'] == 1
+    assert manager.accountant.journal.is_closed('Q1')
+    assert len(manager.history) == 1
+
+
+def test_failed_posting_restores_quarter(manager):
+    manager.run_game(DECISIONS)
+    result = manager.run_game({'production': None})
+    assert isinstance(result, str)
+    assert manager.game_state['quarter'] == 1
+    # O próximo trimestre válido continua em Q2
+    assert manager.run_game(DECISIONS)['quarter'] == 2
+    assert list(manager.history.quarters) == [1, 2]
+
+
+def test_interrupted_stream_keeps_quarter_closed(manager):
+    manager.start_streamed_quarter(DECISIONS)
+    assert manager.accountant.journal.is_closed('Q1')
+    assert len(manager.history) == 1
+    reports, streams = manager.start_streamed_quarter(DECISIONS)
+    texts = {name: "".join(stream) for name, stream in streams.items()}
+    manager.finish_streamed_quarter(reports, texts['economy'], texts['competitors'], texts['analysis'])
+    assert manager.history.texts['economy'] == [None, "Economia estável"]
+    assert manager.game_state['quarter'] == 2
+
+
+def failing_on(quarter, manager, result="Análise ok"):
+    # Falha do modelo (não é tempo limite) depois que as decisões já foram lançadas
+    def analyze(*args):
+        if manager.game_state['quarter'] == quarter:
+            raise RuntimeError("modelo fora do ar")
+        return result
+    return analyze
+
+
+def assert_quarters_separate(manager):
+    assert list(manager.history.quarters) == [1, 2, 3]
+    assert manager.accountant.journal.checkpoint_dates == ['Q1 Close', 'Q2 Close', 'Q3 Close']
+    sales = [manager.history.row_financials(i)['Income Statement']['Sales'] for i in range(3)]
+    assert sales == [50000, 50000, 50000]
+
+
+def test_agent_failure_after_posting_still_closes_quarter(manager, monkeypatch):
+    monkeypatch.setattr(manager.accountant, "analyze_financial_position", failing_on(2, manager))
+    for _ in range(3):
+        assert isinstance(manager.run_game(DECISIONS), dict)
+    assert manager.history.texts['analysis'][1] == "Análise financeira indisponível: modelo fora do ar"
+    assert_quarters_separate(manager)
+
+
+def test_async_agent_failure_after_posting_still_closes_quarter(manager, monkeypatch):
+    analyze = failing_on(2, manager)
+
+    async def aanalyze():
+        return analyze()
+
+    monkeypatch.setattr(manager.accountant, "aanalyze_financial_position", aanalyze)
+    for _ in range(3):
+        assert isinstance(asyncio.run(manager.arun_game(DECISIONS)), dict)
+    assert manager.history.texts['analysis'][1].startswith("Análise financeira indisponível")
+    assert_quarters_separate(manager)
+
+
+def test_async_game_keeps_ledger_off_the_event_loop(ledger_backend, monkeypatch):
+    # Lançamentos, relatórios, contexto e fechamento não podem rodar na thread do event loop
+    manager = GameManagerAgent()
+    journal = manager.accountant.journal
+    threads = set()
+    for name in ("post", "checkpoint", "balance", "totals", "trial_balance", "period_balances"):
+        method = getattr(journal, name)
+
+        def recorded(*args, _method=method, **kwargs):
+            threads.add(threading.current_thread())
+            return _method(*args, **kwargs)
+        monkeypatch.setattr(journal, name, recorded)
+
+    assert isinstance(asyncio.run(manager.arun_game(DECISIONS)), dict)
+    assert journal.checkpoint_dates == ['Q1 Close']
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,53 @@
+# Testes para a API HTTP do servidor de jogos (server/http_api.py)
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from server.http_api import create_app
+
+
+def request(method, path, **kwargs):
+    # Uma requisição contra o app em um servidor de teste; devolve (status, corpo em texto)
+    async def run():
+        async with TestClient(TestServer(create_app())) as client:
+            if path.startswith("/sessions/{id}"):
+                response = await client.post("/sessions", json={"kind": "engine"})
+                session_id = (await response.json())["session_id"]
+                full_path = path.replace("{id}", session_id)
+            else:
+                full_path = path
+            response = await client.request(method, full_path, **kwargs)
+            return response.status, await response.text()
+    return asyncio.run(run())
+
+
+def test_play_quarter():
+    status, _ = request("POST", "/sessions/{id}/quarters", json={"price": 50, "production": 1000})
+    assert status == 200
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"data": "{not json", "headers": {"Content-Type": "application/json"}},
+    {"json": [1, 2, 3]},
+    {"json": {"price": "barato"}},
+    {"json": {"production": None}},
+    {"json": {"marketing": -5}},
+    {"json": {"price": 1e400}},
+])
+def test_bad_decisions_are_client_errors(kwargs):
+    status, _ = request("POST", "/sessions/{id}/quarters", **kwargs)
+    assert status == 400
+
+
+def test_bad_session_body_is_client_error():
+    assert request("POST", "/sessions", data="{", headers={"Content-Type": "application/json"})[0] == 400
+    assert request("POST", "/sessions", json={"kind": "xadrez"})[0] == 400
+
+
+def test_missing_api_key_is_server_error(monkeypatch):
+    monkeypatch.setenv("MODEL_BACKEND", "openai")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    status, text = request("POST", "/sessions", json={"kind": "agent"})
+    assert status == 503
+    assert "OPENAI_API_KEY" in text
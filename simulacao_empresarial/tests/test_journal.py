@@ -0,0 +1,135 @@
+# Testes para o razão contábil (agents/journal.py e agents/sql_journal.py)
+import pytest
+
+from agents.journal import Journal, JournalEntry, closing_period, create_journal, journal_from_state
+
+
+def opening_entry():
+    return (JournalEntry('Initial')
+            .debit('Cash', 100000, 'Initial cash balance')
+            .credit('Capital', 100000, 'Initial capital'))
+
+
+def quarter_entry(quarter, sales, costs):
+    return (JournalEntry(f'Q{quarter}')
+            .debit('Cash', sales, 'Cash from sales')
+            .credit('Sales', sales, 'Revenue from sales')
+            .debit('COGS', costs, 'Cost of goods sold')
+            .credit('Cash', costs, 'Payment for production costs'))
+
+
+def close(journal, quarter):
+    # Mesmo fechamento do AccountantAgent, reduzido a vendas e custos
+    label = f'Q{quarter}'
+    sales = -journal.balance('Sales', through=label)
+    costs = journal.balance('COGS', through=label)
+    entry = (JournalEntry(closing_period(label))
+             .debit('Sales', sales, 'Closing entry')
+             .credit('COGS', costs, 'Closing entry')
+             .credit('Retained Earnings', sales - costs, 'Net profit for the period'))
+    journal.post(entry)
+    journal.checkpoint(entry.date)
+
+
+@pytest.fixture
+def journal(ledger_backend):
+    journal = create_journal()
+    journal.post(opening_entry())
+    return journal
+
+
+def test_post_and_balances(journal):
+    journal.post(quarter_entry(1, 5000, 2000))
+    assert len(journal) == 6
+    assert journal.balance('Cash') == 103000
+    assert journal.balance('Cash', through='Initial') == 100000
+    assert journal.totals('Cash') == (105000, 2000)
+    assert journal.period_balance('Sales', 'Q1') == -5000
+    assert journal.balance('Unknown') == 0
+    trial_balance = journal.trial_balance()
+    assert sum(trial_balance.values()) == pytest.approx(0)
+    assert trial_balance['Capital'] == -100000
+
+
+def test_append_single_lines(journal):
+    journal.append('Q1', 'Cash', 10, 0, 'Depósito')
+    journal.append('Q1', 'Capital', 0, 10, 'Aporte')
+    assert journal.balance('Cash', through='Q1') == 100010
+    assert journal.period_balance('Capital', 'Q1') == -10
+
+
+@pytest.mark.parametrize("entry", [
+    JournalEntry('Q1').debit('Cash', 10, 'x').credit('Sales', 9, 'y'),
+    JournalEntry('Q1').debit('Cash', -10, 'x').credit('Sales', -10, 'y'),
+    JournalEntry('Q1').debit('Cash', float('nan'), 'x').credit('Sales', 10, 'y'),
+    JournalEntry('Q1'),
+    JournalEntry('Q1').debit('Cash', None, 'x').credit('Sales', 10, 'y'),
+    # Diferença de 5 em um milhão: pequena em termos relativos, mas o razão ficaria desbalanceado
+    JournalEntry('Q1').debit('Cash', 1000000, 'x').credit('Sales', 999995, 'y'),
+    JournalEntry('Q1').debit('Cash', 1000000.01, 'x').credit('Sales', 1000000, 'y'),
+])
+def test_invalid_entries_post_nothing(journal, entry):
+    with pytest.raises(ValueError):
+        journal.post(entry)
+    assert len(journal) == 2
+    assert journal.balance('Cash') == 100000
+
+
+def test_cent_rounding_is_accepted(journal):
+    journal.post(JournalEntry('Q1').debit('Cash', 0.1, 'x').debit('Cash', 0.2, 'x').credit('Sales', 0.3, 'y'))
+    assert journal.balance('Sales') == pytest.approx(-0.3)
+
+
+def test_unknown_period(journal):
+    with pytest.raises(ValueError):
+        journal.balance('Cash', through='Q9')
+
+
+def test_checkpoints_and_opening_balances(journal):
+    journal.post(quarter_entry(1, 5000, 2000))
+    close(journal, 1)
+    journal.post(quarter_entry(2, 7000, 3000))
+    close(journal, 2)
+    journal.post(quarter_entry(3, 1000, 4000))
+
+    assert journal.checkpoint_dates == ['Q1 Close', 'Q2 Close']
+    assert journal.opening_balance('Cash', 'Q1') == 100000
+    assert journal.opening_balance('Cash', 'Q2') == 103000
+    assert journal.opening_balance('Cash', 'Q3') == 107000
+    # Contas de resultado zeradas no fechamento; o lucro acumulado fica em Lucros Acumulados
+    assert journal.balance('Sales', through='Q2 Close') == 0
+    assert journal.balance('Retained Earnings', through='Q2 Close') == -7000
+    assert journal.balance('Sales', through='Q3') == -1000
+    assert journal.balance('Cash') == 104000
+    assert journal.trial_balance(through='Q1')['Cash'] == 103000
+
+
+def test_closed_periods_reject_postings(journal):
+    journal.post(quarter_entry(1, 5000, 2000))
+    close(journal, 1)
+    assert journal.is_closed('Q1') and journal.is_closed('Q1 Close')
+    assert not journal.is_closed('Q2')
+    with pytest.raises(ValueError, match="encerrado"):
+        journal.post(quarter_entry(1, 10, 10))
+    with pytest.raises(ValueError, match="encerrado"):
+        journal.append('Initial', 'Cash', 1, 0, 'x')
+    with pytest.raises(ValueError, match="encerrado"):
+        journal.checkpoint('Q1')
+    assert journal.checkpoint_dates == ['Q1 Close']
+    journal.post(quarter_entry(2, 10, 10))
+    assert journal.balance('Cash') == 103000
+
+
+def test_state_round_trip(journal):
+    journal.post(quarter_entry(1, 5000, 2000))
+    close(journal, 1)
+    journal.post(quarter_entry(2, 7000, 3000))
+    restored = journal_from_state(journal.get_state())
+    assert restored.checkpoint_dates == journal.checkpoint_dates
+    for date in journal.dates:
+        assert restored.trial_balance(through=date) == journal.trial_balance(through=date)
+    assert restored.to_dataframe().equals(journal.to_dataframe())
+    # O estado é o mesmo nos dois backends
+    memory = Journal.from_state(journal.get_state())
+    assert memory.trial_balance() == journal.trial_balance()
+    assert memory.period_balances().tolist() == journal.period_balances().tolist()
@@ -0,0 +1,119 @@
+# Testes para os indicadores locais (agents/kpi.py)
+import math
+
+import pytest
+
+from agents.kpi import KPITable, match_intents
+from agents.quarter_history import QuarterHistory
+
+
+def financials(sales, net_profit, beginning_cash, cash, gross_margin=None, utilization=80.0, inventory=100.0):
+    return {
+        'Income Statement': {
+            'Sales': sales,
+            'Gross Margin': sales * 0.4 if gross_margin is None else gross_margin,
+            'Net Profit': net_profit,
+            'Marketing': sales * 0.1,
+        },
+        'Cash Flow': {
+            'Beginning Cash': beginning_cash,
+            'Ending Cash': {'Available Cash': cash},
+        },
+        'Production and Marketing Report': {
+            'Production': {'Production': 1000, 'Capacity Utilization': utilization, 'Inventory': inventory},
+        },
+    }
+
+
+def make_history(*quarters):
+    history = QuarterHistory()
+    for number, data in enumerate(quarters, start=1):
+        history.append(number, data)
+    return history
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Qual foi a variação das vendas?", ['change']),
+    ("Como está a margem bruta?", ['margin']),
+    ("How much cash is left?", ['cash']),
+    ("Qual o fôlego de caixa?", ['cash']),
+    ("Utilização da capacidade?", ['capacity']),
+    ("Quais foram as vendas?", ['sales']),
+    ("Tivemos prejuízo?", ['profit']),
+    ("vendas e lucro do trimestre", ['sales']),
+    ("o que mudou no lucro?", ['change']),
+])
+def test_match_intents(question, expected):
+    assert match_intents(question) == expected
+
+
+@pytest.mark.parametrize("question", [
+    "What is the exchange rate?",
+    "Show me the glossary",
+    "Por que o lucro caiu?",
+    "Que estratégia devo seguir para as vendas?",
+    "Quem é o presidente?",
+])
+def test_match_intents_without_local_answer(question):
+    assert match_intents(question) == []
+
+
+def test_kpi_values_and_summary():
+    history = make_history(
+        financials(1000.0, 100.0, 5000.0, 4000.0),
+        financials(1200.0, 150.0, 4000.0, 3000.0),
+    )
+    kpis = KPITable(history)
+    latest = kpis.latest()
+    assert latest['quarter'] == 2
+    assert latest['gross_margin_pct'] == pytest.approx(40.0)
+    assert latest['net_margin_pct'] == pytest.approx(12.5)
+    assert latest['sales_change_pct'] == pytest.approx(20.0)
+    assert latest['cash_burn'] == pytest.approx(1000.0)
+    assert math.isnan(kpis.values()['sales_change_pct'][0])
+    # Queima média de 1000 por trimestre com 3000 em caixa
+    assert kpis.summary()['runway_quarters'] == pytest.approx(3.0)
+
+
+def test_kpi_recomputes_after_new_quarter():
+    history = make_history(financials(1000.0, 100.0, 5000.0, 5500.0))
+    kpis = KPITable(history)
+    assert kpis.runway() is None
+    assert kpis.summary()['quarter'] == 1
+    history.append(2, financials(500.0, -50.0, 5500.0, 5000.0))
+    assert kpis.summary()['quarter'] == 2
+    assert kpis.latest()['net_profit'] == -50.0
+
+
+def test_kpi_zero_sales_gives_nan_margin():
+    kpis = KPITable(make_history(financials(0.0, -10.0, 100.0, 90.0, gross_margin=0.0)))
+    assert math.isnan(kpis.latest()['gross_margin_pct'])
+    assert "n/d" in kpis.answer("margem")['text']
+
+
+def test_answer_uses_first_intent_only():
+    kpis = KPITable(make_history(
+        financials(1000.0, 100.0, 5000.0, 4000.0),
+        financials(1200.0, 150.0, 4000.0, 3000.0),
+    ))
+    answer = kpis.answer("variação das vendas")
+    assert answer['intents'] == ['change']
+    assert answer['text'].startswith("Em relação ao trimestre anterior: vendas +20,0%")
+    assert "\n" not in answer['text']
+
+
+def test_answer_cash_runway_in_pt_br():
+    kpis = KPITable(make_history(
+        financials(1000.0, 100.0, 20000.0, 19000.0),
+        financials(1000.0, 100.0, 19000.0, 18400.0),
+    ))
+    text = kpis.answer("caixa")['text']
+    # Queima média de 800 com 18.400 em caixa: 23 trimestres
+    assert "Caixa disponível de 18.400,00" in text
+    assert "cerca de 23,0 trimestres" in text
+
+
+def test_answer_without_quarters_and_open_questions():
+    kpis = KPITable(QuarterHistory())
+    assert kpis.answer("margem")['text'].startswith("Ainda não há trimestres")
+    assert kpis.answer("Por que a margem caiu?") is None
@@ -0,0 +1,57 @@
+# Testes para o resumo do razão enviado ao contador (agents/ledger_context.py)
+import pytest
+
+from agents.journal import JournalEntry, closing_period, create_journal
+from agents.ledger_context import LedgerContextBuilder, count_tokens
+
+
+def long_journal(n_quarters):
+    journal = create_journal()
+    journal.post(JournalEntry('Initial').debit('Cash', 100000, 'Initial cash').credit('Capital', 100000, 'Initial capital'))
+    for quarter in range(1, n_quarters + 1):
+        sales, costs = 1000.0 + quarter, 400.0 + quarter
+        label = f'Q{quarter}'
+        journal.post(JournalEntry(label)
+                     .debit('Cash', sales, 'Cash from sales').credit('Sales', sales, 'Revenue from sales')
+                     .debit('COGS', costs, 'Cost of goods sold').credit('Cash', costs, 'Payment for production'))
+        journal.post(JournalEntry(closing_period(label))
+                     .debit('Sales', sales, 'Closing entry').credit('COGS', costs, 'Closing entry')
+                     .credit('Retained Earnings', sales - costs, 'Net profit for the period'))
+    return journal
+
+
+def test_context_stays_bounded_in_long_games(ledger_backend):
+    builder = LedgerContextBuilder()
+    sizes = {}
+    for n_quarters in (10, 60):
+        context = builder.build(long_journal(n_quarters))
+        assert context['tokens'] <= builder.max_tokens
+        assert context['periods_included'] == builder.recent_periods
+        # Initial e os trimestres anteriores aos recentes viram uma linha somada
+        assert context['periods_summarized'] == n_quarters + 1 - builder.recent_periods
+        assert context['periods_omitted'] == 0
+        sizes[n_quarters] = context['tokens']
+    # Só os valores do balancete e da soma mudam: o tamanho não cresce com o número de trimestres
+    assert sizes[60] - sizes[10] < 20
+
+
+def test_older_periods_are_summed(ledger_backend):
+    context = LedgerContextBuilder(recent_periods=2).build(long_journal(4))
+    lines = context['text'].splitlines()
+    assert lines[-3].startswith("- Q4: ")
+    assert lines[-2].startswith("- Q3: ")
+    # Vendas somadas de Q1 e Q2 (1001 + 1002), além do lançamento inicial
+    assert lines[-1].startswith("- Initial a Q2 (soma de 3 períodos): ")
+    assert "Sales=-2,003.00" in lines[-1]
+    assert "Capital=-100,000.00" in lines[-1]
+
+
+@pytest.mark.parametrize("max_tokens", [150, 250, 400])
+def test_budget_is_enforced(ledger_backend, max_tokens):
+    builder = LedgerContextBuilder(max_tokens=max_tokens, recent_periods=60)
+    context = builder.build(long_journal(60))
+    assert context['tokens'] <= max_tokens
+    assert context['periods_omitted'] > 0
+    assert context['periods_included'] + context['periods_summarized'] + context['periods_omitted'] == 61
+    assert context['text'].endswith(f"({context['periods_omitted']} períodos mais antigos omitidos por limite de contexto)")
+    assert count_tokens(context['text']) == context['tokens']
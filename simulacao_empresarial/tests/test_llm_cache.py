@@ -0,0 +1,46 @@
+# Testes para o cache de respostas do modelo (agents/llm_cache.py)
+from agents.llm_cache import LLMCache
+
+
+def stored_last_used(cache, key):
+    return cache._conn.execute("SELECT last_used FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_and_misses(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite")
+    assert cache.get("a") is None
+    cache.put("a", "model", 0.0, "resposta")
+    assert cache.get("a") == "resposta"
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_last_used_is_written_in_batches(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite", touch_batch=3)
+    cache.put("a", "model", 0.0, "resposta")
+    written = stored_last_used(cache, "a")
+    cache.get("a")
+    assert stored_last_used(cache, "a") == written
+    cache.flush()
+    assert stored_last_used(cache, "a") > written
+    # Ao acumular touch_batch chaves pendentes, os acertos vão para o banco
+    cache.put("b", "model", 0.0, "B")
+    cache.put("c", "model", 0.0, "C")
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    assert len(cache._touched) == 2
+    cache.get("c")
+    assert not cache._touched
+
+
+def test_eviction_uses_pending_hits(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.put("a", "model", 0.0, "A")
+    cache.put("b", "model", 0.0, "B")
+    # "a" foi usada por último: "b" é a descartada
+    cache.get("a")
+    cache.put("c", "model", 0.0, "C")
+    assert cache.get("a") == "A"
+    assert cache.get("b") is None
+    assert cache.stats()['evictions'] == 1
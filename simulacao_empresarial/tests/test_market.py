@@ -0,0 +1,67 @@
+# Testes para a repartição do mercado entre as empresas (game_data/market.py)
+import numpy as np
+import pytest
+
+from game_data.market import apportion, clear_market, market_demand
+
+
+def test_apportion_uses_largest_remainders():
+    allocated, share = apportion(10, [1, 1, 1])
+    assert allocated.tolist() == [4, 3, 3]
+    assert share == pytest.approx([1 / 3] * 3)
+    allocated, _ = apportion(100, [0.5, 0.3, 0.2])
+    assert allocated.tolist() == [50, 30, 20]
+
+
+def test_apportion_zero_weights_split_evenly():
+    allocated, share = apportion(7, [0, 0])
+    assert allocated.tolist() == [4, 3]
+    assert share.tolist() == [0.5, 0.5]
+
+
+def test_apportion_batches():
+    rng = np.random.default_rng(0)
+    totals = rng.integers(0, 10000, size=50)
+    allocated, _ = apportion(totals, rng.random((50, 4)))
+    assert allocated.sum(axis=-1).tolist() == totals.tolist()
+    assert (allocated >= 0).all()
+
+
+def test_clear_market_respects_production():
+    result = clear_market(1000, [10, 20, 30], [100, 1000, 1000], [1000, 1000, 1000])
+    assert result['demand'].sum() == 1000
+    # A empresa mais barata atrai mais demanda, mas só vende o que produziu
+    assert result['demand'][0] > result['demand'][1] > result['demand'][2]
+    assert result['sales'][0] == 100
+    assert (result['sales'] <= [100, 1000, 1000]).all()
+    # A demanda não atendida migra para quem tem estoque
+    assert result['sales'].sum() == 1000
+    assert result['unmet_demand'] == 0
+
+
+def test_clear_market_without_spillover():
+    result = clear_market(1000, [10, 20, 30], [100, 1000, 1000], [1000, 1000, 1000], spillover=False)
+    assert result['sales'].tolist() == [100, result['demand'][1], result['demand'][2]]
+    assert result['unmet_demand'] == result['demand'][0] - 100
+
+
+def test_clear_market_short_supply():
+    result = clear_market(1000, [10, 10], [100, 200], [0, 0])
+    assert result['sales'].tolist() == [100, 200]
+    assert result['unmet_demand'] == 700
+
+
+def test_clear_market_many_markets():
+    rng = np.random.default_rng(1)
+    n_markets, n_firms = 20, 5
+    price = rng.uniform(5, 50, (n_markets, n_firms))
+    production = rng.integers(0, 500, (n_markets, n_firms))
+    marketing = rng.uniform(0, 5000, (n_markets, n_firms))
+    total = market_demand(1000, 1.0, price, marketing)
+    result = clear_market(total, price, production, marketing)
+    assert total.shape == (n_markets,)
+    assert (result['sales'] <= production).all()
+    assert result['sales'].sum(axis=-1) + result['unmet_demand'] == pytest.approx(total)
+    # Cada mercado é igual ao resultado de resolvê-lo sozinho
+    single = clear_market(total[3], price[3], production[3], marketing[3])
+    assert single['sales'].tolist() == result['sales'][3].tolist()
@@ -0,0 +1,70 @@
+# Testes para o registro de métricas (utils/metrics.py)
+import json
+
+import pytest
+
+from utils.metrics import MetricsRegistry
+
+
+def test_counters_aggregate_by_labels():
+    registry = MetricsRegistry()
+    registry.inc("llm_requests_total", agent="accountant", cache="miss")
+    registry.inc("llm_requests_total", cache="miss", agent="accountant")
+    registry.inc("llm_requests_total", 3, agent="economist", cache="hit")
+    counters = {tuple(sorted(c['labels'].items())): c['value'] for c in registry.snapshot()['counters']}
+    # A ordem dos rótulos não cria séries diferentes
+    assert counters == {
+        (('agent', 'accountant'), ('cache', 'miss')): 2,
+        (('agent', 'economist'), ('cache', 'hit')): 3,
+    }
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=(0.1, 1, 10))
+    for value in (0.05, 0.1, 0.5, 5, 50):
+        registry.observe("quarter_phase_seconds", value, phase="post")
+    [histogram] = registry.snapshot()['histograms']
+    assert histogram['count'] == 5
+    assert histogram['sum'] == pytest.approx(55.65)
+
+    lines = registry.to_prometheus().splitlines()
+    assert "# TYPE quarter_phase_seconds histogram" in lines
+    assert 'quarter_phase_seconds_bucket{phase="post",le="0.1"} 2' in lines
+    assert 'quarter_phase_seconds_bucket{phase="post",le="1"} 3' in lines
+    assert 'quarter_phase_seconds_bucket{phase="post",le="10"} 4' in lines
+    assert 'quarter_phase_seconds_bucket{phase="post",le="+Inf"} 5' in lines
+    assert 'quarter_phase_seconds_count{phase="post"} 5' in lines
+
+
+def test_timer_records_on_exception():
+    registry = MetricsRegistry()
+    with pytest.raises(RuntimeError):
+        with registry.timer("llm_request_seconds", agent="economist"):
+            raise RuntimeError("falhou")
+    assert registry.snapshot()['histograms'][0]['count'] == 1
+
+
+def test_prometheus_label_formatting():
+    registry = MetricsRegistry()
+    registry.describe("kpi_queries_total", "Perguntas respondidas")
+    registry.inc("kpi_queries_total", source="kpi", question='diz "olá"\\\nfim')
+    registry.inc("uptime_total")
+    lines = registry.to_prometheus().splitlines()
+    assert lines[:2] == ["# HELP kpi_queries_total Perguntas respondidas", "# TYPE kpi_queries_total counter"]
+    # Rótulos em ordem alfabética, com aspas, barras e quebras de linha escapadas
+    assert 'kpi_queries_total{question="diz \\"olá\\"\\\\\\nfim",source="kpi"} 1' in lines
+    assert "uptime_total 1" in lines
+    assert "# HELP uptime_total" not in "\n".join(lines)
+
+
+def test_jsonl_output(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    registry = MetricsRegistry(jsonl_path=path)
+    registry.log_event({'event': 'quarter', 'quarter': 1})
+    registry.inc("llm_requests_total", agent="accountant")
+    registry.write_jsonl()
+    event, state = (json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())
+    assert event['quarter'] == 1
+    assert state['counters'][0]['value'] == 1
+    registry.reset()
+    assert registry.snapshot() == {'counters': [], 'histograms': []}
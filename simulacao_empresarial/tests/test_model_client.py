@@ -0,0 +1,167 @@
+# Testes para a camada de chamadas ao modelo (agents/model_client.py)
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from agents import resources
+from agents.llm_cache import ainvoke_cached, invoke_cached
+from agents.model_client import ConcurrencyLimiter, ModelClient, call_deadline
+from server.model_stub import ModelStub, create_app
+from utils.metrics import get_registry
+
+
+class FakeLLM:
+    model_name = "fake"
+    temperature = 0.0
+
+    def __init__(self, errors=0):
+        self.errors = errors
+        self.timeouts = []
+
+    def invoke(self, prompt_value, timeout=None):
+        self.timeouts.append(timeout)
+        if self.errors:
+            self.errors -= 1
+            raise TimeoutError("lento")
+        return f"resposta para {prompt_value.to_string()}"
+
+
+class Prompt:
+    def __init__(self, text):
+        self.text = text
+
+    def to_string(self):
+        return self.text
+
+
+def test_invoke_without_deadline_sends_no_timeout():
+    llm = FakeLLM()
+    assert ModelClient().invoke(llm, Prompt("a")) == "resposta para a"
+    assert llm.timeouts == [None]
+
+
+def test_deadline_becomes_request_timeout():
+    llm = FakeLLM()
+    with call_deadline(time.monotonic() + 5):
+        ModelClient().invoke(llm, Prompt("a"))
+    assert 0 < llm.timeouts[0] <= 5
+
+
+def test_retries_stop_at_deadline():
+    llm = FakeLLM(errors=10)
+    client = ModelClient(max_retries=10, backoff_base=1.0, backoff_cap=1.0)
+    client.backoff = lambda attempt, error: 1.0
+    start = time.monotonic()
+    with call_deadline(time.monotonic() + 0.5), pytest.raises(TimeoutError):
+        client.invoke(llm, Prompt("a"))
+    # Uma única tentativa: a espera até a próxima passaria do prazo
+    assert len(llm.timeouts) == 1
+    assert time.monotonic() - start < 0.5
+
+
+def test_expired_deadline_fails_before_calling():
+    llm = FakeLLM()
+    with call_deadline(time.monotonic() - 1), pytest.raises(TimeoutError):
+        ModelClient().invoke(llm, Prompt("a"))
+    assert llm.timeouts == []
+
+
+def waiter_on_closed_loop(limiter):
+    # Uma chamada assíncrona fica na fila e o event loop dela é fechado sem cancelá-la
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(limiter.aacquire())
+    loop.run_until_complete(asyncio.sleep(0))
+    assert not task.done()
+    loop.close()
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_release_skips_waiters_on_closed_loops():
+    limiter = ConcurrencyLimiter(1)
+    limiter.acquire()
+    waiter_on_closed_loop(limiter)
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()), daemon=True)
+    thread.start()
+    while len(limiter._waiters) < 2:
+        time.sleep(0.001)
+    # A vaga pula o loop fechado e vai para a thread que espera
+    limiter.release()
+    assert acquired.wait(1)
+    thread.join()
+    waiter_on_closed_loop(limiter)
+    limiter.release()
+    assert limiter.active == 0
+    assert not limiter._waiters
+
+
+@pytest.fixture
+def model_stub(monkeypatch):
+    # Endpoint simulado da OpenAI (server/model_stub.py) em um event loop próprio
+    stub = ModelStub(latency=0.2)
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_app(stub))
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = runner.addresses[0][1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("MODEL_BACKEND", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{port}/v1")
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setenv("LLM_CACHE", "off")
+    resources.clear()
+    get_registry().reset()
+    yield stub
+    resources.clear()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(runner.cleanup())
+    loop.close()
+
+
+def counter(name, **labels):
+    return sum(item['value'] for item in get_registry().snapshot()['counters']
+               if item['name'] == name and all(item['labels'].get(k) == v for k, v in labels.items()))
+
+
+def histogram_count(name):
+    return sum(item['count'] for item in get_registry().snapshot()['histograms'] if item['name'] == name)
+
+
+def test_async_calls_from_different_event_loops(model_stub):
+    prompt = resources.get_chat_prompt("Pergunta {n}")
+    llm = resources.get_llm()
+    # Cada asyncio.run cria e fecha um loop; o cliente HTTP assíncrono não pode ser compartilhado entre eles
+    for n in range(2):
+        response = asyncio.run(ainvoke_cached(prompt, llm, {"n": n}, agent="test"))
+        assert response.content.startswith("Resposta simulada")
+    assert model_stub.requests == 2
+
+
+def test_coalesced_calls_are_recorded_once(model_stub):
+    prompt = resources.get_chat_prompt("Mesma pergunta")
+    llm = resources.get_llm()
+    barrier = threading.Barrier(4)
+    responses = []
+
+    def ask():
+        barrier.wait()
+        responses.append(invoke_cached(prompt, llm, {}, agent="test").content)
+
+    threads = [threading.Thread(target=ask) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(responses)) == 1 and len(responses) == 4
+    assert model_stub.requests == 1
+    assert counter("llm_coalesced_total") == 3
+    assert histogram_count("llm_request_seconds") == 1
+    prompt_tokens = counter("llm_tokens_total", type="prompt")
+    assert 0 < prompt_tokens < 10
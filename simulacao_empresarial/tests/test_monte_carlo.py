@@ -0,0 +1,76 @@
+# Testes para a simulação de Monte Carlo do mercado (game_data/monte_carlo.py)
+import numpy as np
+import pytest
+
+from game_data.economy import Economy
+from game_data.formulas import PRODUCTION_COST_PER_UNIT
+from game_data.monte_carlo import MarketMonteCarlo
+
+
+DECISIONS = dict(price=[40, 45, 50], production=[600, 500, 400], marketing=[2000, 0, 5000],
+                 research=[1000, 0, 0], donations=[0, 100, 0])
+
+
+def test_output_shapes():
+    paths = MarketMonteCarlo(seed=1).simulate_paths(n_paths=7, n_quarters=3)
+    for values in paths.values():
+        assert values.shape == (3, 7)
+    outcomes = MarketMonteCarlo(seed=1).simulate_outcomes(**DECISIONS, n_paths=7, n_quarters=3)
+    assert outcomes["market_share"].shape == (3,)
+    for key in ("total_market_demand", "demand", "revenue", "profit", "cumulative_profit"):
+        assert outcomes[key].shape == (3, 7)
+    bands = MarketMonteCarlo(seed=1).outcome_bands(**DECISIONS, n_paths=50, n_quarters=3)
+    assert bands["quarters"] == [1, 2, 3]
+    assert len(bands["profit"][50]) == 3
+    assert len(bands["probability_of_loss"]) == 3
+
+
+def test_same_seed_is_reproducible():
+    first = MarketMonteCarlo(seed=42).simulate_outcomes(**DECISIONS, n_paths=200, n_quarters=3)
+    second = MarketMonteCarlo(seed=42).simulate_outcomes(**DECISIONS, n_paths=200, n_quarters=3)
+    other = MarketMonteCarlo(seed=43).simulate_outcomes(**DECISIONS, n_paths=200, n_quarters=3)
+    for key, values in first.items():
+        assert np.array_equal(values, second[key])
+    assert not np.array_equal(first["profit"], other["profit"])
+
+
+def test_paths_follow_economy_rules():
+    paths = MarketMonteCarlo(seed=3).simulate_paths(n_paths=500, n_quarters=8)
+    base_demand = paths["base_demand"]
+    assert ((base_demand >= Economy.MIN_BASE_DEMAND) & (base_demand <= Economy.MAX_BASE_DEMAND)).all()
+    for index, condition in enumerate(Economy.CONDITIONS):
+        low, high = Economy.MULTIPLIER_RANGES[condition]
+        mask = paths["conditions"] == index
+        for key in ("market_multiplier", "demand_multiplier"):
+            assert ((paths[key][mask] >= low) & (paths[key][mask] <= high)).all()
+
+
+def test_small_n_matches_scalar_formulas():
+    # Cada caminho, refeito trimestre a trimestre com as regras escalares do jogo,
+    # deve dar os mesmos números do cálculo em lote
+    n_paths, n_quarters = 5, 3
+    paths = MarketMonteCarlo(seed=7).simulate_paths(n_paths, n_quarters)
+    outcomes = MarketMonteCarlo(seed=7).simulate_outcomes(**DECISIONS, n_paths=n_paths, n_quarters=n_quarters)
+
+    for path in range(n_paths):
+        share = 50
+        cumulative = 0
+        for quarter in range(n_quarters):
+            price, production, marketing, research, donations = (
+                DECISIONS[key][quarter] for key in ("price", "production", "marketing", "research", "donations")
+            )
+            base_demand = paths["base_demand"][quarter, path]
+            assert outcomes["market_share"][quarter] == pytest.approx(share)
+            assert outcomes["total_market_demand"][quarter, path] == \
+                int(base_demand * paths["market_multiplier"][quarter, path])
+
+            raw_demand = int(base_demand * max(0, 1 - price / 100) * min(2, 1 + marketing / 10000)
+                             * paths["demand_multiplier"][quarter, path])
+            sales = min(int(raw_demand * (share / 100)), production)
+            profit = sales * price - (production * PRODUCTION_COST_PER_UNIT + marketing + research + donations)
+            cumulative += profit
+            assert outcomes["demand"][quarter, path] == sales
+            assert outcomes["profit"][quarter, path] == pytest.approx(profit)
+            assert outcomes["cumulative_profit"][quarter, path] == pytest.approx(cumulative)
+
+            share = max(0, min(100, share + marketing / 10000 - price / 100 + research / 5000))
@@ -0,0 +1,83 @@
+# Testes para o modelo local determinístico (agents/offline_model.py)
+import json
+import os
+import sqlite3
+
+import pytest
+
+from agents.llm_cache import LLMCache
+from agents.offline_model import TEMPLATES, OfflineChatModel
+
+
+def test_templates_are_deterministic():
+    model = OfflineChatModel()
+    prompt = "Você é o contador da empresa. Analise o razão contábil do trimestre."
+    first = model.invoke(prompt)
+    assert first.content in TEMPLATES["accountant"]
+    assert OfflineChatModel().invoke(prompt).content == first.content
+    assert first.usage_metadata['total_tokens'] > 0
+
+
+@pytest.mark.parametrize("prompt, kind", [
+    ("Descreva a economia do trimestre", "economy"),
+    ("O que fez cada competidor?", "competitors"),
+    ("Sugira as decisões estratégicas", "decision"),
+    ("Olá", "default"),
+])
+def test_templates_by_kind(prompt, kind):
+    assert OfflineChatModel().invoke(prompt).content in TEMPLATES[kind]
+
+
+def test_json_decisions():
+    content = OfflineChatModel().invoke("Responda apenas com um JSON com as chaves price e production").content
+    decisions = json.loads(content)
+    assert set(decisions) == {"price", "production", "marketing", "research", "donations"}
+    assert all(value >= 0 for value in decisions.values())
+
+
+def test_stream_matches_invoke():
+    model = OfflineChatModel()
+    prompt = "Descreva a economia do trimestre"
+    assert "".join(chunk.content for chunk in model.stream(prompt)) == model.invoke(prompt).content
+
+
+def record(path, responses):
+    cache = LLMCache(path)
+    for prompt, response in responses.items():
+        cache.put(LLMCache.make_key("gpt-4o-mini", 0.0, prompt), "gpt-4o-mini", 0.0, response)
+    cache.flush()
+    cache._conn.close()
+
+
+def test_replay_returns_recorded_responses_without_writing(tmp_path):
+    path = tmp_path / "gravado.sqlite"
+    record(path, {"Descreva a economia do trimestre": "Resposta gravada do modelo real"})
+    before = path.read_bytes()
+    mtime = os.stat(path).st_mtime_ns
+
+    model = OfflineChatModel(replay_path=str(path))
+    assert model.invoke("Descreva a economia do trimestre").content == "Resposta gravada do modelo real"
+    # Prompts sem resposta gravada recebem o texto padrão
+    assert model.invoke("O que fez cada competidor?").content in TEMPLATES["competitors"]
+
+    assert path.read_bytes() == before
+    assert os.stat(path).st_mtime_ns == mtime
+    assert sorted(os.listdir(tmp_path)) == ["gravado.sqlite"]
+
+
+def test_replay_does_not_create_tables(tmp_path):
+    path = tmp_path / "outro.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE notas (texto TEXT)")
+    conn.commit()
+    conn.close()
+    before = path.read_bytes()
+    assert OfflineChatModel(replay_path=str(path)).invoke("Olá").content in TEMPLATES["default"]
+    assert path.read_bytes() == before
+
+
+def test_replay_of_missing_file_is_an_error(tmp_path):
+    model = OfflineChatModel(replay_path=str(tmp_path / "nao_existe.sqlite"))
+    with pytest.raises(ValueError):
+        model.invoke("Olá")
+    assert not (tmp_path / "nao_existe.sqlite").exists()
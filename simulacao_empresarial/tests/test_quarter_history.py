@@ -0,0 +1,60 @@
+# Testes para o histórico colunar dos trimestres (agents/quarter_history.py)
+import numpy as np
+import pandas as pd
+
+from agents.quarter_history import QuarterHistory, flatten, scan_archive, unflatten
+
+
+def report(sales, cash, extra=None):
+    data = {
+        'Income Statement': {'Sales': sales, 'Net Profit': sales * 0.1},
+        'Cash Flow': {'Ending Cash': {'Available Cash': cash}},
+    }
+    if extra is not None:
+        data['Income Statement']['Donations'] = extra
+    return data
+
+
+def make_history():
+    history = QuarterHistory(capacity=2)
+    history.append(1, report(1000.0, 5000.0), analysis="Primeiro trimestre")
+    history.append(2, report(1200.0, 4500.0, extra=50.0), economy="Mercado forte")
+    history.append(3, report(900.0, 4000.0), analysis="Queda nas vendas")
+    return history
+
+
+def test_flatten_round_trip():
+    data = report(1000.0, 5000.0)
+    assert flatten(data)['Cash Flow.Ending Cash.Available Cash'] == 5000.0
+    assert unflatten(flatten(data)) == data
+
+
+def test_parquet_round_trip(tmp_path):
+    history = make_history()
+    path = tmp_path / "jogo.parquet"
+    history.to_parquet(path)
+    loaded = QuarterHistory.from_parquet(path)
+
+    assert len(loaded) == 3
+    assert loaded.columns == history.columns
+    np.testing.assert_array_equal(loaded.quarters, history.quarters)
+    for name in history.columns:
+        # Colunas que surgiram depois continuam NaN nos trimestres anteriores
+        np.testing.assert_array_equal(loaded.column(name), history.column(name))
+    assert loaded.texts == history.texts
+    pd.testing.assert_frame_equal(loaded.to_dataframe(), history.to_dataframe())
+    assert loaded.row_financials(1) == history.row_financials(1)
+
+    # O histórico recarregado continua aceitando trimestres
+    loaded.append(4, report(1100.0, 4200.0))
+    assert loaded.last_financials()['Income Statement']['Sales'] == 1100.0
+
+
+def test_scan_archive_reads_several_games(tmp_path):
+    for game_id in ("a", "b"):
+        make_history().to_parquet(tmp_path / f"{game_id}.parquet", game_id=game_id)
+    frame = scan_archive(str(tmp_path), columns=['game_id', 'quarter', 'Income Statement.Sales'])
+    assert len(frame) == 6
+    assert sorted(frame['game_id'].unique()) == ["a", "b"]
+    # game_id não vira coluna de relatório ao recarregar um arquivo
+    assert 'game_id' not in QuarterHistory.from_parquet(tmp_path / "a.parquet").columns
@@ -0,0 +1,90 @@
+# Testes para os snapshots de jogo (utils/snapshot.py)
+import pickle
+import struct
+
+import numpy as np
+import pytest
+
+from agents.game_manager_agent import GameManagerAgent
+from ai_agents.game_manager import GameManager
+from utils.snapshot import dumps_snapshot, loads_snapshot
+
+
+def test_round_trip_of_plain_state():
+    state = {
+        'numbers': [1, 2.5, None, True],
+        'tuple': (1, ('a', 2)),
+        'keys': {1: 'um', (2, 3): 'par'},
+        'array': np.arange(6, dtype=np.float64).reshape(2, 3),
+        'nested': {'__array__': 'texto'},
+    }
+    restored = loads_snapshot(dumps_snapshot("engine", state), "engine")
+    assert restored['numbers'] == state['numbers']
+    assert restored['tuple'] == state['tuple']
+    assert restored['keys'] == state['keys']
+    assert restored['nested'] == state['nested']
+    np.testing.assert_array_equal(restored['array'], state['array'])
+
+
+def test_rejects_objects():
+    with pytest.raises(ValueError):
+        dumps_snapshot("engine", {'game': object()})
+    with pytest.raises(ValueError):
+        dumps_snapshot("engine", {'array': np.array([object()])})
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"JGSN",
+    b"garbage" * 10,
+    struct.pack("<4sH16s", b"JGSN", 1, b"engine") + pickle.dumps({'a': 1}),
+    struct.pack("<4sH16s", b"JGSN", 2, b"engine") + b"not a zip",
+    dumps_snapshot("engine", {'a': 1})[:-10],
+])
+def test_invalid_snapshots(data):
+    with pytest.raises(ValueError):
+        loads_snapshot(data, "engine")
+
+
+def test_kind_must_match():
+    with pytest.raises(ValueError, match="agent"):
+        loads_snapshot(dumps_snapshot("engine", {}), "agent")
+
+
+def test_engine_round_trip():
+    game = GameManager("Jogador", seed=7)
+    for _ in range(3):
+        game.play_quarter(50, 1000, 5000, 0, 0, 0)
+    restored = GameManager.restore(game.snapshot())
+    assert restored.snapshot() == game.snapshot()
+    # O gerador aleatório continua do mesmo ponto
+    assert restored.play_quarter(45, 800, 3000, 0, 0, 0) == game.play_quarter(45, 800, 3000, 0, 0, 0)
+
+
+def test_agent_round_trip(ledger_backend):
+    game = GameManagerAgent()
+    for _ in range(2):
+        game.run_game({'production': 1000, 'price': 50, 'marketing': 5000})
+    data = game.snapshot()
+    restored = GameManagerAgent.restore(data)
+    assert restored.game_id != game.game_id
+    assert restored.snapshot() == data
+    assert restored.accountant.journal.checkpoint_dates == ['Q1 Close', 'Q2 Close']
+    assert restored.history.to_dataframe().equals(game.history.to_dataframe())
+
+
+def test_agent_snapshot_moves_between_backends(monkeypatch, ledger_backend):
+    game = GameManagerAgent()
+    game.run_game({'production': 1000, 'price': 50, 'marketing': 5000})
+    other = "sqlite" if ledger_backend == "memory" else "memory"
+    monkeypatch.setenv("LEDGER_BACKEND", other)
+    restored = GameManagerAgent.restore(game.snapshot())
+    assert type(restored.accountant.journal) is not type(game.accountant.journal)
+    assert restored.accountant.journal.trial_balance() == game.accountant.journal.trial_balance()
+
+
+@pytest.mark.parametrize("ledger_backend", ["sqlite"], indirect=True)
+def test_stored_game_id_cannot_be_reused(ledger_backend):
+    GameManagerAgent("jogo").run_game({'production': 1000, 'price': 50, 'marketing': 5000})
+    with pytest.raises(ValueError, match="restore"):
+        GameManagerAgent("jogo")
@@ -0,0 +1,36 @@
+# Testes para o torneio entre estratégias (ai_agents/tournament.py)
+import pandas as pd
+import pytest
+
+from ai_agents.tournament import Match, Strategy, leaderboard, run_tournament
+
+
+STRATEGIES = ["fixed", "heuristic", "aggressive"]
+
+
+def test_incomplete_strategy_cannot_be_instantiated():
+    class NoDecisions(Strategy):
+        name = "incompleta"
+
+    with pytest.raises(TypeError):
+        NoDecisions()
+
+
+def test_match_is_deterministic():
+    first = Match(STRATEGIES, seed=11).play(4)
+    second = Match(STRATEGIES, seed=11).play(4)
+    assert first == second
+    assert [result['strategy'] for result in first] == STRATEGIES
+
+
+def test_tournament_is_reproducible_across_workers():
+    # Lotes de 2 jogos: com 2 processos, cada processo joga lotes diferentes
+    serial = run_tournament(STRATEGIES, n_games=6, n_quarters=3, workers=1, seed=3, chunksize=2)
+    parallel = run_tournament(STRATEGIES, n_games=6, n_quarters=3, workers=2, seed=3, chunksize=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    assert len(serial) == 6 * len(STRATEGIES)
+    assert (serial.groupby('game_id')['won'].sum() == 1).all()
+    board = leaderboard(serial)
+    assert board['games'].tolist() == [6] * len(STRATEGIES)
+    assert board['mean_balance'].is_monotonic_decreasing
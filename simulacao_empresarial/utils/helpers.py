@@ -1 +1,18 @@
-# Funções auxiliares para uso geral
\ No newline at end of file
+import numpy as np
+
+
+def to_jsonable(data):
+    # Converte estados do jogo (dicts aninhados, tipos NumPy, mensagens do LLM) em JSON puro
+    if isinstance(data, dict):
+        return {str(k): to_jsonable(v) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_jsonable(item) for item in data]
+    if isinstance(data, np.ndarray):
+        return data.tolist()
+    if isinstance(data, np.generic):
+        return data.item()
+    if data is None or isinstance(data, (str, int, float, bool)):
+        return data
+    if hasattr(data, 'content'):
+        return data.content
+    return str(data)
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos histogramas de duração, no formato do Prometheus
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class MetricsRegistry:
+    """Contadores e histogramas em memória, exportáveis em texto Prometheus ou JSON lines."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, jsonl_path=None):
+        self.buckets = tuple(buckets)
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(self.buckets)}
+            histogram['count'] += 1
+            histogram['sum'] += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        # Mede o bloco e registra a duração mesmo se ele levantar exceção
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+            histograms = [
+                {'name': name, 'labels': dict(labels), 'count': data['count'], 'sum': data['sum']}
+                for (name, labels), data in self._histograms.items()
+            ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self):
+        def format_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        for (name, labels), data in histograms:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            for bound, count in zip(self.buckets, data['buckets']):
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {data['count']}")
+            lines.append(f"{name}_sum{format_labels(labels)} {data['sum']}")
+            lines.append(f"{name}_count{format_labels(labels)} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+    def log_event(self, event):
+        # Um evento por linha (ex.: tempos de cada fase de um trimestre), se houver arquivo configurado
+        if not self.jsonl_path:
+            return
+        line = json.dumps({'timestamp': time.time(), **event}, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+    def write_jsonl(self, path=None):
+        # Acrescenta o estado atual de todas as métricas como uma linha JSON
+        path = path or self.jsonl_path
+        line = json.dumps({'timestamp': time.time(), **self.snapshot()}, ensure_ascii=False)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    # Registro compartilhado pelo processo; METRICS_JSONL ativa o log de eventos por trimestre
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(jsonl_path=os.getenv("METRICS_JSONL") or None)
+            _registry.describe("quarter_phase_seconds", "Duração de cada fase de um trimestre")
+            _registry.describe("llm_request_seconds", "Latência das chamadas ao modelo por agente")
+            _registry.describe("llm_tokens_total", "Tokens de prompt e de resposta por agente")
+            _registry.describe("llm_requests_total", "Chamadas ao modelo por agente e resultado do cache")
+            _registry.describe("kpi_queries_total", "Perguntas respondidas pelos indicadores locais ou pelo agente")
+        return _registry
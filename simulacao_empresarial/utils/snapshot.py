@@ -0,0 +1,90 @@
+import io
+import json
+import struct
+import zipfile
+
+import numpy as np
+
+# Formato: cabeçalho fixo (assinatura, versão, tipo do jogo) + arquivo .npz com o estado.
+# O estado contém apenas dados simples (dicts, listas, tuplas, números, strings e arrays NumPy),
+# nunca objetos do jogo, para que mudanças nas classes não quebrem snapshots antigos.
+# A estrutura vai em JSON e os arrays numéricos em membros do .npz, lidos com allow_pickle=False:
+# carregar um snapshot nunca executa código, mesmo vindo de uma requisição HTTP.
+MAGIC = b"JGSN"
+SNAPSHOT_VERSION = 2
+_HEADER = struct.Struct("<4sH16s")
+_STATE_KEY = "state"
+
+
+def _encode(value, arrays):
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise ValueError("Snapshot não aceita arrays de objetos")
+        name = f"a{len(arrays)}"
+        arrays[name] = value
+        return {"__array__": name}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            if "__array__" in value or "__tuple__" in value or "__items__" in value:
+                return {"__items__": [[key, _encode(item, arrays)] for key, item in value.items()]}
+            return {key: _encode(item, arrays) for key, item in value.items()}
+        # Chaves não textuais (ex.: números) são guardadas como pares
+        return {"__items__": [[_encode(key, arrays), _encode(item, arrays)] for key, item in value.items()]}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item, arrays) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item, arrays) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise ValueError(f"Tipo não suportado em snapshot: {type(value).__name__}")
+
+
+def _decode(value, arrays):
+    if isinstance(value, list):
+        return [_decode(item, arrays) for item in value]
+    if isinstance(value, dict):
+        if "__array__" in value:
+            return arrays[value["__array__"]]
+        if "__tuple__" in value:
+            return tuple(_decode(item, arrays) for item in value["__tuple__"])
+        if "__items__" in value:
+            return {_decode(key, arrays): _decode(item, arrays) for key, item in value["__items__"]}
+        return {key: _decode(item, arrays) for key, item in value.items()}
+    return value
+
+
+def dumps_snapshot(kind, state):
+    arrays = {}
+    structure = json.dumps(_encode(state, arrays), ensure_ascii=False).encode('utf-8')
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **{_STATE_KEY: np.frombuffer(structure, dtype=np.uint8)}, **arrays)
+    header = _HEADER.pack(MAGIC, SNAPSHOT_VERSION, kind.encode('ascii'))
+    return header + buffer.getvalue()
+
+
+def loads_snapshot(data, kind):
+    if len(data) < _HEADER.size:
+        raise ValueError("Snapshot inválido: dados truncados")
+    magic, version, stored_kind = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Snapshot inválido: assinatura desconhecida")
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot na versão {version}, mais nova que a suportada ({SNAPSHOT_VERSION})")
+    if version < SNAPSHOT_VERSION:
+        # A versão 1 usava pickle, que executa código ao carregar: não é mais aceita
+        raise ValueError(f"Snapshot na versão {version} (pickle) não é mais suportado; gere um novo snapshot")
+    try:
+        stored_kind = stored_kind.rstrip(b"\0").decode('ascii')
+    except UnicodeDecodeError:
+        raise ValueError("Snapshot inválido: tipo de jogo ilegível")
+    if stored_kind != kind:
+        raise ValueError(f"Snapshot de '{stored_kind}' não pode ser restaurado como '{kind}'")
+    try:
+        with np.load(io.BytesIO(data[_HEADER.size:]), allow_pickle=False) as archive:
+            arrays = {name: archive[name] for name in archive.files}
+        structure = json.loads(arrays.pop(_STATE_KEY).tobytes().decode('utf-8'))
+        return _decode(structure, arrays)
+    except (zipfile.BadZipFile, OSError, KeyError, EOFError, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Snapshot inválido: conteúdo corrompido ({e})") from e